@@ -1,7 +1,10 @@
 from __future__ import annotations
 import copy
+import math
 import random
-from typing import Iterable, Optional
+import time
+from statistics import NormalDist
+from typing import Any, Callable, Iterable, Optional
 
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -21,6 +24,10 @@ class AdversarialWordle:
     - statuses: a list of the statuses returned by the Adversary player
                 NOTE: unlike CSC110 Assignment 2, each status is represented as a tuple
                 instead of a list.
+                NOTE: guesses and statuses are read-only properties that return a new list on each
+                access, so changing the list does not change the game. Use record_guesser_move and
+                record_adversary_move to make moves, get_last_guess and get_last_status for the most
+                recent moves, and get_num_moves to count the moves.
 
     Representation Invariants:
     - len(self.word_set) > 0
@@ -35,9 +42,20 @@ class AdversarialWordle:
     word_set: frozenset[str]  # frozenset is like set, but immutable
     word_size: int
     max_guesses: int
-    guesses: list[str]
-    statuses: list[tuple[str, ...]]  # tuple[str, ...] means "a tuple of strings"
+
+    # Private Instance Attributes:
+    #   - _possible_answers:
+    #       the words in word_set that are consistent with the guesses and statuses so far
+    #   - _guess_chain:
+    #       the guesses made so far, most recent first, or None if no guesses have been made
+    #   - _status_chain:
+    #       the statuses returned so far, most recent first, or None if no statuses have been returned
+    #
+    # The chains are immutable and shared between a game state and its copies, so copying a
+    # game state and recording a move takes constant time and memory.
     _possible_answers: frozenset[str]
+    _guess_chain: Optional[_MoveChain]
+    _status_chain: Optional[_MoveChain]
 
     def __init__(self, word_set: Iterable[str], max_guesses: int) -> None:
         """Initialize a new Adversarial Wordle game with the given word_set and max_guesses.
@@ -53,14 +71,46 @@ class AdversarialWordle:
             self.word_set = frozenset(word_set)
         self.word_size = len(next(iter(word_set)))
         self.max_guesses = max_guesses
-        self.guesses = []
-        self.statuses = []
+        self._guess_chain = None
+        self._status_chain = None
         self._possible_answers = self.word_set
 
+    @property
+    def guesses(self) -> list[str]:
+        """Return a list of the guesses made by the Guesser player, in the order they were made."""
+        return list(_chain_to_tuple(self._guess_chain))
+
+    @property
+    def statuses(self) -> list[tuple[str, ...]]:
+        """Return a list of the statuses returned by the Adversary player, in the order they were returned."""
+        return list(_chain_to_tuple(self._status_chain))
+
+    def get_num_moves(self) -> int:
+        """Return the number of moves made so far by both players.
+
+        This takes constant time, unlike len(self.guesses) + len(self.statuses).
+        """
+        return _chain_length(self._guess_chain) + _chain_length(self._status_chain)
+
+    def get_last_guess(self) -> Optional[str]:
+        """Return the most recent guess made by the Guesser player, or None if no guesses have been made.
+
+        This takes constant time, unlike self.guesses[-1].
+        """
+        return None if self._guess_chain is None else self._guess_chain.move
+
+    def get_last_status(self) -> Optional[tuple[str, ...]]:
+        """Return the most recent status returned by the Adversary player, or None if no statuses
+        have been returned.
+
+        This takes constant time, unlike self.statuses[-1].
+        """
+        return None if self._status_chain is None else self._status_chain.move
+
     def is_guesser_turn(self) -> bool:
         """Return whether it is the Guesser player's turn.
         """
-        return len(self.guesses) == len(self.statuses)
+        return _chain_length(self._guess_chain) == _chain_length(self._status_chain)
 
     def record_guesser_move(self, guess: str) -> None:
         """Record the given guess made by the Guesser player.
@@ -70,7 +120,7 @@ class AdversarialWordle:
         - len(guess) == self.word_size
         - guess in self._possible_answers
         """
-        self.guesses.append(guess)
+        self._guess_chain = _MoveChain(guess, self._guess_chain)
 
     def record_adversary_move(self, status: tuple[str, ...]) -> None:
         """Record the given status returned by the Adversary player.
@@ -80,10 +130,18 @@ class AdversarialWordle:
         - len(status) == self.word_size
         - _is_valid_status(status)
         """
-        self.statuses.append(status)
+        self._status_chain = _MoveChain(status, self._status_chain)
 
-        # Update self._possible_answers
-        self._possible_answers = _find_correct_answers(self._possible_answers, self.guesses, self.statuses)
+        # Update self._possible_answers. It is already consistent with the earlier rounds,
+        # so only the newest guess and status need to be checked.
+        self._narrow_possible_answers(self._guess_chain.move, status)
+
+    def _narrow_possible_answers(self, guess: str, status: tuple[str, ...]) -> None:
+        """Narrow down self._possible_answers to the current possible answers for which guess has the given status.
+
+        Subclasses may override this to filter the answers some other way (e.g., with a precomputed table).
+        """
+        self._possible_answers = _find_correct_answers(self._possible_answers, [guess], [status])
 
     def copy_and_record_guesser_move(self, guess: str) -> AdversarialWordle:
         """Return a copy of this game state with the given guess recorded.
@@ -109,13 +167,26 @@ class AdversarialWordle:
         new_game.record_adversary_move(status)
         return new_game
 
+    def copy_and_record_move(self, move: str | tuple[str, ...]) -> AdversarialWordle:
+        """Return a copy of this game state with the given move recorded, for whichever player's turn it is.
+
+        Preconditions:
+        - if self.is_guesser_turn(), move satisfies the preconditions of copy_and_record_guesser_move
+        - if not self.is_guesser_turn(), move satisfies the preconditions of copy_and_record_adversary_move
+        """
+        if self.is_guesser_turn():
+            return self.copy_and_record_guesser_move(move)
+        else:
+            return self.copy_and_record_adversary_move(move)
+
     def _copy(self) -> AdversarialWordle:
-        """Return a copy of this game state."""
-        new_game = AdversarialWordle(self.word_set, self.max_guesses)
-        new_game.word_size = self.word_size
-        new_game.guesses.extend(self.guesses)
-        new_game.statuses.extend(self.statuses)
-        new_game._possible_answers = self._possible_answers
+        """Return a copy of this game state.
+
+        The copy shares all of its attributes with this game state (they are all immutable),
+        so this takes constant time and does not re-run the initializer.
+        """
+        new_game = object.__new__(type(self))
+        new_game.__dict__.update(self.__dict__)
         return new_game
 
     def get_possible_answers(self) -> list[str]:
@@ -130,29 +201,44 @@ class AdversarialWordle:
         else:
             return []
 
+    def is_possible_answer(self, word: str) -> bool:
+        """Return whether word is one of the possible answers for the current game state.
+
+        This is equivalent to word in self.get_possible_answers(), but does not copy the possible answers.
+        """
+        return self.get_winner() is None and word in self._possible_answers
+
+    def get_num_possible_answers(self) -> int:
+        """Return the number of possible answers for the current game state, or 0 if a player has won the game.
+
+        This is equivalent to len(self.get_possible_answers()), but does not copy the possible answers.
+        """
+        return len(self._possible_answers) if self.get_winner() is None else 0
+
     def get_status_for_answer(self, answer: str) -> tuple[str, ...]:
         """Return the status for the most recent guess with respect to the given answer.
 
         Preconditions:
         - not self.is_guesser_turn()
         """
-        return _get_guess_status(answer, self.guesses[-1])
+        return _get_guess_status(answer, self._guess_chain.move)
 
     def get_winner(self) -> Optional[str]:
         """Return the winner of the game ('Guesser' or 'Adversary').
 
         Return None if the game is not over.
         """
-        if len(self.guesses) != len(self.statuses):
+        num_statuses = _chain_length(self._status_chain)
+        if _chain_length(self._guess_chain) != num_statuses:
             # It is the Adversary's turn; no one has won yet
             return None
-        elif len(self.statuses) == 0:
+        elif num_statuses == 0:
             # No moves have been made; no one has won yet
             return None
-        elif all(s == CORRECT for s in self.statuses[-1]):
+        elif all(s == CORRECT for s in self._status_chain.move):
             # The Adversary returned an "all correct" guess; Guesser has won
             return 'Guesser'
-        elif len(self.statuses) == self.max_guesses:
+        elif num_statuses == self.max_guesses:
             # The Guesser has no more guesses; Adversary has won
             return 'Adversary'
         else:
@@ -166,15 +252,70 @@ class AdversarialWordle:
 
             [self.guesses[0], self.statuses[0], self.guesses[1], self.statuses[1], ...]
         """
+        guesses, statuses = _chain_to_tuple(self._guess_chain), _chain_to_tuple(self._status_chain)
         moves_so_far = []
-        for i in range(0, len(self.guesses)):
-            moves_so_far.append(self.guesses[i])
-            if i < len(self.statuses):  # self.statuses may be 1 shorter than self.guesses
-                moves_so_far.append(self.statuses[i])
+        for i in range(0, len(guesses)):
+            moves_so_far.append(guesses[i])
+            if i < len(statuses):  # statuses may be 1 shorter than guesses
+                moves_so_far.append(statuses[i])
 
         return moves_so_far
 
 
+class _MoveChain:
+    """An immutable link in a chain of moves, storing the most recent move first.
+
+    Recording a move creates a new link whose previous link is the old chain, so game states
+    that share a history also share the links for that history.
+
+    Instance Attributes:
+    - move: the most recent move in this chain
+    - previous: the chain of moves made before self.move, or None if self.move was the first move
+    - length: the number of moves in this chain
+    - moves: the moves in this chain as a tuple, from the first move to the most recent one,
+             or None if they have not been needed yet (see _chain_to_tuple)
+    """
+    __slots__ = ('move', 'previous', 'length', 'moves')
+    move: str | tuple[str, ...]
+    previous: Optional[_MoveChain]
+    length: int
+    moves: Optional[tuple]
+
+    def __init__(self, move: str | tuple[str, ...], previous: Optional[_MoveChain]) -> None:
+        """Initialize a new chain with move as its most recent move, after the moves in previous."""
+        self.move = move
+        self.previous = previous
+        self.length = _chain_length(previous) + 1
+        self.moves = None
+
+
+def _chain_length(chain: Optional[_MoveChain]) -> int:
+    """Return the number of moves in chain (0 if chain is None)."""
+    return 0 if chain is None else chain.length
+
+
+def _chain_to_tuple(chain: Optional[_MoveChain]) -> tuple:
+    """Return the moves in chain as a tuple, from the first move to the most recent one.
+
+    The tuple is cached in chain.moves, so it is only built the first time it is needed
+    by any of the game states sharing chain.
+
+    >>> _chain_to_tuple(_MoveChain('world', _MoveChain('hello', None)))
+    ('hello', 'world')
+    """
+    if chain is None:
+        return ()
+    if chain.moves is None:
+        moves = []
+        link = chain
+        while link is not None:
+            moves.append(link.move)
+            link = link.previous
+        moves.reverse()
+        chain.moves = tuple(moves)
+    return chain.moves
+
+
 ################################################################################
 # Guesser player classes
 ################################################################################
@@ -248,7 +389,7 @@ class RandomAdversary(Adversary):
         - not game.is_guesser_turn()
         """
         possible_answers = game.get_possible_answers()
-        current_guess = game.guesses[-1]
+        current_guess = game.get_last_guess()
 
         # Remove the current guess from the possible answers
         if len(possible_answers) > 1:
@@ -262,37 +403,92 @@ class RandomAdversary(Adversary):
 ################################################################################
 # Functions for running games
 ################################################################################
-def run_game(guesser: Guesser, adversary: Adversary, word_set_file: str, max_guesses: int) -> AdversarialWordle:
+def load_word_set(word_set_file: str) -> frozenset[str]:
+    """Return the words in word_set_file, one word per line, converted to lowercase.
+
+    Preconditions:
+    - word_set_file is a non-empty file with one word per line
+    """
+    with open(word_set_file) as f:
+        return frozenset(str.strip(line.lower()) for line in f)
+
+
+def run_game(guesser: Guesser, adversary: Adversary, word_set_file: str, max_guesses: int,
+             profiler: Optional[GameProfiler] = None) -> AdversarialWordle:
     """Run an Adversarial Wordle game between the two given players.
 
     Use the words in word_set_file, and use max_guesses as the maximum number of guesses.
 
     Return the AdversarialWordle instance after the game is complete.
 
+    Optional arguments:
+    - profiler: a GameProfiler that records the time spent in each phase of the game (default: None)
+
     Preconditions:
     - word_set_file is a non-empty with one word per line
     - all words in word_set_file have the same length
     - max_guesses >= 1
     """
-    with open(word_set_file) as f:
-        word_set = {str.strip(line.lower()) for line in f}
+    if profiler is None:
+        word_set = load_word_set(word_set_file)
+    else:
+        start = time.perf_counter()
+        word_set = load_word_set(word_set_file)
+        profiler.add_phase_time(PHASE_LOAD_WORDS, time.perf_counter() - start)
+
+    return play_game(guesser, adversary, word_set, max_guesses, profiler)
+
 
+def play_game(guesser: Guesser, adversary: Adversary, word_set: frozenset[str],
+              max_guesses: int, profiler: Optional[GameProfiler] = None) -> AdversarialWordle:
+    """Run an Adversarial Wordle game between the two given players, like run_game, with an already loaded word set.
+
+    This lets callers that play many games with the same words (e.g., a tournament) load them only once.
+
+    If profiler is not None, each move is timed (see _play_move), and the number of possible answers at
+    the start of each round is recorded in profiler.
+
+    Preconditions:
+    - word_set != set()
+    - all words in word_set have the same length
+    - max_guesses >= 1
+    """
     game = AdversarialWordle(word_set, max_guesses)
 
     while game.get_winner() is None:
-        guess = guesser.make_move(game)
-        game.record_guesser_move(guess)
-        status = adversary.make_move(game)
-        game.record_adversary_move(status)
+        if profiler is not None:
+            profiler.add_round_candidates(game.get_num_moves() // 2, game.get_num_possible_answers())
+
+        guess = _play_move(profiler, PHASE_GUESSER_MOVE, guesser.make_move, game)
+        _play_move(profiler, PHASE_RECORD_GUESSER_MOVE, game.record_guesser_move, guess)
+        status = _play_move(profiler, PHASE_ADVERSARY_MOVE, adversary.make_move, game)
+        _play_move(profiler, PHASE_RECORD_ADVERSARY_MOVE, game.record_adversary_move, status)
 
     return game
 
 
+def _play_move(profiler: Optional[GameProfiler], phase: str, move: Callable[[Any], Any], arg: Any) -> Any:
+    """Return move(arg), recording the time it took as the given phase in profiler, if profiler is not None.
+
+    This is the per-move hook of play_game: when there is no profiler, the only cost is this call.
+    """
+    if profiler is None:
+        return move(arg)
+
+    start = time.perf_counter()
+    result = move(arg)
+    profiler.add_phase_time(phase, time.perf_counter() - start)
+    return result
+
+
 def run_games(num_games: int,
               guesser: Guesser, adversary: Adversary,
               word_set_file: str, max_guesses: int,
               print_game: bool = True,
-              show_stats: bool = False) -> dict[str, int]:
+              show_stats: bool = False,
+              profiler: Optional[GameProfiler] = None,
+              target_ci_width: Optional[float] = None,
+              confidence: float = 0.95) -> dict[str, int]:
     """Run num_games games of Adversary Wordle between the two given players.
 
     Use the given word_set_file and max_guesses (these parameters are the same as
@@ -301,18 +497,26 @@ def run_games(num_games: int,
     Optional arguments:
     - print_game: print a record of each game (default: True)
     - show_stats: use Plotly to display statistics for the game runs (default: False)
+    - profiler: a GameProfiler that aggregates the time spent in each phase over all games,
+      whose report is printed after the win statistics (default: None)
+    - target_ci_width: if not None, num_games is only the maximum number of games, and the games stop
+      as soon as (after at least MIN_SEQUENTIAL_GAMES games) the confidence interval for the Guesser's
+      win rate (see wilson_interval) is at most this wide (default: None)
+    - confidence: the confidence level of the interval used with target_ci_width (default: 0.95)
+
+    The number of games actually played is stats['Guesser'] + stats['Adversary'], where stats is the
+    returned dictionary.
 
     Preconditions:
         - num_games >= 1
         - same preconditions for word_set_file and max_guesses as run_game
+        - target_ci_width is None or 0.0 < target_ci_width <= 1.0
+        - 0.0 < confidence < 1.0
     """
     stats = {'Guesser': 0, 'Adversary': 0}
     results = []
     for i in range(0, num_games):
-        guesser_copy = copy.copy(guesser)
-        adversary_copy = copy.copy(adversary)
-
-        game = run_game(guesser_copy, adversary_copy, word_set_file, max_guesses)
+        game = _run_copied_game(guesser, adversary, word_set_file, max_guesses, profiler)
         winner = game.get_winner()
         stats[winner] += 1
         results.append(winner)
@@ -320,8 +524,22 @@ def run_games(num_games: int,
         if print_game:
             print(f'Game {i} winner: {winner}. Moves: {game.get_move_sequence()}')
 
+        if target_ci_width is not None and i + 1 >= MIN_SEQUENTIAL_GAMES:
+            low, high = wilson_interval(stats['Guesser'], i + 1, confidence)
+            if high - low <= target_ci_width:
+                break
+
+    games_played = len(results)
     for outcome in stats:
-        print(f'{outcome}: {stats[outcome]}/{num_games} ({100.0 * stats[outcome] / num_games:.2f}%)')
+        print(f'{outcome}: {stats[outcome]}/{games_played} ({100.0 * stats[outcome] / games_played:.2f}%)')
+
+    if target_ci_width is not None:
+        low, high = wilson_interval(stats['Guesser'], games_played, confidence)
+        print(f'Played {games_played} of at most {num_games} games. Guesser win rate: '
+              f'[{100.0 * low:.2f}%, {100.0 * high:.2f}%] with {100.0 * confidence:.0f}% confidence')
+
+    if profiler is not None:
+        print(profiler.report())
 
     if show_stats:
         plot_game_statistics(results)
@@ -329,6 +547,35 @@ def run_games(num_games: int,
     return stats
 
 
+def run_profiled_games(num_games: int,
+                       guesser: Guesser, adversary: Adversary,
+                       word_set_file: str, max_guesses: int,
+                       print_game: bool = True,
+                       target_ci_width: Optional[float] = None,
+                       confidence: float = 0.95) -> tuple[dict[str, int], str]:
+    """Run games like run_games with a new GameProfiler, and return the stats together with the
+    profiler's report.
+
+    The parameters are the same as in run_games, which also prints the report along with the stats.
+
+    Preconditions:
+        - same preconditions as run_games
+    """
+    profiler = GameProfiler()
+    stats = run_games(num_games, guesser, adversary, word_set_file, max_guesses, print_game=print_game,
+                      profiler=profiler, target_ci_width=target_ci_width, confidence=confidence)
+    return stats, profiler.report()
+
+
+def _run_copied_game(guesser: Guesser, adversary: Adversary, word_set_file: str, max_guesses: int,
+                     profiler: Optional[GameProfiler]) -> AdversarialWordle:
+    """Run one game like run_game, between shallow copies of the given players.
+
+    Copying the players means that the state they keep during a game does not carry over to the next game.
+    """
+    return run_game(copy.copy(guesser), copy.copy(adversary), word_set_file, max_guesses, profiler)
+
+
 def plot_game_statistics(results: list[str]) -> None:
     """Plot the outcomes and win probabilities for a given list of Adversarial Wordle game results.
 
@@ -357,6 +604,201 @@ def plot_game_statistics(results: list[str]) -> None:
     fig.show()
 
 
+################################################################################
+# Sequential win rate estimation
+################################################################################
+# The minimum number of games played before a sequential run is allowed to stop early
+MIN_SEQUENTIAL_GAMES = 30
+
+
+def wilson_interval(wins: int, num_games: int, confidence: float = 0.95) -> tuple[float, float]:
+    """Return the Wilson score confidence interval for a win rate of wins out of num_games.
+
+    Unlike the usual normal approximation, the Wilson interval stays inside [0, 1] and does not
+    collapse to a single point when wins is 0 or num_games.
+
+    Preconditions:
+        - 0 <= wins <= num_games
+        - num_games >= 1
+        - 0.0 < confidence < 1.0
+
+    >>> low, high = wilson_interval(50, 100)
+    >>> round(low, 4), round(high, 4)
+    (0.4038, 0.5962)
+    >>> round(wilson_interval(0, 10)[0], 4)
+    0.0
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rate = wins / num_games
+    denominator = 1 + z * z / num_games
+    centre = (rate + z * z / (2 * num_games)) / denominator
+    half_width = z * math.sqrt(rate * (1 - rate) / num_games + z * z / (4 * num_games * num_games)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+def two_proportion_p_value(wins1: int, num_games1: int, wins2: int, num_games2: int) -> float:
+    """Return the two-sided p-value of a z-test for whether two win rates are different.
+
+    Preconditions:
+        - 0 <= wins1 <= num_games1 and num_games1 >= 1
+        - 0 <= wins2 <= num_games2 and num_games2 >= 1
+
+    >>> round(two_proportion_p_value(60, 100, 40, 100), 4)
+    0.0047
+    >>> two_proportion_p_value(10, 10, 10, 10)
+    1.0
+    """
+    pooled_rate = (wins1 + wins2) / (num_games1 + num_games2)
+    standard_error = math.sqrt(pooled_rate * (1 - pooled_rate) * (1 / num_games1 + 1 / num_games2))
+    if standard_error == 0.0:
+        return 1.0
+    z = (wins1 / num_games1 - wins2 / num_games2) / standard_error
+    return 2 * (1 - NormalDist().cdf(abs(z)))
+
+
+def compare_win_rates(num_games: int,
+                      first_players: tuple[Guesser, Adversary],
+                      second_players: tuple[Guesser, Adversary],
+                      word_set_file: str, max_guesses: int,
+                      significance: float = 0.05) -> tuple[dict[str, int], dict[str, int], float]:
+    """Play games with two player configurations until their Guesser win rates are significantly different.
+
+    Each configuration is a (guesser, adversary) pair. Games are played in pairs, one per configuration,
+    up to num_games games per configuration. The win rates are compared with two_proportion_p_value
+    after MIN_SEQUENTIAL_GAMES games per configuration and then each time the number of games doubles,
+    and the games stop as soon as the p-value is below significance divided by the number of
+    comparisons that will be made (a Bonferroni correction, so that stopping early does not make a
+    difference more likely to be reported by chance).
+
+    Return the win statistics of each configuration (in the same format as run_games) and the p-value
+    of the last comparison. The number of games actually played per configuration is the sum of
+    either statistics dictionary.
+
+    Preconditions:
+        - num_games >= 1
+        - same preconditions for word_set_file and max_guesses as run_game
+        - 0.0 < significance < 1.0
+    """
+    checkpoints = []
+    checkpoint = MIN_SEQUENTIAL_GAMES
+    while checkpoint < num_games:
+        checkpoints.append(checkpoint)
+        checkpoint *= 2
+    checkpoints.append(num_games)
+
+    threshold = significance / len(checkpoints)
+    first_stats = {'Guesser': 0, 'Adversary': 0}
+    second_stats = {'Guesser': 0, 'Adversary': 0}
+    p_value = 1.0
+    games_played = 0
+    for checkpoint in checkpoints:
+        while games_played < checkpoint:
+            first_stats[_run_copied_game(*first_players, word_set_file, max_guesses, None).get_winner()] += 1
+            second_stats[_run_copied_game(*second_players, word_set_file, max_guesses, None).get_winner()] += 1
+            games_played += 1
+
+        p_value = two_proportion_p_value(first_stats['Guesser'], games_played, second_stats['Guesser'], games_played)
+        if p_value < threshold:
+            break
+
+    print(f'Played {games_played} of at most {num_games} games per configuration. '
+          f'Guesser win rates: {100.0 * first_stats["Guesser"] / games_played:.2f}% vs '
+          f'{100.0 * second_stats["Guesser"] / games_played:.2f}% (p = {p_value:.4g}, '
+          f'{"significant" if p_value < threshold else "not significant"} at {significance})')
+
+    return first_stats, second_stats, p_value
+
+
+################################################################################
+# Profiling game runs
+################################################################################
+PHASE_LOAD_WORDS = 'load word set'
+PHASE_GUESSER_MOVE = 'guesser.make_move'
+PHASE_RECORD_GUESSER_MOVE = 'record_guesser_move'
+PHASE_ADVERSARY_MOVE = 'adversary.make_move'
+PHASE_RECORD_ADVERSARY_MOVE = 'record_adversary_move'
+
+PHASES = [PHASE_LOAD_WORDS, PHASE_GUESSER_MOVE, PHASE_RECORD_GUESSER_MOVE,
+          PHASE_ADVERSARY_MOVE, PHASE_RECORD_ADVERSARY_MOVE]
+
+
+class GameProfiler:
+    """A recorder for the time spent in each phase of the games played by run_game, play_game and run_games.
+
+    Passing a GameProfiler to these functions (or using run_profiled_games) is opt-in; when no profiler is
+    given, the games are played without any timing at all. This class can be subclassed to forward the
+    recorded phases elsewhere (e.g., to a logger) by overriding add_phase_time and add_round_candidates.
+
+    Instance Attributes:
+    - phase_times: a mapping from each phase name to the total number of seconds spent in that phase
+    - phase_calls: a mapping from each phase name to the number of times that phase ran
+    - round_candidates: round_candidates[i] is a list of the number of possible answers at the
+                        start of round i, with one entry per game that reached round i
+
+    Representation Invariants:
+    - self.phase_times.keys() == self.phase_calls.keys()
+    - all(self.phase_calls[phase] >= 1 for phase in self.phase_calls)
+    """
+    phase_times: dict[str, float]
+    phase_calls: dict[str, int]
+    round_candidates: list[list[int]]
+
+    def __init__(self) -> None:
+        """Initialize a new profiler with nothing recorded."""
+        self.phase_times = {}
+        self.phase_calls = {}
+        self.round_candidates = []
+
+    def add_phase_time(self, phase: str, seconds: float) -> None:
+        """Record that the given phase ran once and took the given number of seconds."""
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + seconds
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + 1
+
+    def add_round_candidates(self, round_number: int, num_candidates: int) -> None:
+        """Record that a game started round round_number with num_candidates possible answers.
+
+        Rounds are numbered starting at 0.
+
+        Preconditions:
+        - round_number >= 0
+        - num_candidates >= 0
+        """
+        while len(self.round_candidates) <= round_number:
+            self.round_candidates.append([])
+        self.round_candidates[round_number].append(num_candidates)
+
+    def report(self) -> str:
+        """Return a human-readable summary of the recorded phases and candidate-set sizes.
+
+        >>> profiler = GameProfiler()
+        >>> profiler.add_phase_time(PHASE_GUESSER_MOVE, 0.5)
+        >>> profiler.add_phase_time(PHASE_GUESSER_MOVE, 1.5)
+        >>> profiler.add_round_candidates(0, 100)
+        >>> print(profiler.report())
+        Phase                        Calls   Total (s)   Mean (ms)   Share
+        guesser.make_move                2       2.000    1000.000  100.0%
+        Round   Games   Mean candidates   Min   Max
+        0           1             100.0   100   100
+        """
+        total_time = sum(self.phase_times.values())
+        ordered_phases = [phase for phase in PHASES if phase in self.phase_times] + \
+            sorted(phase for phase in self.phase_times if phase not in PHASES)
+
+        lines = [f'{"Phase":<25} {"Calls":>8} {"Total (s)":>11} {"Mean (ms)":>11} {"Share":>7}']
+        for phase in ordered_phases:
+            seconds, calls = self.phase_times[phase], self.phase_calls[phase]
+            share = seconds / total_time if total_time > 0 else 0.0
+            lines.append(f'{phase:<25} {calls:>8} {seconds:>11.3f} {1000.0 * seconds / calls:>11.3f} '
+                         f'{100.0 * share:>6.1f}%')
+
+        lines.append(f'{"Round":<5} {"Games":>7} {"Mean candidates":>17} {"Min":>5} {"Max":>5}')
+        for round_number, sizes in enumerate(self.round_candidates):
+            lines.append(f'{round_number:<5} {len(sizes):>7} {sum(sizes) / len(sizes):>17.1f} '
+                         f'{min(sizes):>5} {max(sizes):>5}')
+
+        return '\n'.join(lines)
+
+
 ###################################################################################################
 # Additional helper functions for Wordle rules
 ###################################################################################################
@@ -411,6 +853,51 @@ def _get_guess_status(answer: str, guess: str) -> tuple[str, ...]:
     return tuple(_get_character_status(answer, guess, i) for i in range(0, len(guess)))
 
 
+STATUS_DIGITS = {INCORRECT: 0, WRONG_POSITION: 1, CORRECT: 2}
+
+
+def _get_status_code(answer: str, guess: str) -> int:
+    """Return the guess status of the given guess with respect to answer, encoded as an integer.
+
+    The encoding is the one used by _encode_status, so this is equivalent to (but much faster than)
+    _encode_status(_get_guess_status(answer, guess)).
+
+    Preconditions:
+    - answer != ''
+    - len(answer) == len(guess)
+
+    >>> _get_status_code('hello', 'world') == _encode_status(_get_guess_status('hello', 'world'))
+    True
+    """
+    # guess[i] is WRONG_POSITION exactly when it is not CORRECT and it matches an answer character
+    # at some position whose own character is not CORRECT (see _is_wrong_position_char)
+    unmatched = {a for a, g in zip(answer, guess) if a != g}
+    code = 0
+    place_value = 1
+    for a, g in zip(answer, guess):
+        if a == g:
+            code += 2 * place_value
+        elif g in unmatched:
+            code += place_value
+        place_value *= 3
+    return code
+
+
+def _encode_status(status: tuple[str, ...]) -> int:
+    """Return the given status encoded as an integer.
+
+    Each character status is a base-3 digit (see STATUS_DIGITS), with status[0] as the least
+    significant digit, so the codes for statuses of length n are exactly range(0, 3 ** n).
+
+    Preconditions:
+    - _is_valid_status(status)
+
+    >>> _encode_status((CORRECT, INCORRECT, WRONG_POSITION))
+    11
+    """
+    return sum(STATUS_DIGITS[char_status] * 3 ** i for i, char_status in enumerate(status))
+
+
 def _is_correct_multiple(word: str, guesses: list[str], statuses: list[tuple[str, ...]]) -> bool:
     """Return whether the given word is a correct answer for the given guesses and statuses.
 
@@ -0,0 +1,456 @@
+"""Benchmark suite for the Adversarial Wordle hot paths.
+
+Every benchmark uses a fixed random seed, so two runs on the same machine measure the same workload.
+By default, the benchmarks run on fixture word sets (see FIXTURE_WORD_SETS), which are generated from
+the seed, so that the suite does not depend on the word lists in data/words, which are not part of the
+repository. The games files the benchmarks read are generated from the seed in the same way. The word
+lists in data/words can be benchmarked too, by naming them with --word-sets. (The random players choose
+from sets of words, so PYTHONHASHSEED should also be fixed to make their games reproducible across
+processes.) Results are plain dictionaries mapping metric names to numbers, and can be saved as JSON
+baselines and compared against later runs:
+
+    PYTHONHASHSEED=0 python a2_benchmarks.py run --save benchmarks/baseline.json
+    PYTHONHASHSEED=0 python a2_benchmarks.py compare benchmarks/baseline.json
+
+Metric naming convention:
+    - names ending in '_per_sec' are throughputs (higher is better)
+    - names ending in '_seconds' are durations (lower is better)
+    - all other metrics are counts, which should not change between runs
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Callable
+
+import a2_game_tree
+import a2_adversarial_wordle as aw
+import a2_part1
+import a2_part2
+import a2_part3
+import a2_word_index
+
+BENCHMARK_SEED = 111
+
+WORD_SET_FILES = {
+    'wordle_25': 'data/words/official_wordle_25.txt',
+    'wordle_100': 'data/words/official_wordle_100.txt',
+    'wordle_full': 'data/words/official_wordle.txt',
+}
+
+# A mapping from the name of each fixture word set to its number of words (see write_fixture_word_set)
+FIXTURE_WORD_SETS = {'fixture_25': 25, 'fixture_100': 100, 'fixture_2000': 2000}
+
+# The letters that the words of the fixture word sets are made of. Using only common letters makes the
+# words share letters about as often as real words do, so the games are of realistic length.
+FIXTURE_LETTERS = 'aeiorstlnc'
+
+# The length of the words of the fixture word sets
+FIXTURE_WORD_SIZE = 5
+
+# The depth of the complete game tree built for each word set (the largest word sets are too large)
+TREE_DEPTHS = {'fixture_25': 4, 'fixture_100': 3, 'wordle_25': 4, 'wordle_100': 3}
+
+# The number of times each micro-benchmark is repeated; the fastest repetition is reported
+MICRO_REPEATS = 5
+
+# The relative slowdown tolerated by compare_to_baseline before a metric is reported as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+################################################################################
+# Individual benchmarks
+################################################################################
+def bench_guess_status(word_set_file: str, num_pairs: int = 20000) -> dict[str, float]:
+    """Return the throughput of aw._get_guess_status on random (answer, guess) pairs.
+
+    Preconditions:
+        - word_set_file satisfies the preconditions of aw.run_game
+        - num_pairs >= 1
+    """
+    words = sorted(aw.load_word_set(word_set_file))
+    random.seed(BENCHMARK_SEED)
+    pairs = [(random.choice(words), random.choice(words)) for _ in range(num_pairs)]
+
+    elapsed = _time_call(lambda: [aw._get_guess_status(answer, guess) for answer, guess in pairs], MICRO_REPEATS)
+    return {'guess_status_per_sec': num_pairs / elapsed}
+
+
+def bench_find_correct_answers(word_set_file: str, num_rounds: int = 3,
+                               num_trials: int = 20) -> dict[str, float]:
+    """Return the throughput of aw._find_correct_answers filtering the full word set.
+
+    Each trial filters the word set against num_rounds random (guess, status) pairs, where each
+    status is computed against a random hidden answer.
+
+    Preconditions:
+        - word_set_file satisfies the preconditions of aw.run_game
+        - num_rounds >= 1
+        - num_trials >= 1
+    """
+    words = sorted(aw.load_word_set(word_set_file))
+    random.seed(BENCHMARK_SEED)
+    trials = []
+    for _ in range(num_trials):
+        answer = random.choice(words)
+        guesses = [random.choice(words) for _ in range(num_rounds)]
+        statuses = [aw._get_guess_status(answer, guess) for guess in guesses]
+        trials.append((guesses, statuses))
+
+    word_set = frozenset(words)
+    elapsed = _time_call(lambda: [aw._find_correct_answers(word_set, guesses, statuses)
+                                  for guesses, statuses in trials], MICRO_REPEATS)
+    return {'find_correct_answers_per_sec': num_trials / elapsed,
+            'find_correct_answers_words_per_sec': num_trials * len(words) / elapsed}
+
+
+def bench_word_index(word_set_file: str, num_rounds: int = 3, num_trials: int = 20) -> dict[str, float]:
+    """Return the throughput of a2_word_index.WordIndex.find_correct_answers on the same workload as
+    bench_find_correct_answers, and the time taken to build the index.
+
+    Preconditions:
+        - word_set_file satisfies the preconditions of aw.run_game
+        - num_rounds >= 1
+        - num_trials >= 1
+    """
+    words = sorted(aw.load_word_set(word_set_file))
+    random.seed(BENCHMARK_SEED)
+    trials = []
+    for _ in range(num_trials):
+        answer = random.choice(words)
+        guesses = [random.choice(words) for _ in range(num_rounds)]
+        statuses = [aw._get_guess_status(answer, guess) for guess in guesses]
+        trials.append((guesses, statuses))
+
+    start = time.perf_counter()
+    index = a2_word_index.WordIndex(words)
+    build_elapsed = time.perf_counter() - start
+
+    elapsed = _time_call(lambda: [index.find_correct_answers(guesses, statuses)
+                                  for guesses, statuses in trials], MICRO_REPEATS)
+    return {'word_index_build_seconds': build_elapsed,
+            'word_index_find_correct_answers_per_sec': num_trials / elapsed}
+
+
+def bench_copy(word_set_file: str, max_guesses: int = 6, num_copies: int = 20000) -> dict[str, float]:
+    """Return the throughput of AdversarialWordle._copy on a game in its final round.
+
+    Preconditions:
+        - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+        - num_copies >= 1
+    """
+    words = sorted(aw.load_word_set(word_set_file))
+    random.seed(BENCHMARK_SEED)
+    game = aw.AdversarialWordle(words, max_guesses)
+    answer = random.choice(words)
+    while len(game.guesses) < max_guesses - 1 and game.get_winner() is None:
+        game.record_guesser_move(random.choice(game.get_possible_answers()))
+        game.record_adversary_move(game.get_status_for_answer(answer))
+
+    elapsed = _time_call(lambda: [game._copy() for _ in range(num_copies)], MICRO_REPEATS)
+    return {'copy_per_sec': num_copies / elapsed}
+
+
+def bench_load_game_tree(word_set_file: str, max_guesses: int = 6,
+                         num_games: int = 2000) -> dict[str, float]:
+    """Return the ingest rate of a2_part1.load_game_tree.
+
+    The games file is generated by playing num_games seeded games between a RandomGuesser
+    and a RandomAdversary.
+
+    Preconditions:
+        - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+        - num_games >= 1
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        games_file = os.path.join(tmp_dir, 'games.csv')
+        _write_games_file(games_file, word_set_file, max_guesses, num_games)
+
+        start = time.perf_counter()
+        tree = a2_part1.load_game_tree(games_file)
+        elapsed = time.perf_counter() - start
+
+    return {'load_game_tree_rows_per_sec': num_games / elapsed,
+            'load_game_tree_nodes_per_sec': len(tree) / elapsed}
+
+
+def bench_generate_complete_game_tree(word_set_file: str, max_guesses: int = 3,
+                                      depth: int = 4) -> dict[str, float]:
+    """Return the build time and node count per depth of a2_part2.generate_complete_game_tree.
+
+    Preconditions:
+        - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+        - depth >= 0
+    """
+    game = aw.AdversarialWordle(aw.load_word_set(word_set_file), max_guesses)
+
+    start = time.perf_counter()
+    tree = a2_part2.generate_complete_game_tree(a2_game_tree.GAME_START_MOVE, game, depth)
+    elapsed = time.perf_counter() - start
+
+    results = {'generate_complete_game_tree_seconds': elapsed}
+    for level, count in enumerate(count_nodes_by_depth(tree)):
+        results[f'generate_complete_game_tree_nodes_depth_{level}'] = count
+    return results
+
+
+def bench_run_games(word_set_file: str, max_guesses: int = 6, num_games: int = 50) -> dict[str, float]:
+    """Return the games/sec of aw.run_games for each player pairing.
+
+    The pairings are the ones played by aw.run_example and a2_part1.part1_runner, where the
+    tree players share a game tree loaded from seeded random games.
+
+    Preconditions:
+        - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+        - num_games >= 1
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        games_file = os.path.join(tmp_dir, 'games.csv')
+        _write_games_file(games_file, word_set_file, max_guesses, num_games)
+        game_tree = a2_part1.load_game_tree(games_file)
+
+    pairings = {
+        'random_vs_random': (aw.RandomGuesser(), aw.RandomAdversary()),
+        'random_tree_vs_random': (a2_part1.RandomTreeGuesser(game_tree), aw.RandomAdversary()),
+        'random_tree_vs_random_tree': (a2_part1.RandomTreeGuesser(game_tree),
+                                       a2_part1.RandomTreeAdversary(game_tree)),
+    }
+
+    results = {}
+    for name, (guesser, adversary) in pairings.items():
+        random.seed(BENCHMARK_SEED)
+        elapsed = _time_call(lambda: aw.run_games(num_games, guesser, adversary, word_set_file,
+                                                  max_guesses, print_game=False))
+        results[f'run_games_{name}_per_sec'] = num_games / elapsed
+    return results
+
+
+def bench_run_learning_algorithm(word_set_file: str, max_guesses: int = 3,
+                                 num_games: int = 200) -> dict[str, float]:
+    """Return the games/sec of a2_part3.run_learning_algorithm.
+
+    Preconditions:
+        - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+        - num_games >= 1
+    """
+    random.seed(BENCHMARK_SEED)
+    probabilities = [0.5] * num_games
+    elapsed = _time_call(lambda: a2_part3.run_learning_algorithm(word_set_file, max_guesses, probabilities,
+                                                                 show_stats=False))
+    return {'run_learning_algorithm_per_sec': num_games / elapsed}
+
+
+################################################################################
+# Running the suite and comparing against baselines
+################################################################################
+def run_benchmarks(word_set_names: list[str] | None = None) -> dict[str, float]:
+    """Run every benchmark on the given word sets (by default, the fixture word sets) and return all metrics.
+
+    Each metric name is prefixed with the word set name, e.g. 'fixture_25.copy_per_sec'.
+    The expensive benchmarks (complete game trees and learning) are only run on the word sets in TREE_DEPTHS.
+
+    Preconditions:
+        - word_set_names is None or all(name in WORD_SET_FILES or name in FIXTURE_WORD_SETS
+                                        for name in word_set_names)
+    """
+    if word_set_names is None:
+        word_set_names = list(FIXTURE_WORD_SETS)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as fixture_dir:
+        for name in word_set_names:
+            metrics = _run_word_set_benchmarks(_get_word_set_file(name, fixture_dir), name)
+            for metric, value in metrics.items():
+                results[f'{name}.{metric}'] = value
+
+    return results
+
+
+def _get_word_set_file(word_set_name: str, fixture_dir: str) -> str:
+    """Return the word set file of the given word set, writing it to fixture_dir if it is a fixture word set.
+
+    Preconditions:
+        - word_set_name in WORD_SET_FILES or word_set_name in FIXTURE_WORD_SETS
+    """
+    if word_set_name in WORD_SET_FILES:
+        return WORD_SET_FILES[word_set_name]
+
+    word_set_file = os.path.join(fixture_dir, f'{word_set_name}.txt')
+    write_fixture_word_set(word_set_file, FIXTURE_WORD_SETS[word_set_name])
+    return word_set_file
+
+
+def _run_word_set_benchmarks(word_set_file: str, name: str) -> dict[str, float]:
+    """Run every benchmark on the given word set file, whose name is name, and return all metrics."""
+    benchmarks = [bench_guess_status, bench_find_correct_answers, bench_word_index, bench_copy,
+                  bench_load_game_tree, bench_run_games]
+    if name in TREE_DEPTHS:
+        benchmarks.append(bench_run_learning_algorithm)
+
+    # run_games and run_learning_algorithm print summaries we don't want in the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        metrics = {}
+        for benchmark in benchmarks:
+            metrics.update(benchmark(word_set_file))
+        if name in TREE_DEPTHS:
+            metrics.update(bench_generate_complete_game_tree(word_set_file, depth=TREE_DEPTHS[name]))
+
+    return metrics
+
+
+def save_baseline(results: dict[str, float], baseline_file: str) -> None:
+    """Save the given benchmark results as a JSON baseline in baseline_file."""
+    directory = os.path.dirname(baseline_file)
+    if directory != '':
+        os.makedirs(directory, exist_ok=True)
+    with open(baseline_file, 'w') as f:
+        json.dump({'seed': BENCHMARK_SEED, 'results': results}, f, indent=2, sort_keys=True)
+
+
+def load_baseline(baseline_file: str) -> dict[str, float]:
+    """Return the benchmark results stored in the JSON baseline baseline_file."""
+    with open(baseline_file) as f:
+        return json.load(f)['results']
+
+
+def compare_to_baseline(results: dict[str, float], baseline: dict[str, float],
+                        tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """Return a description of each metric in results that regressed with respect to baseline.
+
+    A throughput regresses if it drops by more than tolerance (relative to the baseline), and a
+    duration regresses if it grows by more than tolerance. A count regresses if it changes at all.
+    Metrics that are missing from either dictionary are ignored.
+
+    Preconditions:
+        - tolerance >= 0.0
+
+    >>> compare_to_baseline({'a_per_sec': 80.0, 'b_seconds': 1.0}, {'a_per_sec': 100.0, 'b_seconds': 1.0})
+    ['a_per_sec: 100.0 -> 80.0 (-20.0%)']
+    """
+    regressions = []
+    for metric in sorted(results.keys() & baseline.keys()):
+        old, new = baseline[metric], results[metric]
+        change = (new - old) / old if old != 0 else 0.0
+        if metric.endswith('_per_sec'):
+            regressed = change < -tolerance
+        elif metric.endswith('_seconds'):
+            regressed = change > tolerance
+        else:
+            regressed = new != old
+
+        if regressed:
+            regressions.append(f'{metric}: {old} -> {new} ({100.0 * change:+.1f}%)')
+
+    return regressions
+
+
+def print_comparison(results: dict[str, float], baseline: dict[str, float]) -> None:
+    """Print every metric in results next to its baseline value and relative change."""
+    for metric in sorted(results):
+        if metric in baseline and baseline[metric] != 0:
+            change = (results[metric] - baseline[metric]) / baseline[metric]
+            print(f'{metric}: {baseline[metric]:.4g} -> {results[metric]:.4g} ({100.0 * change:+.1f}%)')
+        else:
+            print(f'{metric}: {results[metric]:.4g} (no baseline)')
+
+
+################################################################################
+# Helpers
+################################################################################
+def count_nodes_by_depth(tree: a2_game_tree.GameTree) -> list[int]:
+    """Return a list whose element i is the number of nodes at depth i of tree.
+
+    >>> tree = a2_game_tree.GameTree()
+    >>> tree.insert_move_sequence(['hello', ('N', 'N', 'N', 'N', 'N')])
+    >>> tree.insert_move_sequence(['world'])
+    >>> count_nodes_by_depth(tree)
+    [1, 2, 1]
+    """
+    counts = []
+    level = [tree]
+    while level:
+        counts.append(len(level))
+        level = [subtree for node in level for subtree in node.get_subtrees()]
+    return counts
+
+
+def write_fixture_word_set(word_set_file: str, num_words: int) -> None:
+    """Write num_words distinct words of FIXTURE_WORD_SIZE letters from FIXTURE_LETTERS to word_set_file,
+    one word per line.
+
+    The words only depend on num_words (they are generated with their own random number generator
+    seeded with BENCHMARK_SEED), so every run writes the same file.
+
+    Preconditions:
+        - 1 <= num_words <= len(FIXTURE_LETTERS) ** FIXTURE_WORD_SIZE
+    """
+    generator = random.Random(BENCHMARK_SEED)
+    words = {}
+    while len(words) < num_words:
+        # A dict rather than a set, so that the words are written in the order they were generated
+        words[''.join(generator.choice(FIXTURE_LETTERS) for _ in range(FIXTURE_WORD_SIZE))] = None
+
+    with open(word_set_file, 'w') as f:
+        f.writelines(f'{word}\n' for word in words)
+
+
+def _time_call(function: Callable[[], object], repeats: int = 1) -> float:
+    """Return the smallest number of seconds it takes to call function, over the given number of repeats.
+
+    Preconditions:
+        - repeats >= 1
+    """
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _write_games_file(games_file: str, word_set_file: str, max_guesses: int, num_games: int) -> None:
+    """Write num_games seeded random games to games_file, in the format read by a2_part1.load_game_tree."""
+    random.seed(BENCHMARK_SEED)
+    with open(games_file, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for _ in range(num_games):
+            game = aw.run_game(aw.RandomGuesser(), aw.RandomAdversary(), word_set_file, max_guesses)
+            writer.writerow(move if isinstance(move, str) else ''.join(move)
+                            for move in game.get_move_sequence())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the Adversarial Wordle benchmark suite.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the benchmarks and print the results')
+    run_parser.add_argument('--save', metavar='BASELINE', help='save the results as a JSON baseline')
+    run_parser.add_argument('--word-sets', nargs='+', choices=list(FIXTURE_WORD_SETS) + list(WORD_SET_FILES))
+
+    compare_parser = subparsers.add_parser('compare', help='run the benchmarks and compare against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    compare_parser.add_argument('--word-sets', nargs='+', choices=list(FIXTURE_WORD_SETS) + list(WORD_SET_FILES))
+
+    args = parser.parse_args()
+    benchmark_results = run_benchmarks(args.word_sets)
+
+    if args.command == 'run':
+        for name in sorted(benchmark_results):
+            print(f'{name}: {benchmark_results[name]:.4g}')
+        if args.save is not None:
+            save_baseline(benchmark_results, args.save)
+    else:
+        baseline_results = load_baseline(args.baseline)
+        print_comparison(benchmark_results, baseline_results)
+        regressed_metrics = compare_to_baseline(benchmark_results, baseline_results, args.tolerance)
+        if regressed_metrics:
+            print('\nRegressions:')
+            for line in regressed_metrics:
+                print(f'  {line}')
+            raise SystemExit(1)
@@ -0,0 +1,297 @@
+"""Crash-safe checkpoints for long runs of a2_part3.run_learning_algorithm.
+
+A LearningCheckpoint keeps two files in its directory:
+
+    - the journal, an append-only CSV file with one row per game played since the last snapshot:
+      the index of the game in the run, followed by the game's moves in the same format as the
+      games files read by a2_part1.load_game_tree. Rows are written in batches of batch_size games.
+    - the snapshot, a JSON file holding the whole learned tree after some number of games.
+      It is rewritten every snapshot_interval games, after which the journal is emptied.
+
+Resuming loads the snapshot and replays only the journal rows written after it, so a crash loses
+at most one batch of games, and restarting takes time proportional to the number of games since
+the last snapshot rather than the length of the run.
+"""
+import csv
+import json
+import os
+from typing import Optional, TextIO
+
+import a2_game_tree
+import a2_adversarial_wordle as aw
+import a2_opening_book
+
+# The names of the files kept in a checkpoint directory
+JOURNAL_FILE = 'journal.csv'
+SNAPSHOT_FILE = 'snapshot.json'
+
+# The default number of games written to the journal at a time
+DEFAULT_BATCH_SIZE = 100
+
+# The default number of games between snapshots
+DEFAULT_SNAPSHOT_INTERVAL = 10000
+
+
+class LearningCheckpoint:
+    """A journal and snapshot of the game tree learned by a run of a2_part3.run_learning_algorithm.
+
+    Call resume before recording any games, and close when the run stops (even if it stops with an error),
+    so that the games not yet written to the journal are not lost.
+
+    Instance Attributes:
+        - checkpoint_dir: the directory holding the journal and snapshot
+        - batch_size: the number of games written to the journal at a time
+        - snapshot_interval: the number of games between snapshots
+        - fsync: whether every journal batch and snapshot is forced to disk (with os.fsync) when written,
+          so that it also survives an operating system crash or power loss, not just a crash of this process
+        - num_games: the number of games of the run recorded so far, including those recorded
+          before the run was resumed
+
+    Representation Invariants:
+        - self.batch_size >= 1
+        - self.snapshot_interval >= 1
+        - 0 <= self._snapshot_games <= self.num_games
+        - len(self._pending) < self.batch_size
+    """
+    checkpoint_dir: str
+    batch_size: int
+    snapshot_interval: int
+    fsync: bool
+    num_games: int
+
+    # Private Instance Attributes:
+    #   - _snapshot_games:
+    #       The number of games included in the current snapshot.
+    #   - _pending:
+    #       The journal rows of the recorded games that have not been written yet.
+    #   - _journal:
+    #       The journal, open for appending, or None if this checkpoint has not been resumed or has been closed.
+    #   - _word_set_key:
+    #       The content hash of the word set of the run (see a2_opening_book.get_word_set_key),
+    #       or None if this checkpoint has not been resumed.
+    #   - _max_guesses:
+    #       The max_guesses of the run, or None if this checkpoint has not been resumed.
+    _snapshot_games: int
+    _pending: list[list[str]]
+    _journal: Optional[TextIO]
+    _word_set_key: Optional[str]
+    _max_guesses: Optional[int]
+
+    def __init__(self, checkpoint_dir: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL, fsync: bool = True) -> None:
+        """Initialize a checkpoint kept in checkpoint_dir, which is created when the checkpoint is resumed.
+
+        Preconditions:
+            - batch_size >= 1
+            - snapshot_interval >= 1
+        """
+        self.checkpoint_dir = checkpoint_dir
+        self.batch_size = batch_size
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self.num_games = 0
+        self._snapshot_games = 0
+        self._pending = []
+        self._journal = None
+        self._word_set_key = None
+        self._max_guesses = None
+
+    def resume(self, word_set_file: str, max_guesses: int) -> a2_game_tree.GameTree:
+        """Return the game tree learned so far by the run checkpointed in self.checkpoint_dir,
+        and prepare to record the run's next games.
+
+        If the directory has no snapshot, a new run is started: an empty tree is returned, and
+        a snapshot of it is saved. Otherwise, the snapshot is loaded and the journal rows written
+        after it are replayed. A partially written last row (from a crash in the middle of a batch)
+        is discarded.
+
+        Raise ValueError if the checkpointed run used a different word set or max_guesses.
+
+        Preconditions:
+            - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+            - this checkpoint has not been resumed yet
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self._word_set_key = a2_opening_book.get_word_set_key(aw.load_word_set(word_set_file))
+        self._max_guesses = max_guesses
+        snapshot_path = os.path.join(self.checkpoint_dir, SNAPSHOT_FILE)
+
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path) as f:
+                data = json.load(f)
+            if data['word_set_key'] != self._word_set_key or data['max_guesses'] != max_guesses:
+                raise ValueError(f'{self.checkpoint_dir} holds a checkpoint for a different word set or max_guesses')
+            game_tree = _decode_tree(data['nodes'])
+            self.num_games = self._snapshot_games = data['num_games']
+        else:
+            game_tree = a2_game_tree.GameTree()
+            self._save_snapshot_file(game_tree)
+
+        journal_path = os.path.join(self.checkpoint_dir, JOURNAL_FILE)
+        complete_length = self._replay_journal(journal_path, game_tree) if os.path.exists(journal_path) else 0
+
+        self._journal = open(journal_path, 'a', newline='', encoding='utf-8')
+        # Drop any partially written row, so that the next batch starts on a new line
+        self._journal.truncate(complete_length)
+        return game_tree
+
+    def record_game(self, game_tree: a2_game_tree.GameTree, moves: list[str | tuple[str, ...]]) -> None:
+        """Record a game with the given moves, which has just been inserted into game_tree.
+
+        The game is added to the journal, which is written when a full batch of games has been recorded.
+        If snapshot_interval games have been recorded since the last snapshot, a new snapshot of game_tree
+        is saved and the journal is emptied.
+
+        Preconditions:
+            - this checkpoint has been resumed and not closed
+            - game_tree is the tree returned by resume, with every recorded game inserted into it
+        """
+        self._pending.append([str(self.num_games)] + [a2_opening_book.encode_move(move) for move in moves])
+        self.num_games += 1
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        if self.num_games - self._snapshot_games >= self.snapshot_interval:
+            self.save_snapshot(game_tree)
+
+    def flush(self) -> None:
+        """Write the recorded games that have not been written to the journal yet.
+
+        Preconditions:
+            - this checkpoint has been resumed and not closed
+        """
+        if self._pending == []:
+            return
+
+        csv.writer(self._journal).writerows(self._pending)
+        self._pending = []
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def save_snapshot(self, game_tree: a2_game_tree.GameTree) -> None:
+        """Save a snapshot of game_tree, which includes every recorded game, and empty the journal.
+
+        Preconditions:
+            - this checkpoint has been resumed and not closed
+            - game_tree is the tree returned by resume, with every recorded game inserted into it
+        """
+        # The journal is written first, so that if saving the snapshot fails, resuming still replays every game
+        self.flush()
+        self._snapshot_games = self.num_games
+        self._save_snapshot_file(game_tree)
+
+        # If this process crashes before the journal is emptied, resuming skips the rows already in the snapshot
+        self._journal.truncate(0)
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def close(self) -> None:
+        """Write the recorded games that have not been written to the journal yet, and close the journal."""
+        if self._journal is not None:
+            self.flush()
+            self._journal.close()
+            self._journal = None
+
+    def _save_snapshot_file(self, game_tree: a2_game_tree.GameTree) -> None:
+        """Save a snapshot of game_tree after self._snapshot_games games, replacing the previous snapshot."""
+        path = os.path.join(self.checkpoint_dir, SNAPSHOT_FILE)
+        data = {
+            'word_set_key': self._word_set_key,
+            'max_guesses': self._max_guesses,
+            'num_games': self._snapshot_games,
+            'nodes': _encode_tree(game_tree)
+        }
+        # Write to a temporary file first, so that a crash never leaves a partially written snapshot
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _replay_journal(self, journal_path: str, game_tree: a2_game_tree.GameTree) -> int:
+        """Insert the games in the journal that are not in the snapshot into game_tree.
+
+        Return the length in bytes of the journal's complete rows, which is the offset to truncate the
+        journal at (file offsets are in bytes, which differ from characters for non-ASCII words).
+        """
+        with open(journal_path, 'rb') as f:
+            data = f.read()
+        complete_length = data.rfind(b'\n') + 1
+
+        for row in csv.reader(data[:complete_length].decode('utf-8').splitlines()):
+            if int(row[0]) < self.num_games:
+                continue
+            moves = [a2_opening_book.decode_move(move) for move in row[1:]]
+            guesser_won = moves != [] and isinstance(moves[-1], tuple) and all(char == 'Y' for char in moves[-1])
+            game_tree.insert_move_sequence(moves, 1.0 if guesser_won else 0.0, guesser_wins=int(guesser_won))
+            self.num_games += 1
+
+        return complete_length
+
+
+def _encode_tree(game_tree: a2_game_tree.GameTree) -> list[list]:
+    """Return the nodes of game_tree in preorder, each as a list of its encoded move, guesser win probability,
+    visit count, guesser win count, and number of subtrees.
+
+    >>> tree = a2_game_tree.GameTree()
+    >>> tree.insert_move_sequence(['hello', ('Y', 'Y', 'Y', 'Y', 'Y')], 1.0, guesser_wins=1)
+    >>> _encode_tree(tree)
+    [['*', 1.0, 1, 1, 1], ['hello', 1.0, 1, 1, 1], ['YYYYY', 1.0, 1, 1, 0]]
+    """
+    nodes = []
+    stack = [game_tree]
+    while stack:
+        node = stack.pop()
+        subtrees = node.get_subtrees()
+        nodes.append([a2_opening_book.encode_move(node.move), node.guesser_win_probability,
+                      node.visit_count, node.guesser_win_count, len(subtrees)])
+        stack.extend(reversed(subtrees))
+    return nodes
+
+
+def _decode_tree(nodes: list[list]) -> a2_game_tree.GameTree:
+    """Return the game tree encoded by _encode_tree.
+
+    >>> tree = a2_game_tree.GameTree()
+    >>> tree.insert_move_sequence(['hello', ('Y', 'Y', 'Y', 'Y', 'Y')], 1.0, guesser_wins=1)
+    >>> tree.insert_move_sequence(['world', ('N', 'N', 'N', 'N', 'N')], 0.0)
+    >>> _encode_tree(_decode_tree(_encode_tree(tree))) == _encode_tree(tree)
+    True
+    """
+    # Each entry is a node whose subtrees are still being decoded, and its number of subtrees left to decode
+    stack = []
+    root = None
+    for move, guesser_win_probability, visit_count, guesser_win_count, num_subtrees in nodes:
+        node = a2_game_tree.GameTree(a2_opening_book.decode_move(move), guesser_win_probability)
+        node.visit_count = visit_count
+        node.guesser_win_count = guesser_win_count
+        stack.append([node, num_subtrees])
+
+        # Attach each node to its parent once all of its subtrees have been attached to it,
+        # so that add_subtree recalculates the parent's guesser win probability from complete subtrees
+        while stack[-1][1] == 0:
+            finished, _ = stack.pop()
+            if stack == []:
+                root = finished
+                break
+            stack[-1][0].add_subtree(finished)
+            stack[-1][1] -= 1
+
+    return root
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['csv', 'json', 'os', 'a2_adversarial_wordle', 'a2_game_tree', 'a2_opening_book'],
+    #     'allowed-io': ['LearningCheckpoint.resume', 'LearningCheckpoint._save_snapshot_file',
+    #                    'LearningCheckpoint._replay_journal']
+    # })
@@ -0,0 +1,184 @@
+import math
+import random
+from collections import Counter
+from typing import Iterable, Optional
+
+import a2_adversarial_wordle as aw
+import a2_word_index
+
+# A mapping from each word set and pair of sample sizes (see get_opening_guesses) to the best opening
+# guesses for them, best first. The ranking only depends on these, so it is only computed once.
+_OPENING_RANKINGS: dict[tuple[frozenset[str], Optional[int], Optional[int]], list[str]] = {}
+
+
+class EntropyGuesser(aw.Guesser):
+    """An Adversarial Wordle Guesser that picks the guess with the maximum expected information.
+
+    On each turn, every possible answer is scored as a guess by splitting the possible answers into
+    buckets by the status they would produce, and computing the entropy (in bits) of the bucket sizes.
+    The guess with the highest entropy is the one that is expected to narrow down the possible answers
+    the most. No game tree is needed. The opening guess only depends on the word set, so it is computed
+    once per word set and cached.
+
+    Scoring is exact by default. To bound the time of a turn on very large word sets, the player can
+    instead score an evenly spaced sample of at most max_candidates possible answers as guesses, against
+    an evenly spaced sample of at most max_answers possible answers.
+
+    Representation Invariants:
+        - self._opening_top_k >= 1
+        - self._max_candidates is None or self._max_candidates >= 1
+        - self._max_answers is None or self._max_answers >= 1
+    """
+    # Private Instance Attributes:
+    #   - _opening_top_k:
+    #       The number of best opening guesses to choose from (uniformly at random) on the first turn.
+    #       When this is 1, the player always opens with the same guess.
+    #   - _max_candidates:
+    #       The maximum number of possible answers scored as guesses, or None to score them all.
+    #   - _max_answers:
+    #       The maximum number of possible answers the guesses are scored against, or None to use them all.
+    _opening_top_k: int
+    _max_candidates: Optional[int]
+    _max_answers: Optional[int]
+
+    def __init__(self, opening_top_k: int = 1, max_candidates: Optional[int] = None,
+                 max_answers: Optional[int] = None) -> None:
+        """Initialize this player.
+
+        Preconditions:
+            - opening_top_k >= 1
+            - max_candidates is None or max_candidates >= 1
+            - max_answers is None or max_answers >= 1
+        """
+        self._opening_top_k = opening_top_k
+        self._max_candidates = max_candidates
+        self._max_answers = max_answers
+
+    def make_move(self, game: aw.AdversarialWordle) -> str:
+        """Return a guess given the current game.
+
+        Preconditions:
+            - game.is_guesser_turn()
+        """
+        if game.get_last_status() is None:
+            opening_guesses = get_opening_guesses(game.word_set, self._opening_top_k,
+                                                  self._max_candidates, self._max_answers)
+            return random.choice(opening_guesses)
+
+        possible_answers = game.get_possible_answers()
+        if len(possible_answers) <= 2:
+            # Every guess scores the same, and guessing an answer might win right away
+            return possible_answers[0]
+
+        return rank_guesses(_sample_evenly(possible_answers, self._max_candidates),
+                            _sample_evenly(possible_answers, self._max_answers))[0][1]
+
+
+def get_opening_guesses(word_set: frozenset[str], k: int, max_candidates: Optional[int] = None,
+                        max_answers: Optional[int] = None) -> list[str]:
+    """Return the k best opening guesses for the given word set, best first.
+
+    As in EntropyGuesser, if max_candidates or max_answers is not None, only a sample of the words
+    are ranked, against a sample of the words.
+
+    Preconditions:
+        - len(word_set) > 0
+        - all words in word_set have the same length
+        - k >= 1
+        - max_candidates is None or max_candidates >= 1
+        - max_answers is None or max_answers >= 1
+    """
+    key = (word_set, max_candidates, max_answers)
+    if key not in _OPENING_RANKINGS:
+        words = list(word_set)
+        ranking = rank_guesses(_sample_evenly(words, max_candidates), _sample_evenly(words, max_answers))
+        _OPENING_RANKINGS[key] = [guess for _, guess in ranking]
+    return _OPENING_RANKINGS[key][:k]
+
+
+def _sample_evenly(words: list[str], sample_size: Optional[int]) -> list[str]:
+    """Return words if sample_size is None or there are at most sample_size words,
+    and otherwise an evenly spaced sample of sample_size words from sorted(words).
+
+    >>> _sample_evenly(['e', 'd', 'c', 'b', 'a'], 2)
+    ['a', 'c']
+    """
+    if sample_size is None or len(words) <= sample_size:
+        return words
+    words = sorted(words)
+    return [words[i * len(words) // sample_size] for i in range(sample_size)]
+
+
+def rank_guesses(guesses: Iterable[str], answers: list[str]) -> list[tuple[float, str]]:
+    """Return (expected information in bits, guess) for each of the given guesses, best first.
+
+    The expected information of a guess is the entropy of the number of answers that produce each
+    status for that guess (see expected_information). Ties are broken alphabetically.
+
+    This returns the same scores as expected_information, but computes the status codes of each guess
+    against all the answers at once (see a2_word_index.PackedWords).
+
+    Preconditions:
+        - answers != []
+        - all words in guesses and answers have the same length
+
+    >>> rank_guesses(['abc', 'abd', 'xyz'], ['abc', 'abd'])
+    [(1.0, 'abc'), (1.0, 'abd'), (0.0, 'xyz')]
+    """
+    packed_answers = a2_word_index.PackedWords(answers)
+    scores = [(_get_entropy(Counter(packed_answers.get_codes_for_guess(guess)).values(), len(answers)), guess)
+              for guess in guesses]
+    scores.sort(key=lambda score: (-score[0], score[1]))
+    return scores
+
+
+def expected_information(guess: str, answers: list[str]) -> float:
+    """Return the expected information (in bits) gained by guessing guess, if the answer is
+    uniformly distributed over answers.
+
+    The answers are bucketed by the integer code of the status they produce (see aw._get_status_code).
+
+    Preconditions:
+        - answers != []
+        - all(len(answer) == len(guess) for answer in answers)
+
+    >>> expected_information('abc', ['abc', 'abd', 'xyz', 'xyw'])
+    1.5
+    """
+    bucket_sizes = Counter(aw._get_status_code(answer, guess) for answer in answers).values()
+    return _get_entropy(bucket_sizes, len(answers))
+
+
+def _get_entropy(bucket_sizes: Iterable[int], n: int) -> float:
+    """Return the entropy (in bits) of n items split into buckets of the given sizes.
+
+    Preconditions:
+        - all(size >= 1 for size in bucket_sizes)
+        - sum(bucket_sizes) == n
+
+    >>> _get_entropy([2, 1, 1], 4)
+    1.5
+    """
+    return math.log2(n) - sum(size * math.log2(size) for size in bucket_sizes) / n
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['math', 'random', 'collections', 'a2_adversarial_wordle', 'a2_word_index'],
+    # })
+
+    aw.run_games(
+        num_games=100,
+        guesser=EntropyGuesser(),
+        adversary=aw.RandomAdversary(),
+        word_set_file='data/words/official_wordle.txt',
+        max_guesses=6,
+        print_game=False
+    )
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import math
 from typing import Optional
 
 # Comment out this line when not using check_contracts
@@ -15,13 +16,23 @@ class GameTree:
 
     Instance Attributes:
         - move: the current move (guess or status), or '*' if this tree represents the start of a game
+        - guesser_win_probability: the probability that the Guesser wins from the game state
+          represented by this tree
+        - visit_count: the number of move sequences inserted into this tree that passed through this node
+        - guesser_win_count: the number of those move sequences that were games won by the Guesser
 
     Representation Invariants:
         - self.move == GAME_START_MOVE or self.move is a valid Adversarial Wordle move
+        - 0.0 <= self.guesser_win_probability <= 1.0
+        - self.visit_count >= 0
+        - 0 <= self.guesser_win_count <= self.visit_count
         - all(key == self._subtrees[key].move for key in self._subtrees)
         - GAME_START_MOVE not in self._subtrees  # since it can only appear at the very top of a game tree
     """
     move: str | tuple[str, ...]  # The vertical bar | means "or"
+    guesser_win_probability: float
+    visit_count: int
+    guesser_win_count: int
 
     # Private Instance Attributes:
     #  - _subtrees:
@@ -29,7 +40,8 @@ class GameTree:
     #      move by the current player.
     _subtrees: dict[str | tuple[str, ...], GameTree]
 
-    def __init__(self, move: str | tuple[str, ...] = GAME_START_MOVE) -> None:
+    def __init__(self, move: str | tuple[str, ...] = GAME_START_MOVE,
+                 guesser_win_probability: float = 0.0) -> None:
         """Initialize a new game tree.
 
         Note that this initializer uses optional arguments.
@@ -37,8 +49,13 @@ class GameTree:
         >>> game = GameTree()
         >>> game.move == GAME_START_MOVE
         True
+        >>> game.guesser_win_probability
+        0.0
         """
         self.move = move
+        self.guesser_win_probability = guesser_win_probability
+        self.visit_count = 0
+        self.guesser_win_count = 0
         self._subtrees = {}
 
     def get_subtrees(self) -> list[GameTree]:
@@ -94,11 +111,13 @@ class GameTree:
     def add_subtree(self, subtree: GameTree) -> None:
         """Add a subtree to this game tree."""
         self._subtrees[subtree.move] = subtree
+        self._update_guesser_win_probability()
 
     ############################################################################
     # Part 1: Loading and "Replaying" Adversarial Wordle games
     ############################################################################
-    def insert_move_sequence(self, moves: list[str | tuple[str, ...]]) -> None:
+    def insert_move_sequence(self, moves: list[str | tuple[str, ...]], guesser_win_probability: float = 0.0,
+                             visits: int = 1, guesser_wins: int = 0) -> None:
         """Insert the given sequence of moves into this tree.
 
         The inserted moves form a chain of descendants, where:
@@ -113,28 +132,149 @@ class GameTree:
         But if moves[0] is not a child of this tree's root, create a new subtree for it
         and add it to the existing collection of subtrees.
 
+        The last move in the sequence is given guesser_win_probability as its guesser win
+        probability, and the guesser win probabilities of its ancestors are updated accordingly.
+        The visit count of every node along the sequence (including this tree's root) is increased by visits,
+        and its guesser win count is increased by guesser_wins. Passing visits > 1 inserts the same
+        sequence visits times in one pass, e.g., for a sequence that appears many times in a games file.
+
         Preconditions:
+        - 0.0 <= guesser_win_probability <= 1.0
+        - visits >= 1
+        - 0 <= guesser_wins <= visits
         - moves alternates between str and tuple[str, ...] elements
         - moves == [] or isinstance(moves[0], str) if self.move == aw.GAME_START_MOVE or isinstance(self.move, tuple)
         - moves == [] or isinstance(moves[0], tuple) if self.move != aw.GAME_START_MOVE and isinstance(self.move, str)
 
         """
-        if len(moves) == 0:
+        self._insert_move_sequence_from(moves, 0, guesser_win_probability, visits, guesser_wins)
+
+    def _insert_move_sequence_from(self, moves: list[str | tuple[str, ...]], i: int,
+                                   guesser_win_probability: float, visits: int, guesser_wins: int) -> None:
+        """Insert moves[i:] into this tree, as described in insert_move_sequence.
+
+        Preconditions:
+        - 0 <= i <= len(moves)
+        - 0.0 <= guesser_win_probability <= 1.0
+        - visits >= 1
+        - 0 <= guesser_wins <= visits
+        """
+        self.visit_count += visits
+        self.guesser_win_count += guesser_wins
+        if i == len(moves):
+            if self._subtrees == {}:
+                self.guesser_win_probability = guesser_win_probability
             return
-        curr_move = moves[0]
-        curr_subtree = None
 
-        for val in self._subtrees:
-            if val == curr_move:
-                curr_subtree = self._subtrees[val]
-                break
+        curr_move = moves[i]
+        if curr_move not in self._subtrees:
+            self._subtrees[curr_move] = GameTree(curr_move)
+        self._subtrees[curr_move]._insert_move_sequence_from(moves, i + 1, guesser_win_probability, visits,
+                                                             guesser_wins)
+        self._update_guesser_win_probability()
 
-        if curr_subtree is not None:
-            curr_subtree.insert_move_sequence(moves[1:])
-        else:
-            new_subtree = GameTree(curr_move)
-            self._subtrees[curr_move] = new_subtree
-            new_subtree.insert_move_sequence(moves[1:])
+    def merge(self, other: GameTree) -> None:
+        """Merge the moves, visit counts and guesser win probabilities of other into this tree.
+
+        Every move sequence in other becomes a move sequence in this tree, and the visit counts and
+        guesser win counts of matching nodes are added together. Leaf guesser win probabilities follow the
+        same rule as insert_move_sequence, as if other's move sequences were inserted after this tree's:
+        where both trees have a leaf for the same move sequence, it gets other's probability. The guesser
+        win probabilities of the other nodes are then recalculated.
+
+        Subtrees of other that are not in this tree are moved into this tree rather than copied,
+        so other should not be used after calling this method.
+
+        Preconditions:
+            - self.move == other.move
+
+        >>> tree1 = GameTree()
+        >>> tree1.insert_move_sequence(['hello', ('Y', 'Y', 'Y', 'Y', 'Y')], 1.0)
+        >>> tree2 = GameTree()
+        >>> tree2.insert_move_sequence(['hello', ('N', 'N', 'N', 'N', 'N')], 0.0)
+        >>> tree2.insert_move_sequence(['world', ('N', 'N', 'N', 'N', 'N')], 0.0)
+        >>> tree1.merge(tree2)
+        >>> len(tree1)
+        6
+        >>> tree1.visit_count
+        3
+        >>> tree1.find_subtree_by_move('hello').guesser_win_probability
+        0.5
+        >>> tree3 = GameTree()
+        >>> tree3.insert_move_sequence(['world', ('N', 'N', 'N', 'N', 'N')], 1.0)
+        >>> tree1.merge(tree3)
+        >>> tree1.find_subtree_by_move('world').guesser_win_probability
+        1.0
+        """
+        if self._subtrees == {} and other._subtrees == {}:
+            self.guesser_win_probability = other.guesser_win_probability
+        self.visit_count += other.visit_count
+        self.guesser_win_count += other.guesser_win_count
+
+        for move, other_subtree in other._subtrees.items():
+            if move in self._subtrees:
+                self._subtrees[move].merge(other_subtree)
+            else:
+                self._subtrees[move] = other_subtree
+
+        self._update_guesser_win_probability()
+
+    def prune(self, min_visits: int = 0, max_depth: Optional[int] = None) -> int:
+        """Remove every subtree that has fewer than min_visits visits or is deeper than max_depth.
+
+        The children of this tree have depth 1. This tree's root is never removed. After pruning,
+        guesser win probabilities are recalculated; a node whose subtrees were all removed keeps
+        the guesser win probability it had before pruning.
+
+        Return the number of nodes removed.
+
+        Note that trees built with add_subtree (e.g., complete game trees) have visit counts of 0,
+        so any min_visits >= 1 removes all of their subtrees.
+
+        Preconditions:
+            - min_visits >= 0
+            - max_depth is None or max_depth >= 0
+
+        >>> tree = GameTree()
+        >>> tree.insert_move_sequence(['hello', ('N', 'N', 'N', 'N', 'N')])
+        >>> tree.insert_move_sequence(['hello', ('Y', 'Y', 'Y', 'Y', 'Y')])
+        >>> tree.insert_move_sequence(['world'])
+        >>> tree.prune(min_visits=2)
+        3
+        >>> [subtree.move for subtree in tree.get_subtrees()]
+        ['hello']
+        """
+        removed = 0
+        for move in list(self._subtrees):
+            subtree = self._subtrees[move]
+            if subtree.visit_count < min_visits or max_depth == 0:
+                removed += len(subtree)
+                del self._subtrees[move]
+            else:
+                removed += subtree.prune(min_visits, None if max_depth is None else max_depth - 1)
+
+        self._update_guesser_win_probability()
+        return removed
+
+    def compact(self, max_nodes: int) -> int:
+        """Prune the least-visited branches of this tree until it has at most max_nodes nodes.
+
+        Branches are pruned with prune using visit thresholds 2, 4, 8, ..., so the most explored
+        parts of the tree are the last to go. Return the number of nodes removed.
+
+        Preconditions:
+            - max_nodes >= 1
+        """
+        size = len(self)
+        removed = 0
+        min_visits = 2
+        while size > max_nodes:
+            removed_now = self.prune(min_visits)
+            size -= removed_now
+            removed += removed_now
+            min_visits *= 2
+
+        return removed
 
     ############################################################################
     # Part 2: Complete Game Trees and Win Probabilities
@@ -151,6 +291,115 @@ class GameTree:
             - if self is not a leaf and self.is_guesser_move is False, the guesser win probability
               is equal to the AVERAGE of the guesser win probabilities of its subtrees
         """
+        if self._subtrees == {}:
+            return
+        elif self.is_guesser_turn():
+            self.guesser_win_probability = max(subtree.guesser_win_probability
+                                               for subtree in self._subtrees.values())
+        else:
+            self.guesser_win_probability = sum(subtree.guesser_win_probability
+                                               for subtree in self._subtrees.values()) / len(self._subtrees)
+
+
+@check_contracts
+class SampledGameTree(GameTree):
+    """A game tree that contains only some of the valid moves at each node, with estimated win probabilities.
+
+    Sampled game trees are built by a2_part2.generate_sampled_game_tree. On the Guesser's turn, the subtrees
+    of a node are some of the Guesser's valid moves. On the Adversary's turn, they are either all of the
+    Adversary's valid moves, or the distinct statuses drawn at random (with replacement) from them, in which
+    case each subtree records its probability of being drawn and the number of times it was drawn.
+
+    The guesser win probability of each node estimates the guesser win probability of the same node in the
+    complete game tree, and guesser_win_probability_error is the estimated standard error of that estimate:
+        - On the Guesser's turn, the probability and error are those of the subtree with the highest
+          probability. This ignores the guesses that are not in the tree, and the maximum of noisy
+          estimates is biased upwards, so the error is only a rough guide on these nodes.
+        - On the Adversary's turn with all statuses in the tree, the probability is the average of the
+          subtrees' probabilities (as in GameTree), and the error comes from the subtrees' errors.
+        - On the Adversary's turn with sampled statuses, the probability estimates the average over all
+          statuses by weighting each draw of a status by 1 / q, where q is its probability of being drawn,
+          and dividing by the total weight of the draws. This corrects for large buckets being drawn more
+          often than small ones, and always gives a probability between 0.0 and 1.0. The error combines
+          the spread of the subtrees' probabilities over the draws with the subtrees' errors.
+
+    Instance Attributes:
+        - guesser_win_probability_error: the estimated standard error of guesser_win_probability
+        - num_valid_moves: the number of valid moves from this node's game state, of which
+          this tree's subtrees are a subset
+        - sample_probability: if this tree's move was drawn at random from its parent's valid moves,
+          the probability of drawing it on each draw, and 0.0 otherwise
+        - sample_count: the number of times this tree's move was drawn, or 0 if it was not drawn at random
+
+    Representation Invariants:
+        - self.guesser_win_probability_error >= 0.0
+        - self.num_valid_moves >= len(self._subtrees)
+        - 0.0 <= self.sample_probability <= 1.0
+        - self.sample_count >= 0
+        - (self.sample_count == 0) == (self.sample_probability == 0.0)
+    """
+    guesser_win_probability_error: float
+    num_valid_moves: int
+    sample_probability: float
+    sample_count: int
+
+    def __init__(self, move: str | tuple[str, ...] = GAME_START_MOVE, guesser_win_probability: float = 0.0,
+                 num_valid_moves: int = 0) -> None:
+        """Initialize a new sampled game tree with no subtrees, whose move was not drawn at random.
+
+        >>> tree = SampledGameTree(('N', 'N', 'N', 'N', 'N'), num_valid_moves=3)
+        >>> tree.add_subtree(SampledGameTree('hello', 1.0))
+        >>> tree.add_subtree(SampledGameTree('world', 0.0))
+        >>> tree.guesser_win_probability
+        1.0
+        """
+        super().__init__(move, guesser_win_probability)
+        self.guesser_win_probability_error = 0.0
+        self.num_valid_moves = num_valid_moves
+        self.sample_probability = 0.0
+        self.sample_count = 0
+
+    def _update_guesser_win_probability(self) -> None:
+        """Recalculate the guesser win probability of this tree and its error, as described in the class docstring.
+
+        >>> tree = SampledGameTree('hello', num_valid_moves=4)
+        >>> for move, probability, sample_probability, sample_count in [(('Y', 'Y', 'Y', 'Y', 'Y'), 1.0, 0.25, 1),
+        ...                                                             (('N', 'N', 'N', 'N', 'N'), 0.0, 0.5, 3)]:
+        ...     subtree = SampledGameTree(move, probability)
+        ...     subtree.sample_probability = sample_probability
+        ...     subtree.sample_count = sample_count
+        ...     tree.add_subtree(subtree)
+        >>> tree.guesser_win_probability
+        0.4
+        >>> round(tree.guesser_win_probability_error, 4)
+        0.2771
+        """
+        subtrees = list(self._subtrees.values())
+        if subtrees == []:
+            return
+        elif self.is_guesser_turn():
+            best_subtree = max(subtrees, key=lambda subtree: subtree.guesser_win_probability)
+            self.guesser_win_probability = best_subtree.guesser_win_probability
+            self.guesser_win_probability_error = best_subtree.guesser_win_probability_error
+        elif all(subtree.sample_count == 0 for subtree in subtrees):
+            self.guesser_win_probability = sum(subtree.guesser_win_probability for subtree in subtrees) / len(subtrees)
+            self.guesser_win_probability_error = math.sqrt(sum(subtree.guesser_win_probability_error ** 2
+                                                               for subtree in subtrees)) / len(subtrees)
+        else:
+            # The total weight of each subtree's draws, each of which is weighted by 1 / subtree.sample_probability
+            weights = [subtree.sample_count / subtree.sample_probability for subtree in subtrees]
+            total_weight = sum(weights)
+            mean = sum(weight * subtree.guesser_win_probability
+                       for weight, subtree in zip(weights, subtrees)) / total_weight
+
+            variance = sum((weight / subtree.sample_count) ** 2 * subtree.sample_count
+                           * (subtree.guesser_win_probability - mean) ** 2
+                           for weight, subtree in zip(weights, subtrees)) / total_weight ** 2
+            variance += sum((weight * subtree.guesser_win_probability_error) ** 2
+                            for weight, subtree in zip(weights, subtrees)) / total_weight ** 2
+
+            self.guesser_win_probability = mean
+            self.guesser_win_probability_error = math.sqrt(variance)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,282 @@
+import math
+import random
+import time
+import weakref
+from concurrent.futures import Executor
+from typing import Optional
+
+import a2_game_tree
+import a2_adversarial_wordle as aw
+
+
+class MonteCarloTreeSearch:
+    """A Monte Carlo tree search over Adversarial Wordle moves, with a per-move time or iteration budget.
+
+    The search grows a GameTree one node per iteration:
+
+        1. Selection: starting at the root, descend into the child with the highest UCB score
+           until reaching a node with moves that have not been tried yet.
+        2. Expansion: add a subtree for one untried move.
+        3. Rollout: play random moves (like aw.RandomGuesser and aw.RandomAdversary) until the game ends.
+        4. Backup: add the rollout results to the visit counts and guesser win probabilities of
+           every node on the path from the root.
+
+    In the search tree, visit_count is the number of rollouts through a node and guesser_win_probability
+    is the fraction of those rollouts the Guesser won. Guesser nodes maximize the Guesser's win rate and
+    Adversary nodes minimize it.
+
+    The tree is kept between moves of the same game: when asked for the next move, the search
+    descends into the subtree for the moves made since the last search, and keeps searching from there.
+
+    Representation Invariants:
+        - self._time_budget is not None or self._max_iterations is not None
+        - self._time_budget is None or self._time_budget > 0.0
+        - self._max_iterations is None or self._max_iterations >= 1
+        - self._rollouts_per_leaf >= 1
+    """
+    # Private Instance Attributes:
+    #   - _game_tree:
+    #       The search tree for the game state after the moves in _root_moves, or None if no search
+    #       has been done yet.
+    #   - _root_moves:
+    #       The move sequence of the game state at the root of _game_tree.
+    #   - _untried_moves:
+    #       A mapping from each expanded node to the moves from that node that have no subtree yet.
+    #       Nodes that are no longer part of the tree are dropped automatically.
+    #   - _time_budget:
+    #       The maximum number of seconds to search per move, or None for no time limit.
+    #   - _max_iterations:
+    #       The maximum number of iterations to search per move, or None for no iteration limit.
+    #   - _exploration_constant:
+    #       The constant that multiplies the exploration term of the UCB score.
+    #   - _rollouts_per_leaf:
+    #       The number of rollouts played from each new node.
+    #   - _executor:
+    #       The executor the rollouts of each new node are run on, or None to play them in this process.
+    _game_tree: Optional[a2_game_tree.GameTree]
+    _root_moves: list[str | tuple[str, ...]]
+    _untried_moves: weakref.WeakKeyDictionary
+    _time_budget: Optional[float]
+    _max_iterations: Optional[int]
+    _exploration_constant: float
+    _rollouts_per_leaf: int
+    _executor: Optional[Executor]
+
+    def __init__(self, time_budget: Optional[float] = 1.0, max_iterations: Optional[int] = None,
+                 exploration_constant: float = math.sqrt(2), rollouts_per_leaf: int = 1,
+                 executor: Optional[Executor] = None) -> None:
+        """Initialize a new search with an empty tree.
+
+        The search for each move stops as soon as either time_budget seconds have passed or
+        max_iterations iterations have been run (whichever are not None), but always runs at least
+        one iteration. If executor is not None (e.g., a ProcessPoolExecutor), the rollouts_per_leaf
+        rollouts of each new node are played on it in parallel.
+
+        Preconditions:
+            - time_budget is not None or max_iterations is not None
+            - time_budget is None or time_budget > 0.0
+            - max_iterations is None or max_iterations >= 1
+            - rollouts_per_leaf >= 1
+        """
+        self._game_tree = None
+        self._root_moves = []
+        self._untried_moves = weakref.WeakKeyDictionary()
+        self._time_budget = time_budget
+        self._max_iterations = max_iterations
+        self._exploration_constant = exploration_constant
+        self._rollouts_per_leaf = rollouts_per_leaf
+        self._executor = executor
+
+    def get_game_tree(self) -> Optional[a2_game_tree.GameTree]:
+        """Return the search tree for the most recently searched game state, or None if there isn't one."""
+        return self._game_tree
+
+    def choose_move(self, game: aw.AdversarialWordle) -> str | tuple[str, ...]:
+        """Search from the current game state within the budget, and return the most visited move.
+
+        Preconditions:
+            - game.get_winner() is None
+        """
+        self._update_root(game.get_move_sequence())
+
+        deadline = None if self._time_budget is None else time.perf_counter() + self._time_budget
+        iterations = 0
+        while True:
+            self._run_iteration(game)
+            iterations += 1
+            if self._max_iterations is not None and iterations >= self._max_iterations:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        best_subtree = max(self._game_tree.get_subtrees(), key=lambda subtree: subtree.visit_count)
+        return best_subtree.move
+
+    def _update_root(self, moves: list[str | tuple[str, ...]]) -> None:
+        """Move the root of the search tree to the game state after the given moves.
+
+        Reuse the existing subtree for that game state if there is one, and otherwise start a new tree.
+        """
+        subtree = self._game_tree
+        if subtree is not None and moves[:len(self._root_moves)] == self._root_moves:
+            for move in moves[len(self._root_moves):]:
+                subtree = subtree.find_subtree_by_move(move)
+                if subtree is None:
+                    break
+        else:
+            subtree = None
+
+        if subtree is None:
+            subtree = a2_game_tree.GameTree(moves[-1] if moves else a2_game_tree.GAME_START_MOVE)
+
+        self._game_tree = subtree
+        self._root_moves = moves
+
+    def _run_iteration(self, game: aw.AdversarialWordle) -> None:
+        """Run one selection, expansion, rollout and backup step from the root, whose state is game."""
+        node = self._game_tree
+        path = [node]
+
+        while game.get_winner() is None:
+            untried_moves = self._get_untried_moves(node, game)
+            if untried_moves:
+                move = untried_moves.pop()
+                game = game.copy_and_record_move(move)
+                child = a2_game_tree.GameTree(move)
+                # add_subtree recalculates node's probability from its subtrees, but in the search
+                # tree it is a rollout average, which is updated in the backup step below
+                win_probability = node.guesser_win_probability
+                node.add_subtree(child)
+                node.guesser_win_probability = win_probability
+                path.append(child)
+                break
+
+            node = self._select_child(node)
+            game = game.copy_and_record_move(node.move)
+            path.append(node)
+
+        if self._executor is None or self._rollouts_per_leaf == 1:
+            results = [_play_rollout(game, None) for _ in range(self._rollouts_per_leaf)]
+        else:
+            seeds = [random.randrange(2 ** 32) for _ in range(self._rollouts_per_leaf)]
+            results = list(self._executor.map(_play_rollout, [game] * self._rollouts_per_leaf, seeds))
+
+        for visited in path:
+            visited.visit_count += len(results)
+            visited.guesser_win_count += int(sum(results))
+            new_probability = visited.guesser_win_probability + \
+                (sum(results) - len(results) * visited.guesser_win_probability) / visited.visit_count
+            visited.guesser_win_probability = min(1.0, max(0.0, new_probability))
+
+    def _get_untried_moves(self, node: a2_game_tree.GameTree,
+                           game: aw.AdversarialWordle) -> list[str | tuple[str, ...]]:
+        """Return the list of untried moves from node, whose game state is game.
+
+        The list is computed (in random order) the first time a node is reached, and shrinks as
+        moves are tried.
+
+        Preconditions:
+            - game.get_winner() is None
+        """
+        if node not in self._untried_moves:
+            possible_answers = game.get_possible_answers()
+            if game.is_guesser_turn():
+                moves = possible_answers
+            else:
+                moves = list({game.get_status_for_answer(answer) for answer in possible_answers})
+            random.shuffle(moves)
+            self._untried_moves[node] = moves
+
+        return self._untried_moves[node]
+
+    def _select_child(self, node: a2_game_tree.GameTree) -> a2_game_tree.GameTree:
+        """Return the subtree of node with the highest UCB score for the player whose turn it is.
+
+        Preconditions:
+            - node.get_subtrees() != []
+            - all(subtree.visit_count >= 1 for subtree in node.get_subtrees())
+        """
+        log_visits = math.log(node.visit_count)
+        guesser_turn = node.is_guesser_turn()
+
+        def ucb_score(subtree: a2_game_tree.GameTree) -> float:
+            win_rate = subtree.guesser_win_probability if guesser_turn else 1.0 - subtree.guesser_win_probability
+            return win_rate + self._exploration_constant * math.sqrt(log_visits / subtree.visit_count)
+
+        return max(node.get_subtrees(), key=ucb_score)
+
+
+class MCTSGuesser(aw.Guesser):
+    """An Adversarial Wordle Guesser that chooses its moves with a Monte Carlo tree search."""
+    # Private Instance Attributes:
+    #   - _search: the search used to choose moves
+    _search: MonteCarloTreeSearch
+
+    def __init__(self, search: Optional[MonteCarloTreeSearch] = None) -> None:
+        """Initialize this player. If search is None, a MonteCarloTreeSearch with the default budget is used."""
+        self._search = search if search is not None else MonteCarloTreeSearch()
+
+    def make_move(self, game: aw.AdversarialWordle) -> str:
+        """Return a guess given the current game.
+
+        Preconditions:
+            - game.is_guesser_turn()
+        """
+        return self._search.choose_move(game)
+
+
+class MCTSAdversary(aw.Adversary):
+    """An Adversarial Wordle Adversary that chooses its moves with a Monte Carlo tree search."""
+    # Private Instance Attributes:
+    #   - _search: the search used to choose moves
+    _search: MonteCarloTreeSearch
+
+    def __init__(self, search: Optional[MonteCarloTreeSearch] = None) -> None:
+        """Initialize this player. If search is None, a MonteCarloTreeSearch with the default budget is used."""
+        self._search = search if search is not None else MonteCarloTreeSearch()
+
+    def make_move(self, game: aw.AdversarialWordle) -> tuple[str, ...]:
+        """Return a status given the current game.
+
+        Preconditions:
+            - not game.is_guesser_turn()
+        """
+        return self._search.choose_move(game)
+
+
+def _play_rollout(game: aw.AdversarialWordle, seed: Optional[int]) -> float:
+    """Play random moves from game until the game ends, and return 1.0 if the Guesser won and 0.0 otherwise.
+
+    If seed is not None, seed the random module first (used when rollouts run in other processes).
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    guesser, adversary = aw.RandomGuesser(), aw.RandomAdversary()
+    while game.get_winner() is None:
+        if game.is_guesser_turn():
+            game = game.copy_and_record_guesser_move(guesser.make_move(game))
+        else:
+            game = game.copy_and_record_adversary_move(adversary.make_move(game))
+
+    return 1.0 if game.get_winner() == 'Guesser' else 0.0
+
+
+if __name__ == '__main__':
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['math', 'random', 'time', 'weakref', 'concurrent.futures',
+    #                       'a2_adversarial_wordle', 'a2_game_tree'],
+    # })
+
+    aw.run_games(
+        num_games=20,
+        guesser=MCTSGuesser(MonteCarloTreeSearch(time_budget=0.5)),
+        adversary=aw.RandomAdversary(),
+        word_set_file='data/words/official_wordle.txt',
+        max_guesses=4,
+        print_game=True
+    )
@@ -0,0 +1,276 @@
+"""Memory instrumentation for building and growing game trees.
+
+A MemoryMonitor is passed to a2_part2.generate_complete_game_tree or a2_part3.run_learning_algorithm
+(or their runners), which tell it about every node they add. The monitor keeps node counts by depth
+and by turn type, estimates the memory used by the nodes, takes tracemalloc snapshots at a configurable
+interval, and enforces an optional node or byte budget. What happens when the budget is exceeded
+depends on the monitor's degrade attribute:
+
+    - degrade is False: the build stops by raising MemoryBudgetExceeded, whose report describes the
+      tree at the moment the budget ran out. The runners catch it and print the report.
+    - degrade is True: learned trees are compacted back under the budget (see a2_game_tree.GameTree.compact),
+      and a2_part2.part2_runner retries complete game trees with smaller depths until one fits.
+"""
+import sys
+import tracemalloc
+from typing import Optional
+
+import a2_game_tree
+
+# The number of allocation sites listed in a report's tracemalloc section
+REPORT_TOP_ALLOCATIONS = 5
+
+
+class MemoryBudgetExceeded(Exception):
+    """Raised when a game tree grows past the node or byte budget of its MemoryMonitor.
+
+    Instance Attributes:
+        - report: the monitor's report at the moment the budget was exceeded
+    """
+    report: str
+
+    def __init__(self, report: str) -> None:
+        """Initialize a new exception with the given report."""
+        super().__init__('game tree memory budget exceeded\n' + report)
+        self.report = report
+
+
+class MemoryMonitor:
+    """A recorder of the nodes added to a game tree, with an optional node or byte budget.
+
+    The estimated bytes of a tree are its number of nodes times bytes_per_node, which starts as an
+    estimate for a typical node (see estimate_node_bytes) and can be refined with measure.
+
+    Instance Attributes:
+        - max_nodes: the maximum number of nodes, or None for no node budget
+        - max_bytes: the maximum estimated number of bytes, or None for no byte budget
+        - snapshot_interval: the number of nodes added between tracemalloc snapshots, or None for no snapshots
+        - degrade: whether a build that runs out of budget should continue in a smaller form
+          rather than abort (see the module docstring)
+        - bytes_per_node: the estimated number of bytes used by each node
+        - nodes_by_depth: nodes_by_depth[i] is the number of nodes at depth i (the root has depth 0)
+        - snapshots: a (node count, traced bytes, peak traced bytes) tuple for each tracemalloc snapshot
+        - nodes_pruned: the number of nodes removed to stay within the budget
+
+    Representation Invariants:
+        - self.max_nodes is None or self.max_nodes >= 1
+        - self.max_bytes is None or self.max_bytes >= 1
+        - self.snapshot_interval is None or self.snapshot_interval >= 1
+        - self.bytes_per_node > 0
+        - all(count >= 0 for count in self.nodes_by_depth)
+        - self.nodes_pruned >= 0
+    """
+    max_nodes: Optional[int]
+    max_bytes: Optional[int]
+    snapshot_interval: Optional[int]
+    degrade: bool
+    bytes_per_node: float
+    nodes_by_depth: list[int]
+    snapshots: list[tuple[int, int, int]]
+    nodes_pruned: int
+
+    # Private Instance Attributes:
+    #   - _node_count:
+    #       The number of nodes in the tree, i.e. sum(self.nodes_by_depth).
+    #   - _last_snapshot:
+    #       The most recent tracemalloc snapshot, or None if none has been taken.
+    #   - _started_tracing:
+    #       Whether this monitor started tracemalloc (and so should stop it in stop).
+    _node_count: int
+    _last_snapshot: Optional[tracemalloc.Snapshot]
+    _started_tracing: bool
+
+    def __init__(self, max_nodes: Optional[int] = None, max_bytes: Optional[int] = None,
+                 snapshot_interval: Optional[int] = None, degrade: bool = False) -> None:
+        """Initialize a new monitor with no nodes recorded.
+
+        If snapshot_interval is not None, tracemalloc is started (if it is not already tracing) so that
+        snapshots can be taken; call stop when done to stop it again.
+
+        Preconditions:
+            - max_nodes is None or max_nodes >= 1
+            - max_bytes is None or max_bytes >= 1
+            - snapshot_interval is None or snapshot_interval >= 1
+        """
+        self.max_nodes = max_nodes
+        self.max_bytes = max_bytes
+        self.snapshot_interval = snapshot_interval
+        self.degrade = degrade
+        self.bytes_per_node = _estimate_typical_node_bytes()
+        self.nodes_by_depth = []
+        self.snapshots = []
+        self.nodes_pruned = 0
+        self._node_count = 0
+        self._last_snapshot = None
+        self._started_tracing = snapshot_interval is not None and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        """Stop tracemalloc, if this monitor started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def get_node_count(self) -> int:
+        """Return the number of nodes recorded."""
+        return self._node_count
+
+    def get_estimated_bytes(self) -> int:
+        """Return the estimated number of bytes used by the recorded nodes."""
+        return round(self._node_count * self.bytes_per_node)
+
+    def get_node_budget(self) -> Optional[int]:
+        """Return the maximum number of nodes allowed by the node and byte budgets, or None if there is no budget.
+
+        >>> monitor = MemoryMonitor(max_nodes=1000, max_bytes=10000)
+        >>> monitor.bytes_per_node = 100.0
+        >>> monitor.get_node_budget()
+        100
+        """
+        budgets = []
+        if self.max_nodes is not None:
+            budgets.append(self.max_nodes)
+        if self.max_bytes is not None:
+            budgets.append(max(1, int(self.max_bytes / self.bytes_per_node)))
+        return min(budgets) if budgets else None
+
+    def is_over_budget(self) -> bool:
+        """Return whether the recorded nodes exceed the node or byte budget."""
+        budget = self.get_node_budget()
+        return budget is not None and self._node_count > budget
+
+    def check_budget(self) -> None:
+        """Raise MemoryBudgetExceeded if the recorded nodes exceed the node or byte budget."""
+        if self.is_over_budget():
+            raise MemoryBudgetExceeded(self.report())
+
+    def reset(self) -> None:
+        """Forget the recorded nodes, e.g., before building a tree again. Snapshots are kept."""
+        self.nodes_by_depth = []
+        self._node_count = 0
+
+    def add_node(self, depth: int) -> None:
+        """Record a new node at the given depth, taking a snapshot if one is due.
+
+        Preconditions:
+            - depth >= 0
+        """
+        while len(self.nodes_by_depth) <= depth:
+            self.nodes_by_depth.append(0)
+        self.nodes_by_depth[depth] += 1
+        self._node_count += 1
+
+        if self.snapshot_interval is not None and self._node_count % self.snapshot_interval == 0:
+            self.take_snapshot()
+
+    def measure(self, tree: a2_game_tree.GameTree) -> None:
+        """Replace the recorded nodes with the nodes of tree, and refine bytes_per_node from them.
+
+        This walks the whole tree, so it is meant to be called after a build or a compaction,
+        not after every node.
+        """
+        self.nodes_by_depth = []
+        total_bytes = 0
+        level = [tree]
+        while level:
+            self.nodes_by_depth.append(len(level))
+            total_bytes += sum(estimate_node_bytes(node) for node in level)
+            level = [subtree for node in level for subtree in node.get_subtrees()]
+
+        self._node_count = sum(self.nodes_by_depth)
+        self.bytes_per_node = total_bytes / self._node_count
+
+    def record_pruned(self, tree: a2_game_tree.GameTree, num_pruned: int) -> None:
+        """Record that num_pruned nodes were removed from tree to stay within the budget."""
+        self.nodes_pruned += num_pruned
+        self.measure(tree)
+
+    def take_snapshot(self) -> None:
+        """Record the memory currently traced by tracemalloc, if it is tracing."""
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self.snapshots.append((self._node_count, current, peak))
+        self._last_snapshot = tracemalloc.take_snapshot()
+
+    def get_nodes_by_turn(self) -> dict[str, int]:
+        """Return the number of recorded nodes at which it is each player's turn.
+
+        The root is the start of a game, so it is the Guesser's turn at every even depth.
+
+        >>> monitor = MemoryMonitor()
+        >>> for depth in [0, 1, 1, 2]:
+        ...     monitor.add_node(depth)
+        >>> monitor.get_nodes_by_turn()
+        {'Guesser': 2, 'Adversary': 2}
+        """
+        return {'Guesser': sum(self.nodes_by_depth[0::2]), 'Adversary': sum(self.nodes_by_depth[1::2])}
+
+    def report(self) -> str:
+        """Return a human-readable summary of the recorded nodes, budget and snapshots."""
+        budget = self.get_node_budget()
+        lines = [f'Nodes: {self._node_count} (budget: {"none" if budget is None else budget}), '
+                 f'estimated {self.get_estimated_bytes() / 2 ** 20:.1f} MiB '
+                 f'({self.bytes_per_node:.0f} bytes per node)']
+        if self.nodes_pruned > 0:
+            lines.append(f'Nodes pruned to stay within the budget: {self.nodes_pruned}')
+
+        nodes_by_turn = self.get_nodes_by_turn()
+        lines.append(f'Guesser-turn nodes: {nodes_by_turn["Guesser"]}, '
+                     f'Adversary-turn nodes: {nodes_by_turn["Adversary"]}')
+        lines.append(f'{"Depth":<5} {"Nodes":>10}')
+        for depth, count in enumerate(self.nodes_by_depth):
+            lines.append(f'{depth:<5} {count:>10}')
+
+        if self.snapshots:
+            lines.append(f'{"Nodes":>10} {"Traced (MiB)":>13} {"Peak (MiB)":>11}')
+            for node_count, current, peak in self.snapshots:
+                lines.append(f'{node_count:>10} {current / 2 ** 20:>13.1f} {peak / 2 ** 20:>11.1f}')
+        if self._last_snapshot is not None:
+            lines.append('Top allocation sites in the last snapshot:')
+            for stat in self._last_snapshot.statistics('lineno')[:REPORT_TOP_ALLOCATIONS]:
+                lines.append(f'  {stat}')
+
+        return '\n'.join(lines)
+
+
+def estimate_node_bytes(node: a2_game_tree.GameTree) -> int:
+    """Return an estimate of the number of bytes used by node, not including its subtrees.
+
+    This counts the node object and its non-string attribute values (e.g., its subtree dictionary
+    and a status move). Guess moves are not counted, since they are the same string objects as the
+    words of the game's word set.
+
+    The attributes are looked up by the names declared on the node's class and its base classes rather
+    than through vars(node), which would make Python allocate a separate attribute dictionary for the node.
+
+    >>> estimate_node_bytes(a2_game_tree.SampledGameTree('hello')) > estimate_node_bytes(a2_game_tree.GameTree('hello'))
+    True
+    """
+    # Each class's own __annotations__ only has the names it declares itself, not those of its base classes
+    names = {name for cls in type(node).__mro__ for name in vars(cls).get('__annotations__', {})}
+    values = [getattr(node, name) for name in names if hasattr(node, name)]
+    return sys.getsizeof(node) + sum(sys.getsizeof(value) for value in values if not isinstance(value, str))
+
+
+def _estimate_typical_node_bytes() -> float:
+    """Return the average estimated bytes of a guess node and a status node, each with one subtree."""
+    guess_node = a2_game_tree.GameTree('hello')
+    status_node = a2_game_tree.GameTree(('N', '?', 'Y', 'N', 'N'), 0.5)
+    guess_node.add_subtree(status_node)
+    status_node.add_subtree(a2_game_tree.GameTree('world'))
+    return (estimate_node_bytes(guess_node) + estimate_node_bytes(status_node)) / 2
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['sys', 'tracemalloc', 'a2_game_tree'],
+    # })
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+from typing import Iterable, Optional
+
+import a2_game_tree
+import a2_adversarial_wordle as aw
+
+# The directory where opening books are saved by default
+OPENING_BOOK_DIR = 'data/opening_books'
+
+# The number of plies (moves by either player) covered by a newly built opening book by default
+DEFAULT_PLIES = 2
+
+
+class OpeningBook:
+    """A table of the best moves for the first few plies of Adversarial Wordle games.
+
+    An opening book is computed from a game tree with guesser win probabilities (usually a complete
+    game tree), and stores, for each move sequence of length < plies in that tree, the best next move
+    and its guesser win probability. The best move is the one with the highest guesser win probability
+    on the Guesser's turn, and the lowest on the Adversary's turn, just like the greedy tree players.
+
+    Opening books are saved on disk, keyed by a content hash of the word set, max_guesses and the depth of
+    the game tree, so later runs with the same configuration can skip computing the opening moves. (A book
+    computed from a shallower tree can have different best moves, so it is never used for a deeper one.)
+
+    Instance Attributes:
+        - word_set_key: the content hash of the word set (see get_word_set_key)
+        - max_guesses: the maximum number of guesses of the games this book is for
+        - depth: the depth of the game tree this book was computed from
+        - plies: the number of plies this book covers
+
+    Representation Invariants:
+        - self.max_guesses >= 1
+        - self.depth >= 0
+        - self.plies >= 0
+        - all(len(moves) < self.plies for moves in self._entries)
+    """
+    word_set_key: str
+    max_guesses: int
+    depth: int
+    plies: int
+
+    # Private Instance Attributes:
+    #   - _entries:
+    #       A mapping from each move sequence covered by this book to the best next move
+    #       and the guesser win probability after that move.
+    _entries: dict[tuple[str | tuple[str, ...], ...], tuple[str | tuple[str, ...], float]]
+
+    def __init__(self, word_set_key: str, max_guesses: int, depth: int, plies: int) -> None:
+        """Initialize a new opening book with no entries."""
+        self.word_set_key = word_set_key
+        self.max_guesses = max_guesses
+        self.depth = depth
+        self.plies = plies
+        self._entries = {}
+
+    def __len__(self) -> int:
+        """Return the number of move sequences covered by this book."""
+        return len(self._entries)
+
+    def add_entry(self, moves: Iterable[str | tuple[str, ...]], best_move: str | tuple[str, ...],
+                  guesser_win_probability: float) -> None:
+        """Record best_move as the best move after the given moves.
+
+        Preconditions:
+            - len(list(moves)) < self.plies
+            - 0.0 <= guesser_win_probability <= 1.0
+        """
+        self._entries[tuple(moves)] = (best_move, guesser_win_probability)
+
+    def get_move(self, moves: list[str | tuple[str, ...]]) -> Optional[str | tuple[str, ...]]:
+        """Return the best move after the given moves, or None if this book does not cover them."""
+        entry = self._entries.get(tuple(moves))
+        return None if entry is None else entry[0]
+
+    def get_move_for_game(self, game: aw.AdversarialWordle) -> Optional[str | tuple[str, ...]]:
+        """Return the best move for the current state of game, or None if this book does not cover it.
+
+        Preconditions:
+            - game.word_set is the word set this book was computed for
+        """
+        if game.max_guesses != self.max_guesses:
+            return None
+        return self.get_move(game.get_move_sequence())
+
+    def get_guesser_win_probability(self, moves: list[str | tuple[str, ...]]) -> Optional[float]:
+        """Return the guesser win probability after playing the best move after the given moves,
+        or None if this book does not cover them."""
+        entry = self._entries.get(tuple(moves))
+        return None if entry is None else entry[1]
+
+    def save(self, book_dir: str = OPENING_BOOK_DIR) -> str:
+        """Save this book as a JSON file in book_dir, replacing any book with the same key, and return its path."""
+        os.makedirs(book_dir, exist_ok=True)
+        path = _get_book_path(book_dir, self.word_set_key, self.max_guesses, self.depth)
+        data = {
+            'word_set_key': self.word_set_key,
+            'max_guesses': self.max_guesses,
+            'depth': self.depth,
+            'plies': self.plies,
+            'entries': [[[encode_move(move) for move in moves], encode_move(best_move), probability]
+                        for moves, (best_move, probability) in self._entries.items()]
+        }
+        # Write to a temporary file first, so that a crash never leaves a partially written book
+        with open(path + '.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+        return path
+
+
+def get_word_set_key(word_set: Iterable[str]) -> str:
+    """Return a content hash of the given word set, which does not depend on the order of the words.
+
+    >>> get_word_set_key(['hello', 'world']) == get_word_set_key({'world', 'hello'})
+    True
+    """
+    return hashlib.sha256('\n'.join(sorted(word_set)).encode()).hexdigest()
+
+
+def build_opening_book(game_tree: a2_game_tree.GameTree, word_set: Iterable[str], max_guesses: int,
+                       depth: int, plies: int = DEFAULT_PLIES) -> OpeningBook:
+    """Return an opening book covering the first plies plies of game_tree.
+
+    depth is the depth of game_tree, which is stored in the book.
+
+    Preconditions:
+        - game_tree.move == a2_game_tree.GAME_START_MOVE
+        - game_tree was generated for games with the given word_set and max_guesses
+        - plies >= 0
+
+    >>> tree = a2_game_tree.GameTree()
+    >>> tree.insert_move_sequence(['hello', ('Y', 'Y', 'Y', 'Y', 'Y')], 1.0)
+    >>> tree.insert_move_sequence(['world', ('N', 'N', 'N', 'N', 'N')], 0.0)
+    >>> book = build_opening_book(tree, ['hello', 'world'], 1, 2, plies=1)
+    >>> book.get_move([])
+    'hello'
+    >>> book.get_move(['hello']) is None
+    True
+    """
+    book = OpeningBook(get_word_set_key(word_set), max_guesses, depth, plies)
+    _add_book_entries(book, game_tree, [])
+    return book
+
+
+def _add_book_entries(book: OpeningBook, game_tree: a2_game_tree.GameTree,
+                      moves: list[str | tuple[str, ...]]) -> None:
+    """Add the best move for game_tree (whose move sequence is moves) and its descendants to book,
+    up to book.plies plies."""
+    subtrees = game_tree.get_subtrees()
+    if len(moves) >= book.plies or subtrees == []:
+        return
+
+    if game_tree.is_guesser_turn():
+        best_subtree = max(subtrees, key=lambda subtree: subtree.guesser_win_probability)
+    else:
+        best_subtree = min(subtrees, key=lambda subtree: subtree.guesser_win_probability)
+    book.add_entry(moves, best_subtree.move, best_subtree.guesser_win_probability)
+
+    for subtree in subtrees:
+        moves.append(subtree.move)
+        _add_book_entries(book, subtree, moves)
+        moves.pop()
+
+
+def load_opening_book(word_set: Iterable[str], max_guesses: int, depth: int,
+                      book_dir: str = OPENING_BOOK_DIR) -> Optional[OpeningBook]:
+    """Return the opening book saved in book_dir for the given word set and max_guesses, computed from
+    a game tree of the given depth, or None if there isn't one."""
+    word_set_key = get_word_set_key(word_set)
+    path = _get_book_path(book_dir, word_set_key, max_guesses, depth)
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        data = json.load(f)
+
+    book = OpeningBook(word_set_key, max_guesses, depth, data['plies'])
+    for moves, best_move, probability in data['entries']:
+        book.add_entry([decode_move(move) for move in moves], decode_move(best_move), probability)
+    return book
+
+
+def _get_book_path(book_dir: str, word_set_key: str, max_guesses: int, depth: int) -> str:
+    """Return the path of the opening book file for the given word set key, max_guesses and depth."""
+    return os.path.join(book_dir, f'{word_set_key}_{max_guesses}_{depth}.json')
+
+
+def encode_move(move: str | tuple[str, ...]) -> str:
+    """Return the given move as a string, in the same format as the games files read by a2_part1.
+
+    >>> encode_move(('Y', 'N', '?'))
+    'YN?'
+    """
+    return move if isinstance(move, str) else ''.join(move)
+
+
+def decode_move(move: str) -> str | tuple[str, ...]:
+    """Return the move encoded by encode_move.
+
+    >>> decode_move('YN?')
+    ('Y', 'N', '?')
+    >>> decode_move('hello')
+    'hello'
+    """
+    if all(char in aw.ALL_STATUSES for char in move):
+        return tuple(move)
+    else:
+        return move
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['hashlib', 'json', 'os', 'a2_adversarial_wordle', 'a2_game_tree'],
+    #     'allowed-io': ['OpeningBook.save', 'load_opening_book']
+    # })
@@ -1,37 +1,140 @@
 import csv
+import gzip
+import itertools
+import os
 import random
-from typing import Optional
+import tempfile
+import zlib
+from collections import Counter
+from typing import Iterable, Iterator, Optional, TextIO
 
 import a2_game_tree
 import a2_adversarial_wordle as aw  # aw is a short-form to save some typing
+import a2_opening_book
+
+
+# The number of temporary files the rows of a games file are split into when they are counted on disk
+SPILL_PARTITIONS = 64
 
 
 ################################################################################
 # Part 1 - Loading Adversarial Wordle game datasets
 ################################################################################
-def load_game_tree(games_file: str) -> a2_game_tree.GameTree:
+def load_game_tree(games_file: str, max_unique_in_memory: Optional[int] = None) -> a2_game_tree.GameTree:
     """Return a new game tree based on games_file.
 
+    If games_file ends with '.gz', it is read as a gzip-compressed file. Blank rows are skipped.
+
+    Identical rows are counted first, and each distinct move sequence is inserted into the tree once
+    with its number of occurrences, so the visit_count of each node is the number of games in the file
+    that passed through it. The guesser_win_count of each node is the number of those games that the
+    Guesser won (i.e., whose last move is a status of all 'Y').
+
+    If max_unique_in_memory is not None and the file has more than that many distinct rows, the counts
+    collected so far and the rest of the rows are instead split by hash into SPILL_PARTITIONS temporary
+    files, which are counted one at a time. The file is only read once either way.
+
     Preconditions:
         - games_file refers to a csv file in the format described on the assignment handout
+        - max_unique_in_memory is None or max_unique_in_memory >= 1
 
     """
     ans = a2_game_tree.GameTree()
-    with open(games_file) as csv_file:
-        reader = csv.reader(csv_file)
-        for row in reader:
-            cnt = 0
-            for mv in row:
-                if mv[0] == 'N' or mv[0] == 'Y' or mv[0] == '?':
-                    row[cnt] = tuple(mv)
-                cnt += 1
-            ans.insert_move_sequence(row)
+    with _open_games_file(games_file) as csv_file:
+        rows = (tuple(row) for row in csv.reader(csv_file) if row != [])
+        row_counts = _count_rows(rows, max_unique_in_memory)
+        if max_unique_in_memory is None or len(row_counts) <= max_unique_in_memory:
+            _insert_row_counts(ans, row_counts)
+            return ans
+
+        # Too many distinct rows to count at once, so move the counts so far into partitions along with
+        # the rest of the rows, and count them one partition at a time
+        with tempfile.TemporaryDirectory() as spill_dir:
+            paths = [os.path.join(spill_dir, f'{i}.csv') for i in range(SPILL_PARTITIONS)]
+            _spill_row_counts(itertools.chain(row_counts.items(), ((row, 1) for row in rows)), paths)
+            row_counts.clear()
+
+            for path in paths:
+                with open(path, newline='') as partition:
+                    _insert_row_counts(ans, _count_spilled_rows(csv.reader(partition)))
+
     return ans
 
 
+def _open_games_file(games_file: str) -> TextIO:
+    """Return games_file opened for reading as text, decompressing it if its name ends with '.gz'."""
+    if games_file.endswith('.gz'):
+        return gzip.open(games_file, 'rt', newline='')
+    else:
+        return open(games_file, newline='')
+
+
+def _count_rows(rows: Iterator[tuple[str, ...]], max_unique: Optional[int]) -> Counter:
+    """Return the number of occurrences of each distinct row in rows, in order of first appearance.
+
+    If max_unique is not None, stop as soon as more than max_unique distinct rows have been counted,
+    leaving the rest of the rows in the iterator.
+    """
+    row_counts = Counter()
+    for row in rows:
+        row_counts[row] += 1
+        if max_unique is not None and len(row_counts) > max_unique:
+            break
+    return row_counts
+
+
+def _spill_row_counts(row_counts: Iterable[tuple[tuple[str, ...], int]], paths: list[str]) -> None:
+    """Write each row and its count to one of the files at paths, chosen by a hash of the row.
+
+    Each line of the files is the count followed by the row, in csv format. Identical rows always go to
+    the same file.
+    """
+    partitions = [open(path, 'w', newline='') for path in paths]
+    try:
+        writers = [csv.writer(partition) for partition in partitions]
+        for row, count in row_counts:
+            writers[zlib.crc32(','.join(row).encode()) % len(paths)].writerow((count,) + row)
+    finally:
+        for partition in partitions:
+            partition.close()
+
+
+def _count_spilled_rows(lines: Iterable[list[str]]) -> Counter:
+    """Return the total count of each distinct row in lines written by _spill_row_counts."""
+    row_counts = Counter()
+    for line in lines:
+        row_counts[tuple(line[1:])] += int(line[0])
+    return row_counts
+
+
+def _insert_row_counts(game_tree: a2_game_tree.GameTree, row_counts: Counter) -> None:
+    """Insert each row of row_counts into game_tree once, with its count as the number of visits."""
+    for row, count in row_counts.items():
+        moves = [tuple(mv) if mv[0] == 'N' or mv[0] == 'Y' or mv[0] == '?' else mv for mv in row]
+        guesser_won = moves != [] and isinstance(moves[-1], tuple) and all(char == 'Y' for char in moves[-1])
+        game_tree.insert_move_sequence(moves, visits=count, guesser_wins=count if guesser_won else 0)
+
+
 ###############################################################################
 # Part 1 - Tree-based Random AIs
 ###############################################################################
+def _choose_subtree(game_tree: a2_game_tree.GameTree, weighted: bool) -> a2_game_tree.GameTree:
+    """Return a random subtree of game_tree.
+
+    If weighted is True, each subtree is chosen with probability proportional to its visit count
+    (or uniformly, if none of them have been visited).
+
+    Preconditions:
+        - game_tree.get_subtrees() != []
+    """
+    subtrees = game_tree.get_subtrees()
+    if weighted:
+        weights = [subtree.visit_count for subtree in subtrees]
+        if sum(weights) > 0:
+            return random.choices(subtrees, weights)[0]
+    return random.choice(subtrees)
+
+
 class RandomTreeGuesser(aw.Guesser):
     """An Adversarial Wordle Guesser that plays randomly based on a given GameTree.
 
@@ -44,20 +147,37 @@ class RandomTreeGuesser(aw.Guesser):
            the subtrees of its game tree, and then reassigns its game tree to that subtree.
            But if its game tree is None or has no subtrees, the player behaves like aw.RandomGuesser,
            and then sets its game tree to None.
+
+    The player only uses an opening book if it is given one. Then, before falling back to random moves,
+    it plays the book's move whenever the book covers the current game.
+
+    If the player is weighted, it picks each subtree with probability proportional to its visit count,
+    so it plays the moves that were most common in the games its tree was built from most often.
     """
     # Private Instance Attributes:
     #   - _game_tree:
     #       The GameTree that this player uses to make its moves. If None, then this
     #       player behaves like aw.RandomGuesser.
+    #   - _opening_book:
+    #       The opening book this player consults before making random moves, or None.
+    #   - _weighted:
+    #       Whether this player picks subtrees with probability proportional to their visit counts,
+    #       rather than uniformly.
     _game_tree: Optional[a2_game_tree.GameTree]
+    _opening_book: Optional[a2_opening_book.OpeningBook]
+    _weighted: bool
 
-    def __init__(self, game_tree: Optional[a2_game_tree.GameTree]) -> None:
+    def __init__(self, game_tree: Optional[a2_game_tree.GameTree],
+                 opening_book: Optional[a2_opening_book.OpeningBook] = None, weighted: bool = False) -> None:
         """Initialize this player.
 
         Preconditions:
             - game_tree.move == a2_game_tree.GAME_START_MOVE
+            - opening_book is None or it was computed for the word set of the games this player plays
         """
         self._game_tree = game_tree
+        self._opening_book = opening_book
+        self._weighted = weighted
 
     def make_move(self, game: aw.AdversarialWordle) -> str:
         """Return a guess given the current game.
@@ -65,24 +185,20 @@ class RandomTreeGuesser(aw.Guesser):
         Preconditions:
         - game.is_guesser_turn()
         """
-        if game.guesses:
+        if game.get_last_status() is not None:
             if self._game_tree is not None:
-                subtrees = self._game_tree.get_subtrees()
-                if len(subtrees) > 0:
-                    for st in subtrees:
-                        if st.move == game.statuses[-1]:
-                            self._game_tree = st
-                else:
-                    self._game_tree = None
+                self._game_tree = self._game_tree.find_subtree_by_move(game.get_last_status())
 
         if self._game_tree is not None and len(self._game_tree.get_subtrees()) > 0:
-            subtree = random.choice(self._game_tree.get_subtrees())
-            self._game_tree = subtree
+            self._game_tree = _choose_subtree(self._game_tree, self._weighted)
             return self._game_tree.move
+
+        self._game_tree = None
+        book_move = None if self._opening_book is None else self._opening_book.get_move_for_game(game)
+        if book_move is not None:
+            return book_move
         else:
-            guess = random.choice(game.get_possible_answers())
-            self._game_tree = None
-            return guess
+            return random.choice(game.get_possible_answers())
 
 
 class RandomTreeAdversary(aw.Adversary):
@@ -94,15 +210,26 @@ class RandomTreeAdversary(aw.Adversary):
     #   - _game_tree:
     #       The GameTree that this player uses to make its moves. If None, then this
     #       player behaves like aw.RandomAdversary.
+    #   - _opening_book:
+    #       The opening book this player consults before making random moves, or None.
+    #   - _weighted:
+    #       Whether this player picks subtrees with probability proportional to their visit counts,
+    #       rather than uniformly.
     _game_tree: Optional[a2_game_tree.GameTree]
+    _opening_book: Optional[a2_opening_book.OpeningBook]
+    _weighted: bool
 
-    def __init__(self, game_tree: Optional[a2_game_tree.GameTree]) -> None:
+    def __init__(self, game_tree: Optional[a2_game_tree.GameTree],
+                 opening_book: Optional[a2_opening_book.OpeningBook] = None, weighted: bool = False) -> None:
         """Initialize this player.
 
         Preconditions:
             - game_tree.move == a2_game_tree.GAME_START_MOVE
+            - opening_book is None or it was computed for the word set of the games this player plays
         """
         self._game_tree = game_tree
+        self._opening_book = opening_book
+        self._weighted = weighted
 
     def make_move(self, game: aw.AdversarialWordle) -> tuple[str, ...]:
         """Return a status given the current game.
@@ -111,27 +238,24 @@ class RandomTreeAdversary(aw.Adversary):
         - not game.is_guesser_turn()
         """
         if self._game_tree is not None:
-            subtrees = self._game_tree.get_subtrees()
-            if len(subtrees) > 0:
-                for st in subtrees:
-                    if st.move == game.guesses[-1]:
-                        self._game_tree = st
-            else:
-                self._game_tree = None
+            self._game_tree = self._game_tree.find_subtree_by_move(game.get_last_guess())
 
         if self._game_tree is not None and len(self._game_tree.get_subtrees()) > 0:
-            subtree = random.choice(self._game_tree.get_subtrees())
-            self._game_tree = subtree
+            self._game_tree = _choose_subtree(self._game_tree, self._weighted)
             return self._game_tree.move
+
+        self._game_tree = None
+        book_move = None if self._opening_book is None else self._opening_book.get_move_for_game(game)
+        if book_move is not None:
+            return book_move
         else:
             possible_answers = game.get_possible_answers()
-            current_guess = game.guesses[-1]
+            current_guess = game.get_last_guess()
 
             if len(possible_answers) > 1:
                 possible_answers.remove(current_guess)
 
             ans = random.choice(possible_answers)
-            self._game_tree = None
             return game.get_status_for_answer(ans)
 
 
@@ -139,7 +263,9 @@ class RandomTreeAdversary(aw.Adversary):
 # Part 1 - Runner
 ###############################################################################
 def part1_runner(games_file: str, word_set_file: str, max_guesses: int,
-                 num_games: int, adversary_random: bool) -> None:
+                 num_games: int, adversary_random: bool,
+                 opening_book_dir: Optional[str] = None, weighted: bool = False,
+                 opening_book_depth: Optional[int] = None) -> None:
     """Create a game tree from the given file, and run num_games games with the configuration described below.
 
     The Guesser is a RandomTreeGuesser whose game tree is the one generated from games_file.
@@ -148,23 +274,37 @@ def part1_runner(games_file: str, word_set_file: str, max_guesses: int,
 
     Each game uses the word set contained in word_set_file and has max_guesses as the maximum number of guesses.
 
+    If opening_book_dir is not None (e.g., a2_opening_book.OPENING_BOOK_DIR) and contains an opening book for
+    the word set, max_guesses and opening_book_depth (see a2_opening_book), the tree players consult it
+    before falling back to random moves. Otherwise, they never use an opening book.
+
+    If weighted is True, the tree players pick moves with probability proportional to how often
+    they appear in games_file, rather than uniformly.
+
     Preconditions:
         - games_file refers to a csv file in the format described on the assignment handout
         - word_set_file and max_guesses satisfy the preconditions of aw.run_games
         - num_games >= 1
+        - opening_book_dir is None or opening_book_depth >= 0
 
     """
     # create the game tree from the given file
     game_tree = load_game_tree(games_file)
 
+    # look for a saved opening book for this word set
+    opening_book = None
+    if opening_book_dir is not None:
+        opening_book = a2_opening_book.load_opening_book(aw.load_word_set(word_set_file), max_guesses,
+                                                         opening_book_depth, opening_book_dir)
+
     # create the guesser using the game tree
-    guesser = RandomTreeGuesser(game_tree)
+    guesser = RandomTreeGuesser(game_tree, opening_book, weighted)
 
     # create the adversary using either a random tree or a random guesser
     if adversary_random:
         adversary = aw.RandomAdversary()
     else:
-        adversary = RandomTreeAdversary(game_tree)
+        adversary = RandomTreeAdversary(game_tree, opening_book, weighted)
 
     # run the games using aw.run_games
     aw.run_games(
@@ -182,8 +322,9 @@ if __name__ == '__main__':
     # import python_ta
     # python_ta.check_all(config={
     #     'max-line-length': 120,
-    #     'extra-imports': ['a2_adversarial_wordle', 'a2_game_tree', 'random', 'csv'],
-    #     'allowed-io': ['load_game_tree']
+    #     'extra-imports': ['a2_adversarial_wordle', 'a2_game_tree', 'a2_opening_book', 'random', 'csv', 'gzip',
+    #                       'itertools', 'os', 'tempfile', 'zlib', 'collections'],
+    #     'allowed-io': ['load_game_tree', '_open_games_file', '_spill_row_counts']
     # })
 
     # Sample call to part1_runner
@@ -1,12 +1,20 @@
+import csv
+import gzip
 import random
-from typing import Optional
+from collections import Counter
+from typing import Iterator, Optional
 
 import a2_game_tree
 import a2_adversarial_wordle as aw
+import a2_memory
+import a2_opening_book
 
+# The default number of statuses drawn at each Adversary node of a sampled game tree
+DEFAULT_STATUS_SAMPLES = 8
 
-def generate_complete_game_tree(root_move: str | tuple[str, ...], game_state: aw.AdversarialWordle,
-                                d: int) -> a2_game_tree.GameTree:
+
+def generate_complete_game_tree(root_move: str | tuple[str, ...], game_state: aw.AdversarialWordle, d: int,
+                                monitor: Optional[a2_memory.MemoryMonitor] = None) -> a2_game_tree.GameTree:
     """Generate a complete game tree of depth d for all valid moves from the current game_state.
 
     For the returned GameTree:
@@ -18,6 +26,12 @@ def generate_complete_game_tree(root_move: str | tuple[str, ...], game_state: aw
     with a winner in fewer than d moves. Concretely, if game_state.get_winner() is not None,
     then return just a size-one GameTree containing the root move.
 
+    Each leaf has a guesser win probability of 1.0 if the Guesser has won in its game state,
+    and 0.0 otherwise. The guesser win probabilities of the other nodes follow from the leaves'.
+
+    If monitor is not None, every node is recorded in it, and a2_memory.MemoryBudgetExceeded is raised
+    as soon as the tree grows past the monitor's budget.
+
     Preconditions:
         - d >= 0
         - root_move == a2_game_tree.GAME_START_MOVE or root_move is a valid move
@@ -39,33 +53,231 @@ def generate_complete_game_tree(root_move: str | tuple[str, ...], game_state: aw
     ['hello', 'words', 'world']
 
     """
+    if monitor is not None:
+        monitor.add_node(game_state.get_num_moves())
+        monitor.check_budget()
+
     if d == 0 or game_state.get_winner() is not None:
-        return a2_game_tree.GameTree(root_move)
+        guesser_win_probability = 1.0 if game_state.get_winner() == 'Guesser' else 0.0
+        return a2_game_tree.GameTree(root_move, guesser_win_probability)
 
     tree = a2_game_tree.GameTree(root_move)
 
-    if isinstance(root_move, str):
-        possible_answers = game_state.get_possible_answers()
+    for move in _get_valid_moves(game_state):
+        new_state = game_state.copy_and_record_move(move)
+        tree.add_subtree(generate_complete_game_tree(move, new_state, d - 1, monitor))
+
+    return tree
+
+
+def generate_sampled_game_tree(root_move: str | tuple[str, ...], game_state: aw.AdversarialWordle, d: int,
+                               top_k: int, num_status_samples: int = DEFAULT_STATUS_SAMPLES,
+                               monitor: Optional[a2_memory.MemoryMonitor] = None,
+                               uniform_fraction: float = 0.0) -> a2_game_tree.SampledGameTree:
+    """Generate a sampled game tree of depth d from the current game_state.
+
+    This is like generate_complete_game_tree, but for word sets too large for a complete game tree:
+        - On the Guesser's turn, only the top_k possible answers by letter frequency
+          (see _rank_guesses_by_letter_frequency) become subtrees.
+        - On the Adversary's turn, if there are at most num_status_samples distinct statuses, they all
+          become subtrees. Otherwise, num_status_samples statuses are drawn at random with replacement,
+          and the distinct statuses drawn become subtrees. The probability of drawing each status is its
+          share of the possible answers, i.e., the probability that it is the status of a random answer.
+          If uniform_fraction > 0, that fraction of the probability is instead shared equally among all
+          the statuses, so that statuses with few answers, like the winning status, are drawn more often.
+
+    So every node has at most max(top_k, num_status_samples) subtrees, whatever the size of the word set.
+    The guesser win probabilities are estimates of those in the complete game tree, and come with estimated
+    standard errors (see a2_game_tree.SampledGameTree).
+
+    If monitor is not None, every node is recorded in it, and a2_memory.MemoryBudgetExceeded is raised
+    as soon as the tree grows past the monitor's budget.
+
+    Preconditions:
+        - root_move, game_state and d satisfy the preconditions of generate_complete_game_tree
+        - top_k >= 1
+        - num_status_samples >= 1
+        - 0.0 <= uniform_fraction <= 1.0
+
+    >>> example_game = aw.AdversarialWordle({'hello', 'words', 'world'}, 3)
+    >>> tree = generate_sampled_game_tree(a2_game_tree.GAME_START_MOVE, example_game, 1, top_k=2)
+    >>> sorted([subtree.move for subtree in tree.get_subtrees()])
+    ['words', 'world']
+    >>> tree.num_valid_moves
+    3
+    """
+    if monitor is not None:
+        monitor.add_node(game_state.get_num_moves())
+        monitor.check_budget()
+
+    if d == 0 or game_state.get_winner() is not None:
+        guesser_win_probability = 1.0 if game_state.get_winner() == 'Guesser' else 0.0
+        return a2_game_tree.SampledGameTree(root_move, guesser_win_probability)
+
+    possible_answers = game_state.get_possible_answers()
+    if game_state.is_guesser_turn():
+        tree = a2_game_tree.SampledGameTree(root_move, num_valid_moves=len(possible_answers))
+        for guess in _rank_guesses_by_letter_frequency(possible_answers)[:top_k]:
+            tree.add_subtree(generate_sampled_game_tree(guess, game_state.copy_and_record_guesser_move(guess),
+                                                        d - 1, top_k, num_status_samples, monitor, uniform_fraction))
+        return tree
+
+    bucket_sizes = Counter(game_state.get_status_for_answer(answer) for answer in possible_answers)
+    tree = a2_game_tree.SampledGameTree(root_move, num_valid_moves=len(bucket_sizes))
+    statuses = sorted(bucket_sizes)
+    draw_probabilities = {status: (1 - uniform_fraction) * bucket_sizes[status] / len(possible_answers)
+                          + uniform_fraction / len(statuses) for status in statuses}
+    if len(statuses) <= num_status_samples:
+        draws = {status: 0 for status in statuses}
+    else:
+        draws = Counter(random.choices(statuses, weights=[draw_probabilities[status] for status in statuses],
+                                       k=num_status_samples))
+
+    for status, count in draws.items():
+        subtree = generate_sampled_game_tree(status, game_state.copy_and_record_adversary_move(status),
+                                             d - 1, top_k, num_status_samples, monitor, uniform_fraction)
+        if count > 0:
+            subtree.sample_probability = draw_probabilities[status]
+            subtree.sample_count = count
+        tree.add_subtree(subtree)
+
+    return tree
+
+
+def _rank_guesses_by_letter_frequency(possible_answers: list[str]) -> list[str]:
+    """Return possible_answers sorted from best to worst guess by a cheap heuristic: the sum, over the distinct
+    letters of the guess, of the number of possible answers containing that letter. Ties are broken alphabetically.
+
+    Unlike a2_entropy.rank_guesses, this takes time proportional to len(possible_answers),
+    rather than its square.
+
+    >>> _rank_guesses_by_letter_frequency(['xyz', 'abd', 'abc'])
+    ['abc', 'abd', 'xyz']
+    """
+    letter_counts = Counter(char for answer in possible_answers for char in set(answer))
+    return sorted(possible_answers, key=lambda guess: (-sum(letter_counts[char] for char in set(guess)), guess))
+
+
+def generate_complete_move_sequences(game_state: aw.AdversarialWordle, d: int) -> Iterator[list]:
+    """Yield each root-to-leaf move sequence of generate_complete_game_tree(root_move, game_state, d).
+
+    The sequences are relative to game_state (so they do not include the root move), and are generated
+    depth-first without building the tree, so memory use is proportional to d. If the complete game tree
+    would have size one, nothing is yielded.
+
+    Preconditions:
+        - d >= 0
+
+    >>> example_game = aw.AdversarialWordle({'hello', 'words', 'world'}, 3)
+    >>> sorted(generate_complete_move_sequences(example_game, 1))
+    [['hello'], ['words'], ['world']]
+    >>> len(list(generate_complete_move_sequences(example_game, 2)))
+    9
+    """
+    path = []
+    yield from _generate_move_sequences_from(game_state, d, path)
+
+
+def _generate_move_sequences_from(game_state: aw.AdversarialWordle, d: int, path: list) -> Iterator[list]:
+    """Yield path + s for each move sequence s yielded by generate_complete_move_sequences(game_state, d).
+
+    path is mutated during the walk, but is restored to its original value when the walk finishes.
+
+    Preconditions:
+        - d >= 0
+    """
+    if d == 0 or game_state.get_winner() is not None:
+        if path:
+            yield list(path)
+        return
+
+    for move in _get_valid_moves(game_state):
+        path.append(move)
+        yield from _generate_move_sequences_from(game_state.copy_and_record_move(move), d - 1, path)
+        path.pop()
+
+
+def export_complete_game_tree(game_state: aw.AdversarialWordle, d: int, games_file: str) -> int:
+    """Write every move sequence of the complete game tree of depth d from game_state to games_file.
+
+    The file is written in the format read by a2_part1.load_game_tree, one move sequence per row,
+    as the sequences are generated (see generate_complete_move_sequences), so the tree is never held
+    in memory. If games_file ends with '.gz', the file is gzip-compressed.
+
+    Return the number of move sequences written.
+
+    Preconditions:
+        - d >= 0
+    """
+    if games_file.endswith('.gz'):
+        f = gzip.open(games_file, 'wt', newline='')
+    else:
+        f = open(games_file, 'w', newline='')
+
+    num_rows = 0
+    with f:
+        writer = csv.writer(f)
+        for moves in generate_complete_move_sequences(game_state, d):
+            writer.writerow(move if isinstance(move, str) else ''.join(move) for move in moves)
+            num_rows += 1
+
+    return num_rows
+
+
+def _get_valid_moves(game_state: aw.AdversarialWordle) -> list[str | tuple[str, ...]]:
+    """Return every valid move for the player whose turn it is in game_state.
+
+    For the Guesser, these are the possible answers. For the Adversary, these are the distinct
+    statuses of the most recent guess with respect to the possible answers.
+
+    Preconditions:
+        - game_state.get_winner() is None
+    """
+    possible_answers = game_state.get_possible_answers()
+    if game_state.is_guesser_turn():
+        return possible_answers
+    else:
+        return list({game_state.get_status_for_answer(answer) for answer in possible_answers})
 
 
 class GreedyTreeGuesser(aw.Guesser):
     """An Adversarial Wordle Guesser that plays greedily based on a given GameTree.
 
-    Description of its strategy not explained here
+    On its turn, this player first updates its game tree to the subtree corresponding to the Adversary's
+    most recent status (or None if there is no such subtree). Then, if its game tree is not None and has
+    subtrees, it picks the subtree with the highest guesser win probability. Otherwise, it picks a
+    random possible answer.
+
+    If the player has an opening book, the book is consulted first, and its move is played whenever
+    the book covers the current game. Once the game leaves the book, a player without a game tree
+    generates a complete game tree from the current game state (up to the depth the book was
+    computed for), and plays greedily from there.
     """
     # Private Instance Attributes:
     #   - _game_tree:
     #       The GameTree that this player uses to make its moves. If None, then this
     #       player just makes random moves.
+    #   - _opening_book:
+    #       The opening book this player consults before its game tree, or None.
+    #   - _continuation_trees:
+    #       A mapping from the move sequence of each game state where a game left the opening book to
+    #       the continuation tree generated there. Copies of this player share the same mapping, so each
+    #       continuation tree is generated once, however many games leave the book at the same point.
     _game_tree: Optional[a2_game_tree.GameTree]
+    _opening_book: Optional[a2_opening_book.OpeningBook]
+    _continuation_trees: dict[tuple[str | tuple[str, ...], ...], a2_game_tree.GameTree]
 
-    def __init__(self, game_tree: a2_game_tree.GameTree) -> None:
+    def __init__(self, game_tree: Optional[a2_game_tree.GameTree],
+                 opening_book: Optional[a2_opening_book.OpeningBook] = None) -> None:
         """Initialize this player.
 
         Preconditions:
-            - game_tree.move == a2_game_tree.GAME_START_MOVE
+            - game_tree is None or game_tree.move == a2_game_tree.GAME_START_MOVE
+            - opening_book is None or it was computed for the word set of the games this player plays
         """
         self._game_tree = game_tree
+        self._opening_book = opening_book
+        self._continuation_trees = {}
 
     def make_move(self, game: aw.AdversarialWordle) -> str:
         """Make a move given the current game.
@@ -73,26 +285,58 @@ class GreedyTreeGuesser(aw.Guesser):
         Preconditions:
             - game.is_guesser_turn()
         """
+        if game.get_last_status() is not None and self._game_tree is not None:
+            self._game_tree = self._game_tree.find_subtree_by_move(game.get_last_status())
+
+        book_move = None if self._opening_book is None else self._opening_book.get_move_for_game(game)
+        if book_move is not None:
+            if self._game_tree is not None:
+                self._game_tree = self._game_tree.find_subtree_by_move(book_move)
+            return book_move
+
+        if self._game_tree is None and self._opening_book is not None:
+            self._game_tree = _get_continuation_tree(game, self._opening_book.depth, self._continuation_trees)
+
+        if self._game_tree is None or self._game_tree.get_subtrees() == []:
+            self._game_tree = None
+            return random.choice(game.get_possible_answers())
+        else:
+            self._game_tree = max(self._game_tree.get_subtrees(),
+                                  key=lambda subtree: subtree.guesser_win_probability)
+            return self._game_tree.move
 
 
 class GreedyTreeAdversary(aw.Adversary):
     """An Adversarial Wordle Adversary that plays greedily based on a given GameTree.
 
-    Description of its strategy not explained here
+    This uses the analogous strategy as GreedyTreeGuesser, except that it picks the subtree with
+    the lowest guesser win probability, and when it has no game tree, it behaves like aw.RandomAdversary.
     """
     # Private Instance Attributes:
     #   - _game_tree:
     #       The GameTree that this player uses to make its moves. If None, then this
     #       player just makes random moves.
+    #   - _opening_book:
+    #       The opening book this player consults before its game tree, or None.
+    #   - _continuation_trees:
+    #       A mapping from the move sequence of each game state where a game left the opening book to
+    #       the continuation tree generated there. Copies of this player share the same mapping, so each
+    #       continuation tree is generated once, however many games leave the book at the same point.
     _game_tree: Optional[a2_game_tree.GameTree]
+    _opening_book: Optional[a2_opening_book.OpeningBook]
+    _continuation_trees: dict[tuple[str | tuple[str, ...], ...], a2_game_tree.GameTree]
 
-    def __init__(self, game_tree: a2_game_tree.GameTree) -> None:
+    def __init__(self, game_tree: Optional[a2_game_tree.GameTree],
+                 opening_book: Optional[a2_opening_book.OpeningBook] = None) -> None:
         """Initialize this player.
 
         Preconditions:
-            - game_tree.move == a2_game_tree.GAME_START_MOVE
+            - game_tree is None or game_tree.move == a2_game_tree.GAME_START_MOVE
+            - opening_book is None or it was computed for the word set of the games this player plays
         """
         self._game_tree = game_tree
+        self._opening_book = opening_book
+        self._continuation_trees = {}
 
     def make_move(self, game: aw.AdversarialWordle) -> tuple[str, ...]:
         """Make a move given the current game.
@@ -100,9 +344,98 @@ class GreedyTreeAdversary(aw.Adversary):
         Preconditions:
             - not game.is_guesser_turn()
         """
+        if self._game_tree is not None:
+            self._game_tree = self._game_tree.find_subtree_by_move(game.get_last_guess())
+
+        book_move = None if self._opening_book is None else self._opening_book.get_move_for_game(game)
+        if book_move is not None:
+            if self._game_tree is not None:
+                self._game_tree = self._game_tree.find_subtree_by_move(book_move)
+            return book_move
+
+        if self._game_tree is None and self._opening_book is not None:
+            self._game_tree = _get_continuation_tree(game, self._opening_book.depth, self._continuation_trees)
+
+        if self._game_tree is None or self._game_tree.get_subtrees() == []:
+            self._game_tree = None
+            return aw.RandomAdversary().make_move(game)
+        else:
+            self._game_tree = min(self._game_tree.get_subtrees(),
+                                  key=lambda subtree: subtree.guesser_win_probability)
+            return self._game_tree.move
+
+
+def _get_continuation_tree(game: aw.AdversarialWordle, depth: int,
+                           continuation_trees: dict[tuple[str | tuple[str, ...], ...], a2_game_tree.GameTree]) \
+        -> a2_game_tree.GameTree:
+    """Return the part of the complete game tree of the given depth (from the start of the game)
+    that follows the moves made so far in game.
+
+    continuation_trees maps move sequences to the trees already returned for them. The tree is only
+    generated if the moves made so far are not in it, and is then added to it.
+    """
+    moves = tuple(game.get_move_sequence())
+    if moves not in continuation_trees:
+        root_move = moves[-1] if moves else a2_game_tree.GAME_START_MOVE
+        continuation_trees[moves] = generate_complete_game_tree(root_move, game, max(depth - len(moves), 0))
+    return continuation_trees[moves]
 
 
-def part2_runner(word_set_file: str, max_guesses: int, depth: int, num_games: int, guesser_greedy: bool) -> None:
+def _generate_game_tree(game: aw.AdversarialWordle, depth: int, top_k: Optional[int], num_status_samples: int,
+                        monitor: Optional[a2_memory.MemoryMonitor] = None) -> a2_game_tree.GameTree:
+    """Return the complete game tree of the given depth for game if top_k is None, and otherwise
+    a sampled game tree with the given top_k and num_status_samples (see generate_sampled_game_tree).
+
+    Preconditions:
+        - game is in the initial game state
+        - depth >= 0
+        - top_k is None or top_k >= 1
+        - num_status_samples >= 1
+    """
+    if top_k is None:
+        return generate_complete_game_tree(a2_game_tree.GAME_START_MOVE, game, depth, monitor)
+    else:
+        return generate_sampled_game_tree(a2_game_tree.GAME_START_MOVE, game, depth, top_k, num_status_samples,
+                                          monitor)
+
+
+def _generate_game_tree_within_budget(game: aw.AdversarialWordle, depth: int, top_k: Optional[int],
+                                      num_status_samples: int, monitor: a2_memory.MemoryMonitor) \
+        -> tuple[Optional[a2_game_tree.GameTree], int]:
+    """Return the game tree of the given depth for game (see _generate_game_tree) and its depth,
+    built under monitor's budget, and print the monitor's report.
+
+    If the tree exceeds the budget and monitor.degrade is True, try again with smaller depths. Return
+    (None, depth) if no tree fits.
+
+    Preconditions:
+        - game is in the initial game state
+        - depth >= 0
+        - top_k is None or top_k >= 1
+        - num_status_samples >= 1
+    """
+    kind = 'complete' if top_k is None else 'sampled'
+    while True:
+        monitor.reset()
+        try:
+            game_tree = _generate_game_tree(game, depth, top_k, num_status_samples, monitor)
+        except a2_memory.MemoryBudgetExceeded as error:
+            print(f'The {kind} game tree of depth {depth} exceeds the memory budget:')
+            print(error.report)
+            if not monitor.degrade or depth == 0:
+                return None, depth
+            depth -= 1
+        else:
+            monitor.measure(game_tree)
+            print(f'{kind.capitalize()} game tree of depth {depth}:')
+            print(monitor.report())
+            return game_tree, depth
+
+
+def part2_runner(word_set_file: str, max_guesses: int, depth: int, num_games: int, guesser_greedy: bool,
+                 opening_book_dir: Optional[str] = None,
+                 monitor: Optional[a2_memory.MemoryMonitor] = None,
+                 top_k: Optional[int] = None, num_status_samples: int = DEFAULT_STATUS_SAMPLES) -> None:
     """Create a complete game tree with the given depth, and run num_games games using the following game configuration.
 
     If guesser_greedy is True, the Guesser player is the GreedyTreeGuesser and the Adversary is a RandomAdversary.
@@ -112,12 +445,64 @@ def part2_runner(word_set_file: str, max_guesses: int, depth: int, num_games: in
 
     word_set_file and max_guesses have the same meaning as in aw.run_games.
 
+    If opening_book_dir is not None (e.g., a2_opening_book.OPENING_BOOK_DIR), an opening book for the word set,
+    max_guesses and depth is looked up in that directory first. If one is found, the complete game tree is
+    not built: the greedy player plays the book's moves, and then only generates the part of the tree that
+    follows them. Otherwise, the complete game tree is built as usual, and an opening book computed from it
+    is saved for later runs. By default, no opening book is loaded or saved.
+
+    If monitor is not None, the complete game tree is built under its memory budget, and its report is
+    printed. If the tree does not fit, then no games are played if monitor.degrade is False; otherwise
+    the tree is rebuilt with smaller depths until it fits.
+
+    If top_k is not None, a sampled game tree with the given top_k and num_status_samples is used instead of
+    the complete game tree (see generate_sampled_game_tree), so that large word sets can be played with a tree
+    of controllable size. Opening books are neither loaded nor saved in this case, since they are only valid
+    for complete game trees.
+
     Preconditions:
         - word_set_file and max_guesses satisfy the preconditions of aw.run_games
         - depth >= 0
         - num_games >= 1
+        - top_k is None or top_k >= 1
+        - num_status_samples >= 1
 
     """
+    word_set = aw.load_word_set(word_set_file)
+    game_tree = None
+    opening_book = None
+    if top_k is not None:
+        opening_book_dir = None
+    if opening_book_dir is not None:
+        opening_book = a2_opening_book.load_opening_book(word_set, max_guesses, depth, opening_book_dir)
+
+    if opening_book is None:
+        game = aw.AdversarialWordle(word_set, max_guesses)
+        if monitor is None:
+            game_tree = _generate_game_tree(game, depth, top_k, num_status_samples)
+        else:
+            game_tree, depth = _generate_game_tree_within_budget(game, depth, top_k, num_status_samples, monitor)
+            if game_tree is None:
+                return
+        opening_book = None
+        if opening_book_dir is not None:
+            opening_book = a2_opening_book.build_opening_book(game_tree, word_set, max_guesses, depth)
+            opening_book.save(opening_book_dir)
+
+    if guesser_greedy:
+        guesser = GreedyTreeGuesser(game_tree, opening_book)
+        adversary = aw.RandomAdversary()
+    else:
+        guesser = aw.RandomGuesser()
+        adversary = GreedyTreeAdversary(game_tree, opening_book)
+
+    aw.run_games(
+        num_games=num_games,
+        guesser=guesser,
+        adversary=adversary,
+        word_set_file=word_set_file,
+        max_guesses=max_guesses,
+    )
 
 
 if __name__ == '__main__':
@@ -130,8 +515,9 @@ if __name__ == '__main__':
     # python_ta.check_all(config={
     #     'max-line-length': 120,
     #     'max-nested-blocks': 4,
-    #     'extra-imports': ['random', 'a2_adversarial_wordle', 'a2_game_tree'],
-    #     'allowed-io': ['part2_runner']
+    #     'extra-imports': ['csv', 'gzip', 'random', 'collections', 'a2_adversarial_wordle', 'a2_game_tree',
+    #                       'a2_memory', 'a2_opening_book'],
+    #     'allowed-io': ['part2_runner', 'export_complete_game_tree', '_generate_game_tree_within_budget']
     # })
 
     # Sample call to part2_runner
@@ -142,3 +528,13 @@ if __name__ == '__main__':
     #     num_games=100,
     #     guesser_greedy=False
     # )
+
+    # Sample call to part2_runner with a sampled game tree on the full word set
+    # part2_runner(
+    #     word_set_file='data/words/official_wordle.txt',
+    #     max_guesses=6,
+    #     depth=4,
+    #     num_games=100,
+    #     guesser_greedy=True,
+    #     top_k=10
+    # )
@@ -1,8 +1,15 @@
 import random
+from concurrent.futures import ProcessPoolExecutor
 from typing import Optional
 
 import a2_game_tree
 import a2_adversarial_wordle as aw
+import a2_checkpoint
+import a2_memory
+
+# The state of a worker process of run_parallel_learning_algorithm, set up by _init_learning_worker.
+# It maps 'game_tree' to the game tree the worker plays with, which it keeps across batches.
+_WORKER_STATE: dict[str, a2_game_tree.GameTree] = {}
 
 
 class ExploringGuesser(aw.Guesser):
@@ -28,16 +35,41 @@ class ExploringGuesser(aw.Guesser):
     def make_move(self, game: aw.AdversarialWordle) -> str:
         """Make a move given the current game.
 
+        On its turn, this player first updates its game tree to the subtree corresponding to the
+        Adversary's most recent status (or None if there is no such subtree). Then:
+
+            - if its game tree is None or has no subtrees, it makes a random move
+            - otherwise, with probability self._exploration_probability it makes a random move,
+              and otherwise it picks the subtree with the highest guesser win probability
+
+        After a random move, its game tree is updated to the subtree for that move, if there is one.
+
         Preconditions:
             - game.is_guesser_turn()
         """
+        if game.get_last_status() is not None and self._game_tree is not None:
+            self._game_tree = self._game_tree.find_subtree_by_move(game.get_last_status())
+
+        if self._game_tree is None or self._game_tree.get_subtrees() == [] \
+                or random.random() < self._exploration_probability:
+            guess = random.choice(game.get_possible_answers())
+            if self._game_tree is not None:
+                self._game_tree = self._game_tree.find_subtree_by_move(guess)
+            return guess
+        else:
+            self._game_tree = max(self._game_tree.get_subtrees(),
+                                  key=lambda subtree: subtree.guesser_win_probability)
+            return self._game_tree.move
 
 
 def run_learning_algorithm(
         word_set_file: str,
         max_guesses: int,
         exploration_probabilities: list[float],
-        show_stats: bool = True) -> a2_game_tree.GameTree:
+        show_stats: bool = True,
+        max_nodes: Optional[int] = None,
+        monitor: Optional[a2_memory.MemoryMonitor] = None,
+        checkpoint: Optional[a2_checkpoint.LearningCheckpoint] = None) -> a2_game_tree.GameTree:
     """Play a sequence of AdversarialWordle games using an ExploringGuesser and RandomAdversary.
 
     This algorithm first initializes an empty GameTree. All ExploringGuessers will use this
@@ -51,24 +83,226 @@ def run_learning_algorithm(
         - AFTER the game, the move sequence from the game is inserted into the game tree,
           with a guesser win probability of 1.0 if the Guesser won the game, and 0.0 otherwise.
 
+    If max_nodes is not None, the game tree is compacted (see GameTree.compact) whenever it grows
+    past max_nodes nodes, so that long runs use bounded memory.
+
+    If monitor is not None, every node added to the game tree is recorded in it. When the tree grows past
+    the monitor's budget, it is compacted back under the budget if monitor.degrade is True, and otherwise
+    a2_memory.MemoryBudgetExceeded is raised.
+
+    If checkpoint is not None, the run is resumed from it (see a2_checkpoint.LearningCheckpoint.resume):
+    the game tree starts as the tree learned by the games already recorded in the checkpoint, those games
+    are skipped, and every game played is recorded in the checkpoint. The checkpoint is closed when the run
+    stops, even if it stops with an error. In this case, the statistics shown are only for the games played
+    by this call, and the random moves of a resumed run are not the same as those of an uninterrupted one.
+
     Preconditions:
         - word_set_file and max_guesses satisfy the preconditions of aw.run_game
         - all(0.0 <= p <= 1.0 for p in exploration_probabilities)
         - exploration_probabilities != []
+        - max_nodes is None or max_nodes >= 1
+        - checkpoint is None or checkpoint has not been resumed yet
+
+    """
+    if checkpoint is None:
+        game_tree = a2_game_tree.GameTree()
+        results = _play_learning_games(game_tree, None, word_set_file, max_guesses, exploration_probabilities,
+                                       max_nodes, monitor)
+    else:
+        game_tree = checkpoint.resume(word_set_file, max_guesses)
+        try:
+            results = _play_learning_games(game_tree, None, word_set_file, max_guesses,
+                                           exploration_probabilities[checkpoint.num_games:],
+                                           max_nodes, monitor, checkpoint)
+        finally:
+            checkpoint.close()
+
+    if show_stats:
+        aw.plot_game_statistics(results)
+
+    return game_tree
+
 
+def run_parallel_learning_algorithm(
+        word_set_file: str,
+        max_guesses: int,
+        exploration_probabilities: list[float],
+        num_workers: int,
+        games_per_merge: int = 1000,
+        show_stats: bool = True,
+        max_nodes: Optional[int] = None,
+        monitor: Optional[a2_memory.MemoryMonitor] = None) -> a2_game_tree.GameTree:
+    """Play the same games as run_learning_algorithm, spread across num_workers processes.
+
+    The games are played in batches of games_per_merge games per worker. For each batch, every worker
+    process is sent only the exploration probabilities of its share of the batch, and plays them with
+    ExploringGuessers using its own game tree, which it keeps across batches. The games each worker played
+    are also inserted into a separate shard tree, which is sent back after the batch, and all shards are
+    merged into the master tree (see GameTree.merge). So the trees sent between processes only hold the
+    games of one batch, however large the master tree grows.
+
+    Unlike run_learning_algorithm, each worker only learns from the games played in its own process
+    (the master tree learns from all of them), so the learned tree after n games may differ from the
+    sequential algorithm's.
+    If max_nodes is not None, the master tree is compacted after each merge, and each worker's tree whenever
+    it grows past max_nodes nodes, as in run_learning_algorithm.
+    If monitor is not None, the master tree is measured after each merge, and its budget is enforced
+    as in run_learning_algorithm.
+    Return the master tree.
+
+    Preconditions:
+        - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+        - all(0.0 <= p <= 1.0 for p in exploration_probabilities)
+        - exploration_probabilities != []
+        - num_workers >= 1
+        - games_per_merge >= 1
+        - max_nodes is None or max_nodes >= 1
     """
+    game_tree = a2_game_tree.GameTree()
+    results = []
+    batch_size = num_workers * games_per_merge
+
+    with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_learning_worker) as executor:
+        for start in range(0, len(exploration_probabilities), batch_size):
+            batch = exploration_probabilities[start:start + batch_size]
+            futures = [executor.submit(_play_learning_shard, word_set_file, max_guesses,
+                                       batch[i::num_workers], random.randrange(2 ** 32), max_nodes)
+                       for i in range(0, min(num_workers, len(batch)))]
+
+            for future in futures:
+                shard, shard_results = future.result()
+                game_tree.merge(shard)
+                results.extend(shard_results)
+
+            if max_nodes is not None:
+                game_tree.compact(max_nodes)
+            if monitor is not None:
+                monitor.measure(game_tree)
+                _enforce_memory_budget(game_tree, monitor)
 
+    if show_stats:
+        aw.plot_game_statistics(results)
 
-def part3_runner() -> a2_game_tree.GameTree:
+    return game_tree
+
+
+def _init_learning_worker() -> None:
+    """Set up the state of a new worker process of run_parallel_learning_algorithm."""
+    _WORKER_STATE['game_tree'] = a2_game_tree.GameTree()
+
+
+def _play_learning_shard(word_set_file: str, max_guesses: int, exploration_probabilities: list[float],
+                         seed: int, max_nodes: Optional[int]) -> tuple[a2_game_tree.GameTree, list[str]]:
+    """Play one worker's share of a batch in run_parallel_learning_algorithm.
+
+    Return a new tree containing only the games played by this call, and the winner of each game.
+    The games are played using this worker process's game tree (which is mutated), exactly as in
+    run_learning_algorithm.
+
+    Preconditions:
+        - _init_learning_worker has been called in this process
+    """
+    random.seed(seed)
+    shard = a2_game_tree.GameTree()
+    results = _play_learning_games(_WORKER_STATE['game_tree'], shard, word_set_file, max_guesses,
+                                   exploration_probabilities, max_nodes)
+    return shard, results
+
+
+def _play_learning_games(game_tree: a2_game_tree.GameTree, shard: Optional[a2_game_tree.GameTree],
+                         word_set_file: str, max_guesses: int,
+                         exploration_probabilities: list[float],
+                         max_nodes: Optional[int] = None,
+                         monitor: Optional[a2_memory.MemoryMonitor] = None,
+                         checkpoint: Optional[a2_checkpoint.LearningCheckpoint] = None) -> list[str]:
+    """Play one game per exploration probability as described in run_learning_algorithm.
+
+    Each game's move sequence is inserted into game_tree, and also into shard if it is not None.
+    If checkpoint is not None, each game is recorded in it after it is inserted into game_tree.
+    If max_nodes is not None, game_tree is compacted whenever it grows past max_nodes nodes.
+    If monitor is not None, the nodes added to game_tree are recorded in it and its budget is enforced.
+    Return the winner of each game.
+    """
+    results = []
+    # An upper bound on len(game_tree), so that it only needs to be recounted when it might exceed max_nodes
+    max_size = len(game_tree)
+    if monitor is not None:
+        monitor.measure(game_tree)
+    for probability in exploration_probabilities:
+        guesser = ExploringGuesser(game_tree, probability)
+        game = aw.run_game(guesser, aw.RandomAdversary(), word_set_file, max_guesses)
+        winner = game.get_winner()
+        results.append(winner)
+
+        moves = game.get_move_sequence()
+        guesser_win_probability = 1.0 if winner == 'Guesser' else 0.0
+        guesser_wins = 1 if winner == 'Guesser' else 0
+        if monitor is not None:
+            _record_new_nodes(game_tree, moves, monitor)
+        game_tree.insert_move_sequence(moves, guesser_win_probability, guesser_wins=guesser_wins)
+        if checkpoint is not None:
+            checkpoint.record_game(game_tree, moves)
+        if shard is not None:
+            shard.insert_move_sequence(moves, guesser_win_probability, guesser_wins=guesser_wins)
+
+        max_size += len(moves)
+        if max_nodes is not None and max_size > max_nodes:
+            game_tree.compact(max_nodes)
+            max_size = len(game_tree)
+            if monitor is not None:
+                monitor.measure(game_tree)
+        if monitor is not None:
+            _enforce_memory_budget(game_tree, monitor)
+
+    return results
+
+
+def _record_new_nodes(game_tree: a2_game_tree.GameTree, moves: list[str | tuple[str, ...]],
+                      monitor: a2_memory.MemoryMonitor) -> None:
+    """Record in monitor the nodes that inserting moves into game_tree will add.
+
+    Preconditions:
+        - game_tree.move == a2_game_tree.GAME_START_MOVE
+    """
+    subtree = game_tree
+    for i, move in enumerate(moves):
+        subtree = subtree.find_subtree_by_move(move)
+        if subtree is None:
+            for depth in range(i + 1, len(moves) + 1):
+                monitor.add_node(depth)
+            return
+
+
+def _enforce_memory_budget(game_tree: a2_game_tree.GameTree, monitor: a2_memory.MemoryMonitor) -> None:
+    """Compact game_tree back under monitor's budget if monitor.degrade is True, and otherwise
+    raise a2_memory.MemoryBudgetExceeded if game_tree is over the budget."""
+    if monitor.degrade and monitor.is_over_budget():
+        monitor.record_pruned(game_tree, game_tree.compact(monitor.get_node_budget()))
+    monitor.check_budget()
+
+
+def part3_runner(monitor: Optional[a2_memory.MemoryMonitor] = None) -> Optional[a2_game_tree.GameTree]:
     """Run example for Part 3.
 
+    If monitor is not None, the learned tree is grown under its memory budget and its report is printed.
+    If the tree exceeds the budget (and monitor.degrade is False), the report is printed and None is returned.
     """
     word_set_file = 'data/words/official_wordle_100.txt'
     max_guesses = 3
 
     probabilities = [0.5] * 1000
 
-    return run_learning_algorithm(word_set_file, max_guesses, probabilities, show_stats=True)
+    try:
+        game_tree = run_learning_algorithm(word_set_file, max_guesses, probabilities, show_stats=True,
+                                           monitor=monitor)
+    except a2_memory.MemoryBudgetExceeded as error:
+        print('The learned game tree exceeds the memory budget:')
+        print(error.report)
+        return None
+
+    if monitor is not None:
+        print(monitor.report())
+    return game_tree
 
 
 if __name__ == '__main__':
@@ -78,8 +312,9 @@ if __name__ == '__main__':
     # python_ta.check_all(config={
     #     'max-line-length': 120,
     #     'max-nested-blocks': 4,
-    #     'extra-imports': ['random', 'a2_adversarial_wordle', 'a2_game_tree'],
-    #     'allowed-io': ['run_learning_algorithm']
+    #     'extra-imports': ['random', 'concurrent.futures', 'a2_adversarial_wordle', 'a2_checkpoint', 'a2_game_tree',
+    #                       'a2_memory'],
+    #     'allowed-io': ['run_learning_algorithm', 'part3_runner']
     # })
 
     part3_runner()
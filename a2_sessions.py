@@ -0,0 +1,413 @@
+"""An asyncio service that hosts many concurrent Adversarial Wordle games.
+
+Remote players play as the Guesser, and the server plays as the Adversary. Clients connect over
+TCP or a Unix socket and exchange newline-delimited JSON messages:
+
+    {"op": "new", "word_set": "wordle_100", "max_guesses": 6, "adversary": "random"}
+        -> {"session": "<id>", "word_size": 5}
+    {"op": "guess", "session": "<id>", "guess": "hello"}
+        -> {"status": "NY?NN", "winner": null}
+    {"op": "close", "session": "<id>"}
+        -> {}
+
+Any invalid request gets the response {"error": "<description>"}, as does a guess that the server's
+Adversary fails to respond to (the guess is then not recorded, so it may be sent again). A session is
+closed automatically once its game has a winner.
+
+Running this module starts a server on a local port and runs a load test against it.
+"""
+import asyncio
+import copy
+import json
+import math
+import random
+import time
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import a2_adversarial_wordle as aw
+
+
+class AdversaryError(Exception):
+    """Raised when the Adversary of a session fails to make a move."""
+
+
+class GameSession:
+    """A game hosted by a SessionManager, between a remote Guesser and a server-side Adversary.
+
+    Instance Attributes:
+        - game: the state of this session's game
+        - adversary: the Adversary player for this session
+        - lock: a lock held while a move is being made, so that the moves of one session are
+          processed one at a time
+    """
+    game: aw.AdversarialWordle
+    adversary: aw.Adversary
+    lock: asyncio.Lock
+
+    def __init__(self, game: aw.AdversarialWordle, adversary: aw.Adversary) -> None:
+        """Initialize a new session for the given game and adversary."""
+        self.game = game
+        self.adversary = adversary
+        self.lock = asyncio.Lock()
+
+
+class SessionManager:
+    """A collection of concurrent Adversarial Wordle sessions sharing the same word sets and players.
+
+    Word sets are loaded once, when the manager is created, and shared by every session that uses them.
+    Adversaries are created by factories, so several adversaries can share a single game tree
+    (e.g., lambda: a2_part1.RandomTreeAdversary(tree)).
+
+    Adversary moves (and the candidate filtering that follows them) run on an executor, so the event loop
+    can keep reading and answering requests while a slow adversary moves. The default executor is a
+    ThreadPoolExecutor: the moves are pure Python, so because of the GIL the threads only keep the event
+    loop responsive, and do not make several moves at once on different cores.
+
+    Call close when the manager is no longer needed, to shut down the executor it created.
+    """
+    # Private Instance Attributes:
+    #   - _word_sets:
+    #       A mapping from the name of each word set that clients may use to its words.
+    #   - _adversary_factories:
+    #       A mapping from the name of each adversary that clients may use to a function
+    #       that creates a new adversary of that kind.
+    #   - _sessions:
+    #       A mapping from session id to each session that has not finished or been closed.
+    #   - _executor:
+    #       The executor that adversary moves are run on.
+    #   - _owns_executor:
+    #       Whether _executor was created by this manager (rather than passed in), and so should be
+    #       shut down by close.
+    _word_sets: dict[str, frozenset[str]]
+    _adversary_factories: dict[str, Callable[[], aw.Adversary]]
+    _sessions: dict[str, GameSession]
+    _executor: Executor
+    _owns_executor: bool
+
+    def __init__(self, word_set_files: dict[str, str],
+                 adversary_factories: dict[str, Callable[[], aw.Adversary]],
+                 executor: Optional[Executor] = None) -> None:
+        """Initialize a new manager with no sessions.
+
+        word_set_files maps the name of each word set that clients may use to its word set file.
+        If executor is None, a new ThreadPoolExecutor is used, which close shuts down; an executor that is
+        passed in is left for the caller to shut down. Adversaries keep state between moves, so the executor
+        must run calls in this process (i.e., it can't be a ProcessPoolExecutor).
+
+        Preconditions:
+            - all word set files satisfy the preconditions of aw.run_game
+            - adversary_factories != {}
+        """
+        self._word_sets = {name: aw.load_word_set(word_set_file) for name, word_set_file in word_set_files.items()}
+        self._adversary_factories = adversary_factories
+        self._sessions = {}
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor()
+
+    def num_sessions(self) -> int:
+        """Return the number of sessions that have not finished or been closed."""
+        return len(self._sessions)
+
+    def create_session(self, word_set_name: str, max_guesses: int, adversary_name: str) -> str:
+        """Create a new session and return its id.
+
+        Raise ValueError if the word set or adversary name is unknown, or if max_guesses < 1.
+        """
+        if word_set_name not in self._word_sets:
+            raise ValueError(f'unknown word set: {word_set_name!r}')
+        if adversary_name not in self._adversary_factories:
+            raise ValueError(f'unknown adversary: {adversary_name!r}')
+        if max_guesses < 1:
+            raise ValueError('max_guesses must be at least 1')
+
+        game = aw.AdversarialWordle(self._word_sets[word_set_name], max_guesses)
+        session_id = uuid.uuid4().hex
+        self._sessions[session_id] = GameSession(game, self._adversary_factories[adversary_name]())
+        return session_id
+
+    def get_word_size(self, session_id: str) -> int:
+        """Return the word size of the given session's game.
+
+        Raise ValueError if there is no session with the given id.
+        """
+        return self._get_session(session_id).game.word_size
+
+    async def make_guess(self, session_id: str, guess: str) -> tuple[tuple[str, ...], Optional[str]]:
+        """Record the given guess in the given session, and return the Adversary's status and the winner.
+
+        The winner is None if the game is not over; otherwise the session is closed.
+
+        Raise ValueError if there is no session with the given id, or if guess is not one of the
+        session's possible answers. Raise AdversaryError if the session's Adversary fails to make its move,
+        in which case the guess is not recorded, and the session (including its Adversary's state) is left as
+        it was before the guess.
+        """
+        session = self._get_session(session_id)
+        async with session.lock:
+            if not session.game.is_possible_answer(guess):
+                raise ValueError(f'invalid guess: {guess!r}')
+
+            loop = asyncio.get_running_loop()
+            try:
+                game, adversary, status = await loop.run_in_executor(self._executor, _play_adversary_move,
+                                                                     session, guess)
+            except Exception as error:
+                raise AdversaryError(f'the adversary failed to respond to {guess!r}: {error!r}') from error
+            session.game = game
+            session.adversary = adversary
+
+        winner = session.game.get_winner()
+        if winner is not None:
+            self.close_session(session_id)
+        return status, winner
+
+    def close_session(self, session_id: str) -> None:
+        """Close the given session, if it exists."""
+        self._sessions.pop(session_id, None)
+
+    def close(self) -> None:
+        """Close every session, and shut down the executor if this manager created it.
+
+        The manager must not be used after it is closed.
+        """
+        self._sessions.clear()
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    def _get_session(self, session_id: str) -> GameSession:
+        """Return the session with the given id.
+
+        Raise ValueError if there is no such session.
+        """
+        if session_id not in self._sessions:
+            raise ValueError(f'unknown session: {session_id!r}')
+        return self._sessions[session_id]
+
+
+def _play_adversary_move(session: GameSession, guess: str) \
+        -> tuple[aw.AdversarialWordle, aw.Adversary, tuple[str, ...]]:
+    """Return a copy of the given session's game with guess and the Adversary's status for it recorded,
+    the copy of the session's Adversary that made the move, and the status.
+
+    The session's game and Adversary themselves are not changed, so that if the Adversary raises an error,
+    neither move is recorded and the Adversary's state is not advanced. The Adversary is copied with
+    copy.copy, like in aw.run_games: the players in this repository move by reassigning the attributes that
+    hold their state (and only add to shared caches), so a shallow copy is enough to keep the original's state.
+
+    Preconditions:
+        - session.game.is_guesser_turn()
+        - session.game.is_possible_answer(guess)
+    """
+    game = session.game.copy_and_record_guesser_move(guess)
+    adversary = copy.copy(session.adversary)
+    status = adversary.make_move(game)
+    game.record_adversary_move(status)
+    return game, adversary, status
+
+
+################################################################################
+# Socket front end
+################################################################################
+async def start_server(manager: SessionManager, host: str = '127.0.0.1', port: int = 0,
+                       unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+    """Start serving the given manager's sessions, and return the server.
+
+    If unix_path is not None, listen on a Unix socket at that path; otherwise, listen on the given
+    host and port (port 0 picks a free port, which can be found in server.sockets).
+    """
+    async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await _handle_client(manager, reader, writer)
+
+    if unix_path is not None:
+        return await asyncio.start_unix_server(handle_client, path=unix_path)
+    else:
+        return await asyncio.start_server(handle_client, host=host, port=port)
+
+
+async def _handle_client(manager: SessionManager,
+                         reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer the requests sent by one client until it disconnects.
+
+    A request line longer than the reader's limit gets an error response, like any other invalid request.
+    """
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError as error:
+                # readline raises ValueError (rather than asyncio.LimitOverrunError) when the line is
+                # longer than the reader's limit, after discarding the data it has read
+                response = {'error': f'request too long: {error}'}
+            else:
+                if line == b'':
+                    break
+
+                try:
+                    response = await _handle_request(manager, json.loads(line))
+                except (ValueError, KeyError, TypeError, AdversaryError) as error:
+                    # json.JSONDecodeError is a subclass of ValueError
+                    response = {'error': str(error)}
+
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def _handle_request(manager: SessionManager, request: dict) -> dict:
+    """Return the response to the given request, as described in the module docstring.
+
+    Raise ValueError, KeyError or TypeError if the request is invalid.
+    """
+    op = request['op']
+    if op == 'new':
+        session_id = manager.create_session(request['word_set'], int(request['max_guesses']),
+                                            request.get('adversary', 'random'))
+        return {'session': session_id, 'word_size': manager.get_word_size(session_id)}
+    elif op == 'guess':
+        status, winner = await manager.make_guess(request['session'], request['guess'])
+        return {'status': ''.join(status), 'winner': winner}
+    elif op == 'close':
+        manager.close_session(request['session'])
+        return {}
+    else:
+        raise ValueError(f'unknown op: {op!r}')
+
+
+class WordleClient:
+    """A client for the socket front end, used by the load test."""
+    # Private Instance Attributes:
+    #   - _reader: the stream that responses are read from
+    #   - _writer: the stream that requests are written to
+    _reader: asyncio.StreamReader
+    _writer: asyncio.StreamWriter
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Initialize a client using an open connection. Use WordleClient.connect to open one."""
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 0,
+                      unix_path: Optional[str] = None) -> 'WordleClient':
+        """Return a client connected to the server at the given address (see start_server)."""
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, request: dict) -> dict:
+        """Send the given request and return the server's response."""
+        self._writer.write(json.dumps(request).encode() + b'\n')
+        await self._writer.drain()
+        return json.loads(await self._reader.readline())
+
+    async def close(self) -> None:
+        """Close the connection to the server."""
+        self._writer.close()
+        await self._writer.wait_closed()
+
+
+################################################################################
+# Load testing
+################################################################################
+async def run_load_test(word_set_file: str, word_set_name: str, max_guesses: int,
+                        num_clients: int, games_per_client: int,
+                        host: str = '127.0.0.1', port: int = 0,
+                        unix_path: Optional[str] = None) -> dict[str, float]:
+    """Play games_per_client games on each of num_clients concurrent connections, and return latency stats.
+
+    Each client plays as a random Guesser: it mirrors its game locally (using the words in word_set_file,
+    which must be the server's word set word_set_name) to pick a random possible answer on each turn.
+    The latency of a move is the time between sending a guess and receiving its status. When the
+    clients run in the same process as the server, this includes time spent running other clients.
+
+    The returned dictionary contains the number of moves made, the moves per second over the whole test,
+    and the p50 and p99 move latencies in milliseconds.
+
+    Preconditions:
+        - num_clients >= 1
+        - games_per_client >= 1
+    """
+    word_set = aw.load_word_set(word_set_file)
+    latencies = []
+
+    async def play_client() -> None:
+        client = await WordleClient.connect(host, port, unix_path)
+        for _ in range(games_per_client):
+            response = await client.request({'op': 'new', 'word_set': word_set_name,
+                                             'max_guesses': max_guesses, 'adversary': 'random'})
+            session_id = response['session']
+            game = aw.AdversarialWordle(word_set, max_guesses)
+            while game.get_winner() is None:
+                guess = random.choice(game.get_possible_answers())
+                start = time.perf_counter()
+                response = await client.request({'op': 'guess', 'session': session_id, 'guess': guess})
+                latencies.append(time.perf_counter() - start)
+                game.record_guesser_move(guess)
+                game.record_adversary_move(tuple(response['status']))
+        await client.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play_client() for _ in range(num_clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {'moves': len(latencies),
+            'moves_per_sec': len(latencies) / elapsed,
+            'p50_ms': 1000.0 * _percentile(latencies, 0.50),
+            'p99_ms': 1000.0 * _percentile(latencies, 0.99)}
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Return the given percentile (as a fraction) of sorted_values, using the nearest-rank method.
+
+    Preconditions:
+        - sorted_values != []
+        - sorted_values == sorted(sorted_values)
+        - 0.0 < fraction <= 1.0
+
+    >>> _percentile([1.0, 2.0, 3.0, 4.0], 0.5)
+    2.0
+    >>> _percentile([1.0, 2.0, 3.0, 4.0], 0.99)
+    4.0
+    """
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def _run_example() -> None:
+    """Start a server on a free local port and run a load test against it."""
+    word_set_file = 'data/words/official_wordle_100.txt'
+    manager = SessionManager({'wordle_100': word_set_file}, {'random': aw.RandomAdversary})
+    server = await start_server(manager)
+    port = server.sockets[0].getsockname()[1]
+
+    try:
+        async with server:
+            report = await run_load_test(word_set_file, 'wordle_100', max_guesses=6,
+                                         num_clients=1000, games_per_client=2, port=port)
+    finally:
+        manager.close()
+
+    for stat, value in report.items():
+        print(f'{stat}: {value:.2f}')
+
+
+if __name__ == '__main__':
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['asyncio', 'copy', 'concurrent.futures', 'json', 'math', 'random', 'time', 'uuid',
+    #                       'a2_adversarial_wordle'],
+    #     'allowed-io': ['_run_example']
+    # })
+
+    asyncio.run(_run_example())
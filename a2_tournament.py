@@ -0,0 +1,365 @@
+"""A tournament runner that plays every Guesser against every Adversary on several game configurations.
+
+A tournament is a matrix of player factories (one row per Guesser, one column per Adversary) played
+on each of a number of configurations (a word set file and a maximum number of guesses). For each
+configuration, the word set is loaded once and the game trees the players need are built once, in a
+SharedResources object that every player factory receives. Games are split into batches that can be
+played on a pool of worker processes, and the result of each finished pairing is cached on disk, so
+rerunning a tournament only plays the pairings that were added or changed.
+
+The output is a win-rate matrix per configuration: the fraction of games won by the Guesser.
+"""
+import concurrent.futures
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import zlib
+from typing import Callable, Optional
+
+import a2_game_tree
+import a2_adversarial_wordle as aw
+import a2_entropy
+import a2_opening_book
+import a2_part1
+import a2_part2
+import a2_part3
+
+# The directory where finished pairing results are cached by default
+TOURNAMENT_CACHE_DIR = 'data/tournament_cache'
+
+# The number of games of a pairing played by each task sent to a worker
+GAMES_PER_TASK = 50
+
+# The tournament whose games are being played. Worker processes are forked from the process running
+# the tournament, so they inherit it (and its already built game trees) without pickling anything.
+_ACTIVE_TOURNAMENT = None
+
+
+class SharedResources:
+    """The word set and game trees shared by all players of a tournament configuration.
+
+    Game trees are built the first time they are requested, and the same tree is returned afterwards,
+    so player factories should always get their trees from here rather than building their own.
+
+    Instance Attributes:
+        - word_set_file: the file the word set was loaded from
+        - word_set: the words of the configuration's games
+        - word_set_key: the content hash of word_set (see a2_opening_book.get_word_set_key)
+        - max_guesses: the maximum number of guesses of the configuration's games
+
+    Representation Invariants:
+        - self.word_set != set()
+        - self.max_guesses >= 1
+    """
+    word_set_file: str
+    word_set: frozenset[str]
+    word_set_key: str
+    max_guesses: int
+
+    # Private Instance Attributes:
+    #   - _trees:
+    #       A mapping from a description of each game tree built so far to that tree.
+    _trees: dict[tuple, a2_game_tree.GameTree]
+
+    def __init__(self, word_set_file: str, max_guesses: int) -> None:
+        """Initialize the resources for games with the given word set file and max_guesses.
+
+        Preconditions:
+            - word_set_file and max_guesses satisfy the preconditions of aw.run_game
+        """
+        self.word_set_file = word_set_file
+        self.word_set = aw.load_word_set(word_set_file)
+        self.word_set_key = a2_opening_book.get_word_set_key(self.word_set)
+        self.max_guesses = max_guesses
+        self._trees = {}
+
+    def get_complete_game_tree(self, depth: int) -> a2_game_tree.GameTree:
+        """Return the complete game tree of the given depth (see a2_part2.generate_complete_game_tree).
+
+        Preconditions:
+            - depth >= 0
+        """
+        key = ('complete', depth)
+        if key not in self._trees:
+            game = aw.AdversarialWordle(self.word_set, self.max_guesses)
+            self._trees[key] = a2_part2.generate_complete_game_tree(a2_game_tree.GAME_START_MOVE, game, depth)
+        return self._trees[key]
+
+    def get_loaded_game_tree(self, games_file: str) -> a2_game_tree.GameTree:
+        """Return the game tree loaded from games_file (see a2_part1.load_game_tree).
+
+        Preconditions:
+            - games_file refers to a csv file in the format described on the assignment handout
+        """
+        key = ('loaded', games_file)
+        if key not in self._trees:
+            self._trees[key] = a2_part1.load_game_tree(games_file)
+        return self._trees[key]
+
+    def get_learned_game_tree(self, num_games: int, exploration_probability: float) -> a2_game_tree.GameTree:
+        """Return the game tree learned by a2_part3.run_learning_algorithm from num_games games,
+        all with the given exploration probability.
+
+        Preconditions:
+            - num_games >= 1
+            - 0.0 <= exploration_probability <= 1.0
+        """
+        key = ('learned', num_games, exploration_probability)
+        if key not in self._trees:
+            self._trees[key] = a2_part3.run_learning_algorithm(self.word_set_file, self.max_guesses,
+                                                               [exploration_probability] * num_games,
+                                                               show_stats=False)
+        return self._trees[key]
+
+
+class Tournament:
+    """A matrix of Guesser and Adversary factories, played against each other on several configurations.
+
+    Each factory takes the SharedResources of a configuration and returns a new player. Factories are
+    identified by name, and each pairing is cached on disk under its names, the word set's contents,
+    max_guesses, the number of games and the seed. So when a player's code changes, either rename it
+    or delete its cached results.
+
+    Instance Attributes:
+        - guesser_factories: a mapping from the name of each Guesser to its factory
+        - adversary_factories: a mapping from the name of each Adversary to its factory
+        - configs: a mapping from the name of each configuration to its (word set file, max_guesses)
+        - num_games: the number of games played for each pairing on each configuration
+        - seed: the seed that the random moves of every pairing are derived from
+        - cache_dir: the directory that finished pairing results are cached in, or None for no cache
+
+    Representation Invariants:
+        - self.guesser_factories != {}
+        - self.adversary_factories != {}
+        - self.configs != {}
+        - self.num_games >= 1
+    """
+    guesser_factories: dict[str, Callable[[SharedResources], aw.Guesser]]
+    adversary_factories: dict[str, Callable[[SharedResources], aw.Adversary]]
+    configs: dict[str, tuple[str, int]]
+    num_games: int
+    seed: int
+    cache_dir: Optional[str]
+
+    # Private Instance Attributes:
+    #   - _resources:
+    #       A mapping from the name of each configuration to its shared resources,
+    #       for the configurations that have been prepared so far.
+    _resources: dict[str, SharedResources]
+
+    def __init__(self, guesser_factories: dict[str, Callable[[SharedResources], aw.Guesser]],
+                 adversary_factories: dict[str, Callable[[SharedResources], aw.Adversary]],
+                 configs: dict[str, tuple[str, int]], num_games: int, seed: int = 0,
+                 cache_dir: Optional[str] = TOURNAMENT_CACHE_DIR) -> None:
+        """Initialize a new tournament.
+
+        Preconditions:
+            - guesser_factories != {} and adversary_factories != {}
+            - every Guesser can play against every Adversary
+            - configs != {}
+            - every (word set file, max_guesses) in configs satisfies the preconditions of aw.run_game
+            - num_games >= 1
+        """
+        self.guesser_factories = guesser_factories
+        self.adversary_factories = adversary_factories
+        self.configs = configs
+        self.num_games = num_games
+        self.seed = seed
+        self.cache_dir = cache_dir
+        self._resources = {}
+
+    def run(self, num_workers: int = 1) -> dict[tuple[str, str, str], float]:
+        """Play every pairing that is not cached yet, and return the Guesser win rate of every pairing.
+
+        The returned dictionary maps (configuration name, Guesser name, Adversary name) to the
+        fraction of that pairing's games won by the Guesser.
+
+        If num_workers > 1, the games are played on that many forked worker processes (or in this
+        process, on platforms that can't fork). Every batch of games is seeded from its pairing and
+        position, so the results do not depend on num_workers.
+
+        Preconditions:
+            - num_workers >= 1
+        """
+        global _ACTIVE_TOURNAMENT
+
+        win_rates = {}
+        tasks = []
+        for config_name in self.configs:
+            for guesser_name in self.guesser_factories:
+                for adversary_name in self.adversary_factories:
+                    pairing = (config_name, guesser_name, adversary_name)
+                    cached = self._load_cached_result(pairing)
+                    if cached is not None:
+                        win_rates[pairing] = cached
+                    else:
+                        tasks.extend((pairing, start, min(GAMES_PER_TASK, self.num_games - start))
+                                     for start in range(0, self.num_games, GAMES_PER_TASK))
+
+        # Build the shared trees before any worker is forked, by creating every player that has games left once
+        for config_name in sorted({pairing[0] for pairing, _, _ in tasks}):
+            resources = self._get_resources(config_name)
+            random.seed(zlib.crc32(f'{self.seed}/{config_name}'.encode()))
+            pairings = [pairing for pairing, _, _ in tasks if pairing[0] == config_name]
+            for guesser_name in dict.fromkeys(pairing[1] for pairing in pairings):
+                self.guesser_factories[guesser_name](resources)
+            for adversary_name in dict.fromkeys(pairing[2] for pairing in pairings):
+                self.adversary_factories[adversary_name](resources)
+
+        _ACTIVE_TOURNAMENT = self
+        try:
+            if num_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('fork')
+                with concurrent.futures.ProcessPoolExecutor(num_workers, mp_context=context) as executor:
+                    task_wins = list(executor.map(_play_task, tasks))
+            else:
+                task_wins = [_play_task(task) for task in tasks]
+        finally:
+            _ACTIVE_TOURNAMENT = None
+
+        guesser_wins = {}
+        for (pairing, _, _), wins in zip(tasks, task_wins):
+            guesser_wins[pairing] = guesser_wins.get(pairing, 0) + wins
+        for pairing, wins in guesser_wins.items():
+            win_rates[pairing] = wins / self.num_games
+            self._save_cached_result(pairing, win_rates[pairing])
+
+        return win_rates
+
+    def format_win_rates(self, win_rates: dict[tuple[str, str, str], float]) -> str:
+        """Return the given win rates (as returned by run) as one matrix per configuration,
+        with one row per Guesser and one column per Adversary."""
+        name_width = max(len(name) for name in self.guesser_factories)
+        lines = []
+        for config_name in self.configs:
+            lines.append(f'{config_name} (Guesser win rate)')
+            lines.append(' ' * name_width + ''.join(f' {name:>12}' for name in self.adversary_factories))
+            for guesser_name in self.guesser_factories:
+                row = ''.join(f' {100.0 * win_rates[(config_name, guesser_name, adversary_name)]:>11.1f}%'
+                              for adversary_name in self.adversary_factories)
+                lines.append(f'{guesser_name:<{name_width}}{row}')
+        return '\n'.join(lines)
+
+    def _play_games(self, pairing: tuple[str, str, str], start: int, num_games: int) -> int:
+        """Play num_games games of the given pairing, starting at game number start,
+        and return the number of games the Guesser won."""
+        config_name, guesser_name, adversary_name = pairing
+        resources = self._get_resources(config_name)
+        guesser = self.guesser_factories[guesser_name](resources)
+        adversary = self.adversary_factories[adversary_name](resources)
+
+        random.seed(zlib.crc32(f'{self.seed}/{config_name}/{guesser_name}/{adversary_name}/{start}'.encode()))
+        wins = 0
+        for _ in range(num_games):
+            game = aw.play_game(copy.copy(guesser), copy.copy(adversary), resources.word_set, resources.max_guesses)
+            if game.get_winner() == 'Guesser':
+                wins += 1
+        return wins
+
+    def _get_resources(self, config_name: str) -> SharedResources:
+        """Return the shared resources of the given configuration, loading them if necessary."""
+        if config_name not in self._resources:
+            word_set_file, max_guesses = self.configs[config_name]
+            self._resources[config_name] = SharedResources(word_set_file, max_guesses)
+        return self._resources[config_name]
+
+    def _get_cache_path(self, pairing: tuple[str, str, str]) -> str:
+        """Return the path of the cache file for the given pairing.
+
+        Preconditions:
+            - self.cache_dir is not None
+        """
+        config_name, guesser_name, adversary_name = pairing
+        resources = self._get_resources(config_name)
+        key = json.dumps([guesser_name, adversary_name, resources.word_set_key,
+                          resources.max_guesses, self.num_games, self.seed])
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def _load_cached_result(self, pairing: tuple[str, str, str]) -> Optional[float]:
+        """Return the cached Guesser win rate of the given pairing, or None if it isn't cached."""
+        if self.cache_dir is None:
+            return None
+        path = self._get_cache_path(pairing)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)['guesser_win_rate']
+
+    def _save_cached_result(self, pairing: tuple[str, str, str], win_rate: float) -> None:
+        """Cache the Guesser win rate of the given pairing, if this tournament has a cache."""
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._get_cache_path(pairing)
+        config_name, guesser_name, adversary_name = pairing
+        # Write to a temporary file first, so that a crash never leaves a partially written result
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'guesser': guesser_name, 'adversary': adversary_name, 'config': self.configs[config_name],
+                       'num_games': self.num_games, 'seed': self.seed, 'guesser_win_rate': win_rate}, f)
+        os.replace(path + '.tmp', path)
+
+
+def _play_task(task: tuple[tuple[str, str, str], int, int]) -> int:
+    """Play one batch of games (pairing, start, num_games) of the active tournament,
+    and return the number of games the Guesser won."""
+    return _ACTIVE_TOURNAMENT._play_games(*task)
+
+
+################################################################################
+# Standard players
+################################################################################
+# The depth of the complete game trees used by the standard greedy players
+GREEDY_TREE_DEPTH = 3
+
+# The number of games learned from by the standard learned-tree Guesser
+LEARNING_GAMES = 500
+
+
+def make_greedy_tree_guesser(resources: SharedResources) -> aw.Guesser:
+    """Return a GreedyTreeGuesser using the shared complete game tree of depth GREEDY_TREE_DEPTH."""
+    return a2_part2.GreedyTreeGuesser(resources.get_complete_game_tree(GREEDY_TREE_DEPTH))
+
+
+def make_greedy_tree_adversary(resources: SharedResources) -> aw.Adversary:
+    """Return a GreedyTreeAdversary using the shared complete game tree of depth GREEDY_TREE_DEPTH."""
+    return a2_part2.GreedyTreeAdversary(resources.get_complete_game_tree(GREEDY_TREE_DEPTH))
+
+
+def make_learned_guesser(resources: SharedResources) -> aw.Guesser:
+    """Return an ExploringGuesser that never explores, using a shared tree learned from LEARNING_GAMES games."""
+    return a2_part3.ExploringGuesser(resources.get_learned_game_tree(LEARNING_GAMES, 0.5), 0.0)
+
+
+STANDARD_GUESSERS = {
+    'random': lambda resources: aw.RandomGuesser(),
+    'entropy': lambda resources: a2_entropy.EntropyGuesser(),
+    'greedy_tree': make_greedy_tree_guesser,
+    'learned': make_learned_guesser,
+}
+
+STANDARD_ADVERSARIES = {
+    'random': lambda resources: aw.RandomAdversary(),
+    'greedy_tree': make_greedy_tree_adversary,
+}
+
+
+if __name__ == '__main__':
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['concurrent.futures', 'copy', 'hashlib', 'json', 'multiprocessing', 'os', 'random',
+    #                       'zlib', 'a2_adversarial_wordle', 'a2_entropy', 'a2_game_tree', 'a2_opening_book',
+    #                       'a2_part1', 'a2_part2', 'a2_part3'],
+    #     'allowed-io': ['Tournament._load_cached_result', 'Tournament._save_cached_result']
+    # })
+
+    tournament = Tournament(STANDARD_GUESSERS, STANDARD_ADVERSARIES,
+                            configs={'wordle_100_x4': ('data/words/official_wordle_100.txt', 4),
+                                     'wordle_100_x6': ('data/words/official_wordle_100.txt', 6)},
+                            num_games=200)
+    print(tournament.format_win_rates(tournament.run(num_workers=os.cpu_count() or 1)))
@@ -0,0 +1,468 @@
+"""A positional letter index for filtering the possible answers of Adversarial Wordle games.
+
+aw._find_correct_answers checks every word against every (guess, status) pair by computing its status,
+so filtering a word set takes time proportional to the number of words times the number of guesses.
+A WordIndex instead numbers the words of a word set, and represents any set of them as a bitmask
+(an int whose bit i is set exactly when word i is in the set). For every position and letter, it stores
+the bitmask of the words with that letter at that position.
+
+Each (guess, status) pair compiles into a bitmask of the words that are correct answers for it, using
+only these positional bitmasks. By the definition of the character statuses (see aw._get_status_code),
+answer is a correct answer for (guess, status) exactly when:
+
+    - answer[i] == guess[i] at every position i whose status is CORRECT
+    - answer[i] != guess[i] at every other position i (the "unmatched" positions)
+    - at every unmatched position i whose status is WRONG_POSITION, guess[i] is at some unmatched position
+      of answer, and at every unmatched position i whose status is INCORRECT, it is at no unmatched position
+
+So compiling a constraint takes O(word_size ** 2) bitmask operations, whatever the number of words,
+and each bitmask operation is a single pass over len(words) / 8 bytes in C. Note that, unlike in standard
+Wordle, how many times a letter appears never matters to a status, so no letter count index is needed.
+
+IndexedAdversarialWordle is an AdversarialWordle that keeps its possible answers as a bitmask, filters
+them with compiled constraints, and only decodes the words from the bitmask when they are asked for.
+It is meant for word sets with many thousands of words.
+
+PackedWords applies the same idea to status codes: it packs a list of words into fixed-width fields of
+an int, so that the status codes of one word against every word in the list are computed together with
+O(word_size ** 2) bitwise operations, rather than one aw._get_status_code call per word.
+"""
+from __future__ import annotations
+import array
+import sys
+from typing import Iterable, Optional
+
+import a2_adversarial_wordle as aw
+
+# The maximum number of word set indexes kept by get_word_index
+MAX_CACHED_INDEXES = 4
+
+# A mapping from each recently used word set to its index, so that games with the same words share one
+# index, from least to most recently used
+_INDEXES: dict[frozenset[str], WordIndex] = {}
+
+# A mapping from each number of bytes per status code to the array format (see the array module)
+# of status codes of that size
+CODE_FORMATS = {1: 'B', 2: 'H', 4: 'I'}
+
+
+class WordIndex:
+    """A positional letter index of a word set, which represents sets of its words as bitmasks.
+
+    Instance Attributes:
+        - words: the indexed words, sorted; word i is represented by bit i of every bitmask
+        - word_size: the length of the words
+        - all_words_mask: the bitmask of all the indexed words
+
+    Representation Invariants:
+        - len(self.words) > 0
+        - all(len(word) == self.word_size for word in self.words)
+        - self.all_words_mask == 2 ** len(self.words) - 1
+    """
+    words: list[str]
+    word_size: int
+    all_words_mask: int
+
+    # Private Instance Attributes:
+    #   - _position_masks:
+    #       For each position i, a mapping from each letter to the bitmask of the words with that letter
+    #       at position i. Letters at no word's position i are not in the mapping.
+    #   - _word_bits:
+    #       A mapping from each word to its bit number, i.e. its index in self.words.
+    _position_masks: list[dict[str, int]]
+    _word_bits: dict[str, int]
+
+    def __init__(self, word_set: Iterable[str]) -> None:
+        """Initialize an index of the given words.
+
+        Preconditions:
+            - word_set is not empty
+            - all words in word_set have the same length
+        """
+        self.words = sorted(set(word_set))
+        self.word_size = len(self.words[0])
+        self.all_words_mask = (1 << len(self.words)) - 1
+        self._word_bits = {word: i for i, word in enumerate(self.words)}
+
+        self._position_masks = []
+        for i in range(self.word_size):
+            bits_by_letter = {}
+            for bit, word in enumerate(self.words):
+                bits_by_letter.setdefault(word[i], []).append(bit)
+            self._position_masks.append({letter: self._get_mask_of_bits(bits)
+                                         for letter, bits in bits_by_letter.items()})
+
+    def get_mask(self, words: Iterable[str]) -> int:
+        """Return the bitmask of the given words.
+
+        Preconditions:
+            - all(word in self.words for word in words)
+
+        >>> index = WordIndex(['abc', 'abd', 'xyz'])
+        >>> bin(index.get_mask(['xyz', 'abc']))
+        '0b101'
+        """
+        return self._get_mask_of_bits([self._word_bits[word] for word in words])
+
+    def get_word_bit(self, word: str) -> Optional[int]:
+        """Return the bit number of the given word, or None if it is not one of the indexed words.
+
+        >>> index = WordIndex(['abc', 'abd', 'xyz'])
+        >>> index.get_word_bit('xyz'), index.get_word_bit('abe')
+        (2, None)
+        """
+        return self._word_bits.get(word)
+
+    def get_words(self, mask: int) -> list[str]:
+        """Return the words in the given bitmask, in sorted order (i.e., in order of their bits).
+
+        Preconditions:
+            - 0 <= mask <= self.all_words_mask
+
+        >>> index = WordIndex(['abc', 'abd', 'xyz'])
+        >>> index.get_words(0b110)
+        ['abd', 'xyz']
+        """
+        # Reversed, so that the character at index i of bits is bit i of mask
+        bits = format(mask, 'b')[::-1]
+        words = []
+        bit = bits.find('1')
+        while bit != -1:
+            words.append(self.words[bit])
+            bit = bits.find('1', bit + 1)
+        return words
+
+    def compile_constraint(self, guess: str, status: tuple[str, ...]) -> int:
+        """Return the bitmask of the words that are correct answers for the given guess and status,
+        as described in the module docstring.
+
+        Preconditions:
+            - len(guess) == self.word_size
+            - len(status) == self.word_size
+            - aw._is_valid_status(status)
+
+        >>> index = WordIndex(['abc', 'abd', 'bad', 'xyz'])
+        >>> index.get_words(index.compile_constraint('abc', ('Y', 'Y', 'N')))
+        ['abd']
+        >>> index.get_words(index.compile_constraint('abd', ('?', '?', 'Y')))
+        ['bad']
+        """
+        mask = self.all_words_mask
+        unmatched_positions = []
+        for i, char_status in enumerate(status):
+            letter_mask = self._position_masks[i].get(guess[i], 0)
+            if char_status == aw.CORRECT:
+                mask &= letter_mask
+            else:
+                mask &= ~letter_mask
+                unmatched_positions.append(i)
+
+        # A mapping from each guess letter at an unmatched position to the bitmask of the words with that
+        # letter at some unmatched position
+        unmatched_letter_masks = {}
+        for i in unmatched_positions:
+            letter = guess[i]
+            if letter not in unmatched_letter_masks:
+                unmatched_letter_masks[letter] = 0
+                for j in unmatched_positions:
+                    unmatched_letter_masks[letter] |= self._position_masks[j].get(letter, 0)
+
+            if status[i] == aw.WRONG_POSITION:
+                mask &= unmatched_letter_masks[letter]
+            else:
+                mask &= ~unmatched_letter_masks[letter]
+
+        return mask
+
+    def find_correct_answers(self, guesses: list[str], statuses: list[tuple[str, ...]],
+                             mask: Optional[int] = None) -> frozenset[str]:
+        """Return the words in mask (or all the indexed words, if mask is None) that are correct answers
+        for the given guesses and statuses.
+
+        This returns the same words as aw._find_correct_answers(self.get_words(mask), guesses, statuses).
+
+        Preconditions:
+            - all(len(guesses[i]) == len(statuses[i]) == self.word_size for i in range(0, len(guesses)))
+            - all(aw._is_valid_status(status) for status in statuses)
+            - mask is None or 0 <= mask <= self.all_words_mask
+        """
+        if mask is None:
+            mask = self.all_words_mask
+        for guess, status in zip(guesses, statuses):
+            mask &= self.compile_constraint(guess, status)
+        return frozenset(self.get_words(mask))
+
+    def _get_mask_of_bits(self, bits: list[int]) -> int:
+        """Return the bitmask with exactly the given bits set.
+
+        Preconditions:
+            - all(0 <= bit < len(self.words) for bit in bits)
+        """
+        # Setting bits in a bytearray takes constant time per bit, unlike building the int one bit at a time
+        mask_bytes = bytearray((len(self.words) + 7) // 8)
+        for bit in bits:
+            mask_bytes[bit >> 3] |= 1 << (bit & 7)
+        return int.from_bytes(mask_bytes, 'little')
+
+
+def get_word_index(word_set: frozenset[str]) -> WordIndex:
+    """Return the index of the given word set, building it if it is not one of the MAX_CACHED_INDEXES
+    most recently used.
+
+    Games keep a reference to their own index, so an index that is dropped from the cache stays alive
+    until the games using it are gone.
+
+    Preconditions:
+        - word_set is not empty
+        - all words in word_set have the same length
+    """
+    if word_set in _INDEXES:
+        # Move the index to the end, as the most recently used
+        index = _INDEXES.pop(word_set)
+    else:
+        index = WordIndex(word_set)
+        if len(_INDEXES) >= MAX_CACHED_INDEXES:
+            # Dicts keep insertion order, so the first key is the least recently used
+            del _INDEXES[next(iter(_INDEXES))]
+    _INDEXES[word_set] = index
+    return index
+
+
+def get_code_bytes(word_size: int) -> int:
+    """Return the number of bytes needed for each status code (see aw._get_status_code) of words of the given
+    length, out of the sizes in CODE_FORMATS.
+
+    Raise ValueError if the status codes of such words do not fit in 4 bytes.
+
+    >>> [get_code_bytes(word_size) for word_size in [5, 6, 10, 11, 20]]
+    [1, 2, 2, 4, 4]
+    """
+    for code_bytes in CODE_FORMATS:
+        if 3 ** word_size <= 2 ** (8 * code_bytes):
+            return code_bytes
+    raise ValueError(f'the status codes of words of length {word_size} do not fit in 4 bytes')
+
+
+class PackedWords:
+    """A list of words packed into the fields of ints, for computing the status codes of one word against
+    every word in the list at once.
+
+    A packed int has one field of code_bytes bytes for each word, where field i holds the value for
+    self.words[i]. For every position and letter, a field mask has the lowest bit of the field of each word
+    with that letter at that position set, so the digits of all the status codes at one position
+    (see aw._get_status_code) take O(word_size) bitwise operations on field masks. Every status code fits
+    in its field, so adding up the digits never carries from one field into the next.
+
+    Instance Attributes:
+        - words: the packed words
+        - word_size: the length of the words
+        - code_bytes: the number of bytes per status code
+        - code_format: the array format of status codes of code_bytes bytes
+
+    Representation Invariants:
+        - len(self.words) > 0
+        - all(len(word) == self.word_size for word in self.words)
+        - self.code_bytes == get_code_bytes(self.word_size)
+        - self.code_format == CODE_FORMATS[self.code_bytes]
+    """
+    words: list[str]
+    word_size: int
+    code_bytes: int
+    code_format: str
+
+    # Private Instance Attributes:
+    #   - _field_masks:
+    #       For each position i, a mapping from each letter to the field mask of the words with that letter
+    #       at position i. Letters at no word's position i are not in the mapping.
+    #   - _all_fields:
+    #       The field mask of all the words.
+    _field_masks: list[dict[str, int]]
+    _all_fields: int
+
+    def __init__(self, words: list[str]) -> None:
+        """Initialize a packing of the given words, in the given order.
+
+        Raise ValueError if the words are too long for their status codes to fit in 4 bytes.
+
+        Preconditions:
+            - words != []
+            - all words in words have the same length
+        """
+        self.words = words
+        self.word_size = len(words[0])
+        self.code_bytes = get_code_bytes(self.word_size)
+        self.code_format = CODE_FORMATS[self.code_bytes]
+
+        num_bytes = len(words) * self.code_bytes
+        self._all_fields = int.from_bytes((b'\x01' + bytes(self.code_bytes - 1)) * len(words), 'little')
+        self._field_masks = []
+        for i in range(self.word_size):
+            fields_by_letter = {}
+            for j, word in enumerate(words):
+                fields_by_letter.setdefault(word[i], bytearray(num_bytes))[j * self.code_bytes] = 1
+            self._field_masks.append({letter: int.from_bytes(fields, 'little')
+                                      for letter, fields in fields_by_letter.items()})
+
+    def get_codes_for_answer(self, answer: str) -> memoryview:
+        """Return the status codes of every word as a guess with respect to answer, i.e., a view (with format
+        self.code_format) whose item i is aw._get_status_code(answer, self.words[i]).
+
+        Preconditions:
+            - len(answer) == self.word_size
+
+        >>> packed = PackedWords(['abc', 'bca', 'cxa'])
+        >>> list(packed.get_codes_for_answer('abc')) == [aw._get_status_code('abc', w) for w in packed.words]
+        True
+        """
+        correct = [self._field_masks[i].get(letter, 0) for i, letter in enumerate(answer)]
+        unmatched = [self._all_fields ^ mask for mask in correct]
+        codes = 0
+        for i in range(self.word_size):
+            # The words whose letter i is answer[j] for some j where the word and answer do not match
+            wrong_position = 0
+            for j, letter in enumerate(answer):
+                wrong_position |= self._field_masks[i].get(letter, 0) & unmatched[j]
+            codes += (2 * correct[i] + (wrong_position & unmatched[i])) * 3 ** i
+        return self._get_code_view(codes)
+
+    def get_codes_for_guess(self, guess: str) -> memoryview:
+        """Return the status codes of guess with respect to every word as the answer, i.e., a view (with format
+        self.code_format) whose item i is aw._get_status_code(self.words[i], guess).
+
+        Preconditions:
+            - len(guess) == self.word_size
+
+        >>> packed = PackedWords(['abc', 'bca', 'cxa'])
+        >>> list(packed.get_codes_for_guess('abc')) == [aw._get_status_code(w, 'abc') for w in packed.words]
+        True
+        """
+        correct = [self._field_masks[i].get(letter, 0) for i, letter in enumerate(guess)]
+        unmatched = [self._all_fields ^ mask for mask in correct]
+        codes = 0
+        for i, letter in enumerate(guess):
+            # The words with guess[i] at some position j where the word and guess do not match
+            wrong_position = 0
+            for j in range(self.word_size):
+                wrong_position |= self._field_masks[j].get(letter, 0) & unmatched[j]
+            codes += (2 * correct[i] + (wrong_position & unmatched[i])) * 3 ** i
+        return self._get_code_view(codes)
+
+    def _get_code_view(self, codes: int) -> memoryview:
+        """Return a view of the status codes in the fields of codes, with format self.code_format."""
+        code_bytes = codes.to_bytes(len(self.words) * self.code_bytes, 'little')
+        if sys.byteorder == 'big' and self.code_bytes > 1:
+            swapped = array.array(self.code_format, code_bytes)
+            swapped.byteswap()
+            code_bytes = swapped.tobytes()
+        return memoryview(code_bytes).cast(self.code_format)
+
+
+class IndexedAdversarialWordle(aw.AdversarialWordle):
+    """An Adversarial Wordle game that filters its possible answers with a WordIndex.
+
+    The game has the same possible answers as an AdversarialWordle with the same words and moves, but its
+    state holds them as a bitmask, which each status narrows down with O(word_size ** 2) bitmask operations,
+    rather than by computing the status of the most recent guess for every possible answer. The words
+    themselves are only decoded from the bitmask (in time proportional to the number of words in the word
+    set) when they are needed, e.g., by get_possible_answers, and are then kept until the next status.
+
+    Unlike AdversarialWordle, get_possible_answers returns the words in sorted order (the order of their
+    bits), so the order does not depend on the history of the game or on string hashing.
+    """
+    # Private Instance Attributes:
+    #   - _index:
+    #       The index of this game's word set.
+    #   - _possible_answers_mask:
+    #       The bitmask of the possible answers in _index.
+    #   - _possible_answers_words:
+    #       The words in _possible_answers_mask in sorted order, or None if they have not been decoded since
+    #       it last changed.
+    _index: WordIndex
+    _possible_answers_mask: int
+    _possible_answers_words: Optional[list[str]]
+
+    def __init__(self, word_set: Iterable[str], max_guesses: int) -> None:
+        """Initialize a new game with the given word_set and max_guesses.
+
+        Preconditions:
+            - len(word_set) > 0
+            - all words in word_set have the same length
+            - max_guesses >= 1
+        """
+        word_set = frozenset(word_set)
+        # The index must exist before the initializer sets self._possible_answers
+        self._index = get_word_index(word_set)
+        super().__init__(word_set, max_guesses)
+
+    @property
+    def _possible_answers(self) -> frozenset[str]:
+        """Return the possible answers, decoding them from their bitmask if they have not been decoded yet."""
+        return frozenset(self._get_possible_answers_words())
+
+    @_possible_answers.setter
+    def _possible_answers(self, words: frozenset[str]) -> None:
+        """Set the possible answers to the given words.
+
+        Preconditions:
+            - words <= self.word_set
+        """
+        if len(words) == len(self._index.words):
+            self._possible_answers_mask = self._index.all_words_mask
+        else:
+            self._possible_answers_mask = self._index.get_mask(words)
+        self._possible_answers_words = None
+
+    def get_possible_answers(self) -> list[str]:
+        """Return the possible answers for the current game state in sorted order, or [] if a player has won
+        the game.
+        """
+        if self.get_winner() is None:
+            return list(self._get_possible_answers_words())
+        else:
+            return []
+
+    def is_possible_answer(self, word: str) -> bool:
+        """Return whether word is one of the possible answers for the current game state.
+
+        This tests the word's bit in the bitmask, without decoding the possible answers.
+        """
+        bit = self._index.get_word_bit(word)
+        return self.get_winner() is None and bit is not None and (self._possible_answers_mask >> bit) & 1 == 1
+
+    def get_num_possible_answers(self) -> int:
+        """Return the number of possible answers for the current game state, or 0 if a player has won the game.
+
+        The answers are counted in their bitmask, without decoding them.
+        """
+        return self._possible_answers_mask.bit_count() if self.get_winner() is None else 0
+
+    def _narrow_possible_answers(self, guess: str, status: tuple[str, ...]) -> None:
+        """Narrow down the possible answers to those for which guess has the given status.
+
+        Only the bitmask is updated; the words are decoded from it the next time they are needed.
+        """
+        self._possible_answers_mask &= self._index.compile_constraint(guess, status)
+        self._possible_answers_words = None
+
+    def _get_possible_answers_words(self) -> list[str]:
+        """Return the possible answers in sorted order, decoding them from their bitmask if they have not been
+        decoded yet.
+
+        The returned list is kept by the game, so it must not be mutated.
+        """
+        if self._possible_answers_words is None:
+            self._possible_answers_words = self._index.get_words(self._possible_answers_mask)
+        return self._possible_answers_words
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['array', 'sys', 'a2_adversarial_wordle'],
+    # })
@@ -0,0 +1,419 @@
+"""A read-only word set and status table shared between processes.
+
+Multi-process runs (e.g., a2_part3.run_parallel_learning_algorithm or a2_tournament) normally make every
+worker load its own copy of the word set, and compute every status it needs from scratch. A SharedWordStore
+is published once, into a multiprocessing.shared_memory block, and holds:
+
+    - the words of the word set, as fixed-width ASCII bytes, sorted
+    - optionally, the status table: for every (answer, guess) pair of words, the status of guess with
+      respect to answer, encoded as in aw._get_status_code
+
+Workers attach to the store by name with SharedWordStore.attach, which takes constant time: the words and
+the status table are both read directly from the shared block and are never copied. A word's index is found
+by binary search over the sorted words, and the Python list and frozenset of the words are only built in a
+process the first time something there needs them. SharedAdversarialWordle is an AdversarialWordle that keeps
+its possible answers as word indexes, and filters them with table lookups instead of string comparisons.
+
+The process that publishes a store must close and unlink it when all workers are done.
+"""
+from __future__ import annotations
+import bisect
+import multiprocessing
+import os
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory, util
+from typing import Iterable, Optional
+
+import a2_adversarial_wordle as aw
+import a2_word_index
+
+# The header at the start of every store: a magic string, the number of words, the word size, and
+# the number of bytes per status code (0 if the store has no status table)
+_HEADER = struct.Struct('<8sIII')
+_MAGIC = b'AWSTORE1'
+
+# A mapping from the name of each store published or attached to by this process to that store,
+# so that every game in a worker shares one attachment
+_ATTACHED_STORES: dict[str, SharedWordStore] = {}
+
+
+class SharedWordStore:
+    """A word set and (optionally) its status table, stored in shared memory.
+
+    Instance Attributes:
+        - name: the name other processes use to attach to this store
+        - num_words: the number of words in the store
+        - word_size: the length of the words
+        - has_status_table: whether the store holds a status for every (answer, guess) pair
+
+    Representation Invariants:
+        - self.num_words > 0
+        - self.word_size >= 1
+    """
+    name: str
+    num_words: int
+    word_size: int
+    has_status_table: bool
+
+    # Private Instance Attributes:
+    #   - _shm:
+    #       The shared memory block holding this store.
+    #   - _word_bytes:
+    #       A view of the words in _shm: the ASCII bytes of the sorted words, back to back, so that word i
+    #       is at index i * self.word_size.
+    #   - _status_table:
+    #       A view of the status table in _shm, where the code of guess word j with respect to answer word i
+    #       is at index i * self.num_words + j, or None if there is no status table.
+    #   - _owner:
+    #       Whether this object published the store (and so may unlink it).
+    #   - _words:
+    #       The words decoded from _word_bytes, or None if they have not been needed yet.
+    #   - _word_set:
+    #       The words as a frozenset, or None if they have not been needed yet.
+    _shm: shared_memory.SharedMemory
+    _word_bytes: Optional[memoryview]
+    _status_table: Optional[memoryview]
+    _owner: bool
+    _words: Optional[list[str]]
+    _word_set: Optional[frozenset[str]]
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        """Initialize a store backed by the given shared memory block, which must already hold a store.
+
+        This only reads the header of the block, so it takes constant time.
+        Use publish or attach instead of calling this directly.
+        """
+        magic, num_words, word_size, code_bytes = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f'shared memory block {shm.name!r} does not hold a word store')
+
+        words_end = _HEADER.size + num_words * word_size
+        self.name = shm.name
+        self.num_words = num_words
+        self.word_size = word_size
+        self.has_status_table = code_bytes > 0
+        self._shm = shm
+        self._word_bytes = shm.buf[_HEADER.size:words_end]
+        self._owner = owner
+        self._words = None
+        self._word_set = None
+        if code_bytes > 0:
+            table_end = words_end + num_words * num_words * code_bytes
+            self._status_table = shm.buf[words_end:table_end].cast(a2_word_index.CODE_FORMATS[code_bytes])
+        else:
+            self._status_table = None
+
+    @staticmethod
+    def publish(word_set: Iterable[str], with_status_table: bool = True,
+                name: Optional[str] = None) -> SharedWordStore:
+        """Create a new store holding the given words, and return it.
+
+        If with_status_table is True, the status of every pair of words is computed and stored, which takes
+        len(word_set) ** 2 bytes (2 bytes per pair for words longer than 5, and 4 for words longer than 10).
+        If name is None, a unique name is chosen.
+
+        Raise ValueError if with_status_table is True and the words are longer than 20, since their status
+        codes do not fit in 4 bytes.
+
+        Preconditions:
+            - word_set is not empty
+            - all words in word_set have the same length and are ASCII
+        """
+        words = sorted(set(word_set))
+        word_size = len(words[0])
+        code_bytes = a2_word_index.get_code_bytes(word_size) if with_status_table else 0
+
+        num_words = len(words)
+        size = _HEADER.size + num_words * word_size + num_words * num_words * code_bytes
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        try:
+            _HEADER.pack_into(shm.buf, 0, _MAGIC, num_words, word_size, code_bytes)
+            words_end = _HEADER.size + num_words * word_size
+            shm.buf[_HEADER.size:words_end] = ''.join(words).encode('ascii')
+            if with_status_table:
+                _write_status_table(shm, words_end, words)
+            store = SharedWordStore(shm, owner=True)
+        except BaseException:
+            # Don't leave a half-written block behind, since nothing else knows to unlink it
+            shm.close()
+            shm.unlink()
+            raise
+
+        _add_attached_store(store)
+        return store
+
+    @staticmethod
+    def attach(name: str) -> SharedWordStore:
+        """Return the store with the given name, attaching to it if this process has not already.
+
+        Attaching takes constant time, since nothing is copied out of the shared block.
+
+        Raise FileNotFoundError if there is no store with the given name.
+        """
+        if name not in _ATTACHED_STORES:
+            shm = shared_memory.SharedMemory(name=name)
+            if os.name == 'posix' and sys.version_info < (3, 13) and multiprocessing.parent_process() is None:
+                # Before Python 3.13, attaching registers the block with this process's resource tracker,
+                # which would unlink it when this process exits, even though the publisher still owns it.
+                # (Worker processes share their parent's tracker, where the publisher already registered it.)
+                # The tracker knows the block by its POSIX name, which (unlike shm.name) starts with '/'.
+                resource_tracker.unregister('/' + shm.name, 'shared_memory')
+            _add_attached_store(SharedWordStore(shm, owner=False))
+        return _ATTACHED_STORES[name]
+
+    @property
+    def words(self) -> list[str]:
+        """Return the words of the store, sorted.
+
+        The words are decoded from the shared block the first time they are needed in this process.
+        """
+        if self._words is None:
+            word_bytes = self._word_bytes.tobytes()
+            self._words = [word_bytes[i:i + self.word_size].decode('ascii')
+                           for i in range(0, len(word_bytes), self.word_size)]
+        return self._words
+
+    @property
+    def word_set(self) -> frozenset[str]:
+        """Return the words of the store, as a frozenset.
+
+        The frozenset is built the first time it is needed in this process.
+        """
+        if self._word_set is None:
+            self._word_set = frozenset(self.words)
+        return self._word_set
+
+    def get_word(self, index: int) -> str:
+        """Return the word with the given index, in sorted order.
+
+        Preconditions:
+            - 0 <= index < self.num_words
+        """
+        if self._words is not None:
+            return self._words[index]
+        start = index * self.word_size
+        return self._word_bytes[start:start + self.word_size].tobytes().decode('ascii')
+
+    def get_word_index(self, word: str) -> int:
+        """Return the index of the given word, in sorted order, by binary search over the shared block.
+
+        Raise ValueError if word is not in the store.
+        """
+        # Non-ASCII words raise UnicodeEncodeError, which is a subclass of ValueError
+        key = word.encode('ascii')
+        low, high = 0, self.num_words
+        while low < high:
+            middle = (low + high) // 2
+            start = middle * self.word_size
+            middle_word = self._word_bytes[start:start + self.word_size].tobytes()
+            if middle_word < key:
+                low = middle + 1
+            elif middle_word > key:
+                high = middle
+            else:
+                return middle
+        raise ValueError(f'{word!r} is not in the store')
+
+    def close(self) -> None:
+        """Detach this process from the store. The store must not be used afterwards."""
+        if self._status_table is not None:
+            self._status_table.release()
+            self._status_table = None
+        if self._word_bytes is not None:
+            self._word_bytes.release()
+            self._word_bytes = None
+        self._shm.close()
+        if _ATTACHED_STORES.get(self.name) is self:
+            del _ATTACHED_STORES[self.name]
+
+    def unlink(self) -> None:
+        """Close this store and free its shared memory block, once every process has detached from it.
+
+        Preconditions:
+            - this store was created by publish in this process
+        """
+        self.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def get_status_code(self, answer: str, guess: str) -> int:
+        """Return the status code of guess with respect to answer (see aw._get_status_code).
+
+        Preconditions:
+            - answer in self.word_set and guess in self.word_set
+        """
+        if self._status_table is None:
+            return aw._get_status_code(answer, guess)
+        return self._status_table[self.get_word_index(answer) * self.num_words + self.get_word_index(guess)]
+
+    def find_answer_indexes(self, answer_indexes: Optional[list[int]], guess_index: int,
+                            status_code: int) -> list[int]:
+        """Return the indexes in answer_indexes (or of all the words, if answer_indexes is None) of the words
+        whose status for the word with index guess_index has the given status code, in increasing order.
+
+        Preconditions:
+            - answer_indexes is None or answer_indexes is sorted in increasing order
+            - answer_indexes is None or all(0 <= i < self.num_words for i in answer_indexes)
+            - 0 <= guess_index < self.num_words
+        """
+        if self._status_table is None:
+            guess = self.get_word(guess_index)
+            words = self.words
+            candidates = range(self.num_words) if answer_indexes is None else answer_indexes
+            return [i for i in candidates if aw._get_status_code(words[i], guess) == status_code]
+
+        # The view must be released before the block can be closed
+        with self._status_table[guess_index::self.num_words] as codes:
+            if answer_indexes is None:
+                return [i for i, code in enumerate(codes) if code == status_code]
+            return [i for i in answer_indexes if codes[i] == status_code]
+
+
+def _add_attached_store(store: SharedWordStore) -> None:
+    """Add store to the stores used by this process, which are all closed when this process exits.
+
+    A shared memory block can't be closed while the store's view of its status table is alive, so
+    without this, the interpreter would report errors when it tries to close the block at exit.
+    """
+    if _ATTACHED_STORES == {}:
+        # Unlike atexit, this also runs when a multiprocessing worker process exits
+        util.Finalize(None, _close_attached_stores, exitpriority=0)
+    _ATTACHED_STORES[store.name] = store
+
+
+def _close_attached_stores() -> None:
+    """Close every store used by this process."""
+    for store in list(_ATTACHED_STORES.values()):
+        store.close()
+
+
+def _write_status_table(shm: shared_memory.SharedMemory, table_start: int, words: list[str]) -> None:
+    """Write the status table of the given words (see SharedWordStore._status_table) to shm, from table_start.
+
+    Each row of the table (the codes of every guess for one answer) is computed at once (see
+    a2_word_index.PackedWords).
+
+    Preconditions:
+        - words is not empty, sorted, and all words in words have the same length
+        - len(shm.buf) >= table_start + len(words) ** 2 * a2_word_index.get_code_bytes(len(words[0]))
+    """
+    packed_words = a2_word_index.PackedWords(words)
+    row_size = len(words) * packed_words.code_bytes
+    for row, answer in enumerate(words):
+        row_start = table_start + row * row_size
+        with packed_words.get_codes_for_answer(answer).cast('B') as row_codes:
+            shm.buf[row_start:row_start + row_size] = row_codes
+
+
+class SharedAdversarialWordle(aw.AdversarialWordle):
+    """An Adversarial Wordle game whose word set comes from a SharedWordStore.
+
+    The game's state holds the possible answers as the indexes of the words in the store, and each status
+    narrows them down by looking up the status codes of the most recent guess in the store's status table.
+    The words themselves are only decoded from the shared block when they are needed (e.g., by
+    get_possible_answers, which returns them in sorted order), and word_set is the store's word_set,
+    which is only built in a process the first time it is needed there.
+    """
+    # Private Instance Attributes:
+    #   - _store:
+    #       The store this game's words come from.
+    #   - _possible_answer_indexes:
+    #       The indexes in _store of the possible answers, in increasing order, or None if every word
+    #       is a possible answer. The list is never mutated, so copies of this game can share it.
+    _store: SharedWordStore
+    _possible_answer_indexes: Optional[list[int]]
+
+    def __init__(self, store: SharedWordStore, max_guesses: int) -> None:
+        """Initialize a new game with the words of store and the given max_guesses.
+
+        Unlike AdversarialWordle.__init__, this takes constant time, since the game's word set is not built.
+
+        Preconditions:
+            - max_guesses >= 1
+        """
+        self.word_size = store.word_size
+        self.max_guesses = max_guesses
+        self._guess_chain = None
+        self._status_chain = None
+        self._store = store
+        self._possible_answer_indexes = None
+
+    @staticmethod
+    def attach(store_name: str, max_guesses: int) -> SharedAdversarialWordle:
+        """Return a new game using the words of the store with the given name (see SharedWordStore.attach).
+
+        Preconditions:
+            - max_guesses >= 1
+        """
+        return SharedAdversarialWordle(SharedWordStore.attach(store_name), max_guesses)
+
+    @property
+    def word_set(self) -> frozenset[str]:
+        """Return the words of this game (see SharedWordStore.word_set)."""
+        return self._store.word_set
+
+    @property
+    def _possible_answers(self) -> frozenset[str]:
+        """Return the possible answers, decoded from the store."""
+        if self._possible_answer_indexes is None:
+            return self._store.word_set
+        return frozenset(self._store.get_word(i) for i in self._possible_answer_indexes)
+
+    def get_possible_answers(self) -> list[str]:
+        """Return the possible answers for the current game state, in sorted order,
+        or [] if a player has won the game."""
+        if self.get_winner() is not None:
+            return []
+        elif self._possible_answer_indexes is None:
+            return list(self._store.words)
+        else:
+            return [self._store.get_word(i) for i in self._possible_answer_indexes]
+
+    def get_num_possible_answers(self) -> int:
+        """Return the number of possible answers for the current game state, or 0 if a player has won the game.
+
+        The answers are counted by their indexes, without decoding them.
+        """
+        if self.get_winner() is not None:
+            return 0
+        elif self._possible_answer_indexes is None:
+            return self._store.num_words
+        else:
+            return len(self._possible_answer_indexes)
+
+    def is_possible_answer(self, word: str) -> bool:
+        """Return whether word is one of the possible answers for the current game state.
+
+        This finds word in the store by binary search, without decoding the possible answers.
+        """
+        if self.get_winner() is not None:
+            return False
+        try:
+            index = self._store.get_word_index(word)
+        except ValueError:
+            return False
+        if self._possible_answer_indexes is None:
+            return True
+        position = bisect.bisect_left(self._possible_answer_indexes, index)
+        return position < len(self._possible_answer_indexes) and self._possible_answer_indexes[position] == index
+
+    def _narrow_possible_answers(self, guess: str, status: tuple[str, ...]) -> None:
+        """Narrow down the possible answers to those for which guess has the given status,
+        using the store's status table."""
+        self._possible_answer_indexes = self._store.find_answer_indexes(
+            self._possible_answer_indexes, self._store.get_word_index(guess), aw._encode_status(status))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod(verbose=True)
+
+    # When you are ready to check your work with python_ta, uncomment the following lines.
+
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'max-line-length': 120,
+    #     'extra-imports': ['bisect', 'multiprocessing', 'multiprocessing.util', 'os', 'struct', 'sys',
+    #                       'a2_adversarial_wordle', 'a2_word_index'],
+    # })